@@ -9,72 +9,99 @@ from ui_manager import print_success, print_error, print_info
 from bip_utils import Bip44Coins
 
 # --- ШАБЛОНЫ ---
-STANDARD_TEMPLATE = """from bip_utils import {bip_import}, {coins_import}, Bip44Changes
+STANDARD_TEMPLATE = """from bip_utils import {bip_import}, {coins_import}
+from derivation import from_seed, derive_keys, derive_keys_batch
+
+
+def _keys(acc_obj):
+    return {{
+        "address": acc_obj.PublicKey().ToAddress(),
+        "private_key": acc_obj.PrivateKey().Raw().ToHex()
+    }}
+
 
 class NetworkGenerator:
     NAME = "{display_name}"
     SYMBOL = "{symbol}"
 
     @staticmethod
-    def generate(seed_bytes, config=None):
+    def generate(seed_bytes, config=None, seed_ctx=None):
         # Стандартная генерация для {display_name}
-        bip_obj = {bip_class}.FromSeed(seed_bytes, {coins_import}.{enum_name})
-        acc_obj = bip_obj.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(0)
+        bip_obj = from_seed({bip_class}, seed_bytes, {coins_import}.{enum_name}, seed_ctx)
 
-        return {{
-            "address": acc_obj.PublicKey().ToAddress(),
-            "private_key": acc_obj.PrivateKey().Raw().ToHex()
-        }}
+        # config может задавать диапазоны адресов/аккаунтов (см. derivation.py)
+        return derive_keys(bip_obj, config, _keys)
+
+    @staticmethod
+    def generate_batch(seeds, config=None, mnemonics=None):
+        # Пачка seed за вызов (см. derivation.derive_keys_batch)
+        return derive_keys_batch(seeds, {bip_class}, {coins_import}.{enum_name}, config, _keys,
+                                 lambda seed_bytes: NetworkGenerator.generate(seed_bytes, config))
 """
 
-CUSTOM_TEMPLATE = """from bip_utils import Bip44, Bip44Coins, Bip44Changes
+CUSTOM_TEMPLATE = """from bip_utils import Bip44, Bip44Coins
 from bip_utils.bech32 import Bech32Encoder
+from derivation import from_seed, iter_path_nodes, has_ranges, bip44_path_batch
 import hashlib
 
+# Путь из Wizard. Можно указывать диапазоны: m/44'/60'/0'/0/{{0..99}}
+DERIVATION_PATH = "{derivation_path}"
+BASE_LOGIC = "{base_logic}"
+COSMOS_PREFIX = "{cosmos_prefix}"
+
+# 1. Базовая криптография (по умолчанию — EVM)
+COINS = {{"COSMOS": Bip44Coins.COSMOS, "SOLANA": Bip44Coins.SOLANA, "BITCOIN": Bip44Coins.BITCOIN}}
+COIN = COINS.get(BASE_LOGIC, Bip44Coins.ETHEREUM)
+
+
+def _keys(path, acc_obj):
+    # 3. ФОРМИРОВАНИЕ АДРЕСА
+    if BASE_LOGIC == "COSMOS":
+        pub_key_bytes = acc_obj.PublicKey().RawCompressed().ToBytes()
+        sha256 = hashlib.sha256(pub_key_bytes).digest()
+        ripemd = hashlib.new('ripemd160')
+        ripemd.update(sha256)
+        address = Bech32Encoder.Encode(COSMOS_PREFIX, ripemd.digest())
+        priv = acc_obj.PrivateKey().Raw().ToHex()
+
+    elif BASE_LOGIC == "BITCOIN":
+        address = acc_obj.PublicKey().ToAddress()
+        priv = acc_obj.PrivateKey().ToWif()
+
+    else:
+        address = acc_obj.PublicKey().ToAddress()
+        priv = acc_obj.PrivateKey().Raw().ToHex()
+
+    return {{
+        "address": address,
+        "private_key": priv,
+        "path": path
+    }}
+
+
 class NetworkGenerator:
     NAME = "{display_name} (Custom)"
     SYMBOL = "{symbol}"
 
     @staticmethod
-    def generate(seed_bytes, config=None):
-        # Config placeholder
-
-        # 1. Выбираем базовую криптографию
-        if "{base_logic}" == "COSMOS":
-             bip_obj = Bip44.FromSeed(seed_bytes, Bip44Coins.COSMOS)
-             prefix = "{cosmos_prefix}"
-        elif "{base_logic}" == "SOLANA":
-             bip_obj = Bip44.FromSeed(seed_bytes, Bip44Coins.SOLANA)
-        elif "{base_logic}" == "BITCOIN":
-             bip_obj = Bip44.FromSeed(seed_bytes, Bip44Coins.BITCOIN)
-        else:
-             # EVM
-             bip_obj = Bip44.FromSeed(seed_bytes, Bip44Coins.ETHEREUM)
-
-        acc_obj = bip_obj.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(0)
-
-        # 3. ФОРМИРОВАНИЕ АДРЕСА
-        if "{base_logic}" == "COSMOS":
-            pub_key_bytes = acc_obj.PublicKey().RawCompressed().ToBytes()
-            sha256 = hashlib.sha256(pub_key_bytes).digest()
-            ripemd = hashlib.new('ripemd160')
-            ripemd.update(sha256)
-            address = Bech32Encoder.Encode(prefix, ripemd.digest())
-            priv = acc_obj.PrivateKey().Raw().ToHex()
-
-        elif "{base_logic}" == "BITCOIN":
-            address = acc_obj.PublicKey().ToAddress()
-            priv = acc_obj.PrivateKey().ToWif()
-
-        else:
-            address = acc_obj.PublicKey().ToAddress()
-            priv = acc_obj.PrivateKey().Raw().ToHex()
-
-        return {{
-            "address": address,
-            "private_key": priv,
-            "path": "{derivation_path}"
-        }}
+    def generate(seed_bytes, config=None, seed_ctx=None):
+        # config["path"] переопределяет путь из Wizard
+        path_template = (config or {{}}).get("path", DERIVATION_PATH)
+        bip_obj = from_seed(Bip44, seed_bytes, COIN, seed_ctx)
+
+        # 2. Деривация по пути (родительские узлы считаются один раз на весь диапазон)
+        results = [_keys(path, acc_obj) for path, acc_obj in iter_path_nodes(bip_obj, path_template)]
+        return results if has_ranges({{"path": path_template}}) else results[0]
+
+    @staticmethod
+    def generate_batch(seeds, config=None, mnemonics=None):
+        # Путь без диапазонов — пачкой (derivation.bip44_path_batch), с диапазонами — generate
+        path_template = (config or {{}}).get("path", DERIVATION_PATH)
+        if has_ranges({{"path": path_template}}):
+            return [NetworkGenerator.generate(seed_bytes, config) for seed_bytes in seeds]
+        nodes = bip44_path_batch(seeds, Bip44, COIN, path_template)
+        return [_keys(*node) if node is not None else NetworkGenerator.generate(seed_bytes, config)
+                for seed_bytes, node in zip(seeds, nodes)]
 """
 
 
@@ -85,6 +112,15 @@ def get_coin_list():
     return sorted(coins)
 
 
+def validate_path(text):
+    from derivation import parse_path
+    try:
+        parse_path(text)
+        return True
+    except ValueError as e:
+        return str(e)
+
+
 def save_file(filename, content):
     if not os.path.exists("networks"):
         os.makedirs("networks")
@@ -138,8 +174,9 @@ def run_custom_mode(default_name="My Custom Chain", default_ticker="MYCHAIN"):
         base_logic = "BITCOIN"
         default_path = "m/44'/0'/0'/0/0"
 
-    derivation_path = questionary.text(f"Путь деривации ({base_logic}):", default=default_path,
-                                       style=ui_manager.custom_style).ask()
+    derivation_path = questionary.text(f"Путь деривации ({base_logic}), диапазон: {{0..99}}:", default=default_path,
+                                       validate=validate_path, style=ui_manager.custom_style).ask()
+    if not derivation_path: return
 
     file_content = CUSTOM_TEMPLATE.format(
         display_name=custom_name, symbol=custom_ticker.upper(),
@@ -0,0 +1,151 @@
+"""
+Аудит .enc файла: каждая запись заново выводится из своих mnemonic + passphrase.
+
+Перед пополнением адресов нужно доказательство, что address / private_key и
+остальные поля записи действительно получаются из её мнемоники той сетью и тем
+конфигом, которыми файл был сгенерирован — и текущей версией модуля сети
+(например, путь деривации модуля мог измениться после генерации).
+
+Сети и конфиги берутся из футера файла (core.generation_meta, пишется при
+генерации), для старых файлов без метаданных — из аргументов. Кадры файла
+расшифровываются в основном процессе и раздаются пулу (engine._init_worker:
+bip_utils и модули сетей импортируются один раз на процесс). Каждая запись
+сравнивается с записями, которые engine.derive_entries
+строит из той же мнемоники, — поле в поле.
+
+    python cli.py audit wallets_encrypted/wallets_ETH_....enc --password-env KF_PASS
+
+В отчёте о расхождении — номер кадра и записи, имена разошедшихся полей и
+значения только публичных из них (адреса, пути), без мнемоник и ключей.
+"""
+import json
+import time
+
+import core
+import container
+import engine
+import watchonly
+
+
+class AuditError(Exception):
+    pass
+
+
+def _targets(meta, targets=None):
+    targets = meta.get("targets") or targets
+    if not targets:
+        raise AuditError("В файле нет метаданных генерации: укажите сеть и конфиг (--network, --config)")
+    return [(module_name, net_config or {}, coin_symbol) for module_name, net_config, coin_symbol in targets]
+
+
+def _open_chunks(f, filepath, password):
+    """
+    (meta, итератор (chunk_index, records)) — scrypt один раз на файл.
+    """
+    head = f.read(container.HEADER_SIZE)
+    if not container.is_container(head):
+        # Старый формат: один блок без кадров и футера
+        records = [record for *_, record in core.iter_located_records(filepath, password)]
+        return {}, iter([(None, records)])
+    f.seek(0)
+    header, salt = container.read_header(f)
+    key = core.file_key(password, header, salt)
+    footer = container.read_footer(f, key, header)
+    meta = {k: v for k, v in footer.items() if k not in ("chunks", "records")}
+    f.seek(len(header))
+    return meta, ((index, chunk) for index, _, chunk in container.iter_located_chunks(f, key, header))
+
+
+# --- ВОРКЕР ---
+
+def _expected(mnemonic, passphrase):
+    """
+    Записи, которые движок строит из мнемоники (при диапазонах адресов их несколько —
+    они идут в файле подряд, поэтому последний результат кэшируется).
+    """
+    w = engine._worker
+    cached = w.get("audit_cache")
+    if cached and cached[0] == (mnemonic, passphrase):
+        return cached[1]
+    entries = engine.derive_entries(w["seed_gen"](mnemonic).Generate(passphrase), mnemonic, passphrase)
+    # Как после записи в файл: кортежи -> списки и т.п.
+    entries = json.loads(json.dumps(entries))
+    w["audit_cache"] = ((mnemonic, passphrase), entries)
+    return entries
+
+
+def _public_values(keys, record):
+    return {k: record.get(k) for k in keys if k in watchonly.PUBLIC_FIELDS or k.endswith(watchonly.PUBLIC_SUFFIXES)}
+
+
+def check_record(record):
+    """
+    None, если запись совпала с выведенной заново, иначе описание расхождения.
+    """
+    mnemonic = record.get("mnemonic")
+    if not mnemonic:
+        return {"error": "В записи нет мнемоники"}
+    try:
+        entries = _expected(mnemonic, record.get("passphrase") or "")
+    except Exception as e:
+        return {"error": f"Мнемоника не выводится: {e}"}
+    if not entries:
+        return {"error": "Модуль сети не сгенерировал ключи"}
+    if record in entries:
+        return None
+
+    # Ближайшая по числу совпавших полей — её и показываем
+    best = max(entries, key=lambda e: sum(record.get(k) == v for k, v in e.items()))
+    fields = sorted(k for k in set(record) | set(best) if record.get(k) != best.get(k))
+    return {"fields": fields, "stored": _public_values(fields, record), "expected": _public_values(fields, best)}
+
+
+def _audit_chunk(chunk_index, records):
+    mismatches = []
+    for position, record in enumerate(records):
+        problem = check_record(record)
+        if problem:
+            mismatches.append({"chunk": chunk_index, "position": position, **problem})
+    return len(records), mismatches
+
+
+# --- ЗАПУСК ---
+
+def audit_file(filepath, password, targets=None, workers=1, on_progress=None):
+    """
+    Проверяет все записи файла. targets — [(module_name, net_config, coin_symbol)] для
+    файлов без метаданных. Отдаёт {"status": "mismatch", ...} по каждому расхождению и в
+    конце итог {"file", "status": "ok" | "mismatch" | "error", "records", "mismatches",
+    "seconds", "records_per_sec"}. on_progress(verified, rate) — после каждого кадра.
+    """
+    started = time.perf_counter()
+    verified = mismatches = 0
+    try:
+        with open(filepath, "rb") as f:
+            meta, chunks = _open_chunks(f, filepath, password)
+            init_args = (_targets(meta, targets), meta.get("words") or 12, "")
+            for size, problems in _run(chunks, init_args, workers):
+                verified += size
+                for problem in problems:
+                    mismatches += 1
+                    yield {"file": filepath, "status": "mismatch", **problem}
+                if on_progress:
+                    on_progress(verified, verified / (time.perf_counter() - started))
+    except Exception as e:
+        yield {"file": filepath, "status": "error", "records": verified, "error": str(e) or type(e).__name__}
+        return
+
+    seconds = time.perf_counter() - started
+    yield {"file": filepath, "status": "mismatch" if mismatches else "ok", "records": verified,
+           "mismatches": mismatches, "seconds": round(seconds, 3),
+           "records_per_sec": round(verified / seconds, 1) if seconds else None}
+
+
+def _run(chunks, init_args, workers):
+    if workers <= 1:
+        engine._init_worker(*init_args)
+        for chunk_index, records in chunks:
+            yield _audit_chunk(chunk_index, records)
+        return
+    # В работе не больше двух кадров на процесс — расшифрованный файл не копится в памяти
+    yield from engine.ordered_map(_audit_chunk, chunks, init_args, workers)
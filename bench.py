@@ -0,0 +1,495 @@
+"""
+Бенчмарк Key Forge.
+
+Прогоняет каждый модуль networks/ во всех вариантах настройки (BTC
+NATIVE/TAPROOT/LEGACY/NESTED, Cosmos с разными префиксами, Polkadot
+SR25519...) и замеряет кошельки/сек и задержку одного кошелька (p50/p99).
+Модули с generate_batch замеряются и пачкой: derive ms / batch ms — время
+generate() на кошелёк по одному и в пачке, результаты сверяются бит в бит
+(BATCH MISMATCH и код 1 при расхождении). Отдельно замеряет derive_key /
+encrypt_data / decrypt_data в зависимости от размера файла.
+
+    python bench.py                          # все сети, 200 кошельков на вариант
+    python bench.py --seed 42 --count 500    # детерминированные мнемоники
+    python bench.py --save-baseline bench_baseline.json
+    python bench.py --baseline bench_baseline.json --threshold 0.1
+    python bench.py --verify-mnemonics 10000     # mnemonics.py == bip_utils бит в бит
+    python bench.py --codec 1000                 # размер и скорость колонок + zlib против JSON
+    python bench.py --startup 5                  # время старта main.py / cli.py до первого действия
+
+При сравнении с baseline падение скорости больше порога помечается как
+REGRESSION, а процесс завершается с кодом 1.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+
+import core
+import mnemonics
+import registry
+from derivation import SeedContext
+
+# Варианты настройки модулей со встроенным configure()
+VARIANTS = {
+    "networks.btc": [
+        ("NATIVE", {"mode": "NATIVE"}),
+        ("TAPROOT", {"mode": "TAPROOT"}),
+        ("LEGACY", {"mode": "LEGACY"}),
+        ("NESTED", {"mode": "NESTED"}),
+    ],
+    "networks.cosmos": [
+        ("cosmos", {"prefix": "cosmos", "coin_type": 118}),
+        ("osmo", {"prefix": "osmo", "coin_type": 118}),
+        ("celestia", {"prefix": "celestia", "coin_type": 118}),
+        ("kava", {"prefix": "kava", "coin_type": 459}),
+        ("multi-6", {"prefixes": [["cosmos", 118], ["osmo", 118], ["celestia", 118], ["juno", 118],
+                                  ["stars", 118], ["kava", 459]]}),
+    ],
+    "networks.polkadot": [
+        ("polkadot-sr25519", {"prefix": 0, "network_name": "Polkadot"}),
+        ("kusama-sr25519", {"prefix": 2, "network_name": "Kusama"}),
+        ("multi-ss58-all", {"prefix": 0, "network_name": "Multi-SS58", "prefixes": "all"}),
+    ],
+}
+
+CRYPTO_SIZES = (100, 1000, 10000)
+WORDS_ENTROPY_BYTES = mnemonics.ENTROPY_BYTES
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def mnemonic_source(words_num, seed=None):
+    """
+    Источник мнемоник: случайный (как в генераторе) или детерминированный по seed.
+    """
+    if seed is None:
+        stream = mnemonics.iter_mnemonics(words_num)
+        return lambda: next(stream)
+
+    rng = random.Random(seed)
+    entropy_len = WORDS_ENTROPY_BYTES[words_num]
+    return lambda: mnemonics.encode(rng.randbytes(entropy_len))
+
+
+def verify_mnemonics(count, seed=0):
+    """
+    Сверяет mnemonics.encode с Bip39MnemonicGenerator().FromEntropy на `count` энтропиях
+    каждой длины, плюс крайние значения (все нули / все единицы). Возвращает список расхождений.
+    """
+    from bip_utils import Bip39MnemonicGenerator
+
+    rng = random.Random(seed)
+    mismatches = []
+    for words_num, entropy_len in WORDS_ENTROPY_BYTES.items():
+        entropies = [bytes(entropy_len), b"\xff" * entropy_len] + [rng.randbytes(entropy_len) for _ in range(count)]
+        for entropy in entropies:
+            expected = str(Bip39MnemonicGenerator().FromEntropy(entropy))
+            if mnemonics.encode(entropy) != expected:
+                mismatches.append({"words": words_num, "entropy": entropy.hex()})
+    return mismatches
+
+
+def bench_mnemonics(count, words_num):
+    """
+    Кодирование мнемоник: bip_utils по одной против пакетного mnemonics.py.
+    """
+    from bip_utils import Bip39MnemonicGenerator, Bip39WordsNum
+
+    words_enum = getattr(Bip39WordsNum, f"WORDS_NUM_{words_num}")
+    t0 = time.perf_counter()
+    for _ in range(count):
+        str(Bip39MnemonicGenerator().FromWordsNumber(words_enum))
+    t1 = time.perf_counter()
+    mnemonics.generate(words_num, count)
+    t2 = time.perf_counter()
+    return {
+        "mnemonic/bip_utils": {"ms": round((t1 - t0) * 1000, 3), "records_per_sec": round(count / (t1 - t0), 2)},
+        "mnemonic/bulk": {"ms": round((t2 - t1) * 1000, 3), "records_per_sec": round(count / (t2 - t1), 2)},
+    }
+
+
+def bench_variant(GeneratorClass, net_config, count, words_num, seed=None):
+    """
+    Полный путь одного кошелька: мнемоника -> PBKDF2 -> generate(). Возвращает метрики или None,
+    если модуль не работает в этом окружении (например, нет substrate-interface).
+    """
+    from bip_utils import Bip39SeedGenerator
+
+    caller = registry.make_caller(GeneratorClass, net_config)
+    next_mnemonic = mnemonic_source(words_num, seed)
+
+    # Прогрев и проверка, что модуль вообще работает
+    warm = next_mnemonic()
+    try:
+        result = caller(Bip39SeedGenerator(warm).Generate(""), warm, None)
+    except Exception as e:
+        return {"skipped": str(e)}
+    if isinstance(result, dict) and "error" in result:
+        return {"skipped": result["error"]}
+
+    latencies = []
+    derive_seconds = 0.0
+    started = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        mnemonic = next_mnemonic()
+        seed_bytes = Bip39SeedGenerator(mnemonic).Generate("")
+        t1 = time.perf_counter()
+        caller(seed_bytes, mnemonic, SeedContext(seed_bytes))
+        t2 = time.perf_counter()
+        derive_seconds += t2 - t1
+        latencies.append(t2 - t0)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "count": count,
+        "seconds": round(elapsed, 4),
+        "wallets_per_sec": round(count / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "derive_ms": round(derive_seconds / count * 1000, 4),
+    }
+    if hasattr(GeneratorClass, "generate_batch"):
+        result.update(bench_batch(GeneratorClass, net_config, caller, count, next_mnemonic, result))
+    return result
+
+
+def bench_batch(GeneratorClass, net_config, caller, count, next_mnemonic, single):
+    """
+    Тот же путь пачкой: мнемоники и seed по одной, ключи — одним generate_batch
+    (как в engine._generate_chunk). Результаты сверяются с generate() бит в бит.
+    """
+    from bip_utils import Bip39SeedGenerator
+
+    batch = registry.make_batch_caller(GeneratorClass, net_config)
+    started = time.perf_counter()
+    mnemonics_list = [next_mnemonic() for _ in range(count)]
+    seeds = [Bip39SeedGenerator(mnemonic).Generate("") for mnemonic in mnemonics_list]
+    t0 = time.perf_counter()
+    results = batch(seeds, mnemonics_list)
+    t1 = time.perf_counter()
+
+    expected = [caller(seed_bytes, mnemonic, None) for seed_bytes, mnemonic in zip(seeds, mnemonics_list)]
+    return {
+        "batch_wallets_per_sec": round(count / (t1 - started), 2),
+        "batch_derive_ms": round((t1 - t0) / count * 1000, 4),
+        "batch_speedup": round(single["derive_ms"] / ((t1 - t0) / count * 1000), 2),
+        "batch_matches": results == expected,
+    }
+
+
+def bench_networks(count, words_num, seed=None, only=None):
+    results = {}
+    for net_name, entry in sorted(registry.scan().items(), key=lambda kv: kv[1]["module"]):
+        module_name = entry["module"]
+        short = module_name.rsplit(".", 1)[-1]
+        if only and short not in only:
+            continue
+        try:
+            GeneratorClass = registry.load_plugin(module_name)
+        except Exception as e:
+            results[short] = {"skipped": f"import: {e}"}
+            continue
+        for label, net_config in VARIANTS.get(module_name, [("default", {})]):
+            key = short if label == "default" else f"{short}/{label}"
+            results[key] = bench_variant(GeneratorClass, net_config, count, words_num, seed)
+    return results
+
+
+def _fake_records(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "network": "ETH",
+        "address": "0x" + rng.randbytes(20).hex(),
+        "private_key": rng.randbytes(32).hex(),
+        "mnemonic": mnemonics.encode(rng.randbytes(16)),
+        "passphrase": "",
+    } for _ in range(n)]
+
+
+def bench_crypto(sizes=CRYPTO_SIZES, repeats=3):
+    """
+    derive_key (scrypt) и полный цикл encrypt_data / decrypt_data для файлов разного размера.
+    """
+    results = {}
+    salt = os.urandom(16)
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        core.derive_key("bench", salt)
+    results["derive_key"] = {"ms": round((time.perf_counter() - t0) / repeats * 1000, 3)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.enc")
+        for n in sizes:
+            records = _fake_records(n)
+            t0 = time.perf_counter()
+            blob = core.encrypt_data(records, "bench")
+            t1 = time.perf_counter()
+            with open(path, "wb") as f:
+                f.write(blob)
+            t2 = time.perf_counter()
+            core.decrypt_data(path, "bench")
+            t3 = time.perf_counter()
+            results[f"encrypt_data/{n}"] = {"ms": round((t1 - t0) * 1000, 3), "bytes": len(blob),
+                                            "records_per_sec": round(n / (t1 - t0), 2)}
+            results[f"decrypt_data/{n}"] = {"ms": round((t3 - t2) * 1000, 3),
+                                            "records_per_sec": round(n / (t3 - t2), 2)}
+    return results
+
+
+CODEC_NETWORKS = (("evm", {}), ("btc", {"mode": "NATIVE"}), ("sol", {}), ("cosmos", {"prefixes": ["cosmos", "osmo", "juno"]}))
+
+
+def bench_codec(count, words_num=12, repeats=3):
+    """
+    Пачка реальных записей каждой сети: JSON (как раньше) против codec.encode_chunk
+    (колонки + zlib) — байт на запись и время кодирования / декодирования.
+    """
+    import codec
+    import engine
+
+    results = {}
+    for module, net_config in CODEC_NETWORKS:
+        GeneratorClass = core.find_network(module)
+        if GeneratorClass is None:
+            continue
+        records = []
+        for _, entries in engine.generate_wallets(GeneratorClass.__module__, dict(net_config),
+                                                  core.resolve_symbol(GeneratorClass, net_config), count, words_num):
+            records.extend(entries)
+        if not records:
+            continue
+
+        for name, encode, decode in (("json", lambda r: json.dumps(r).encode(), json.loads),
+                                     ("columns", codec.encode_chunk, codec.decode_chunk)):
+            t0 = time.perf_counter()
+            for _ in range(repeats):
+                blob = encode(records)
+            t1 = time.perf_counter()
+            for _ in range(repeats):
+                decoded = decode(blob)
+            t2 = time.perf_counter()
+            if decoded != records:
+                raise AssertionError(f"{module}/{name}: записи не совпали после декодирования")
+            results[f"codec/{module}/{name}"] = {
+                "bytes_per_record": round(len(blob) / len(records), 1),
+                "encode_ms": round((t1 - t0) / repeats * 1000, 3),
+                "decode_ms": round((t2 - t1) / repeats * 1000, 3),
+                "records_per_sec": round(len(records) * repeats / (t2 - t1), 2),
+            }
+    return results
+
+
+def print_codec(results):
+    print(f"\n{'codec':<28} {'B/record':>9} {'encode ms':>10} {'decode ms':>10}")
+    for key, m in results.items():
+        print(f"{key:<28} {m['bytes_per_record']:>9.1f} {m['encode_ms']:>10.2f} {m['decode_ms']:>10.2f}")
+
+
+# --- СТАРТ ---
+
+# Бюджет до первого меню: интерпретатор + импорт main + поиск незавершённых генераций
+STARTUP_BUDGET_MS = 100
+STARTUP_PROBES = {
+    "python": "pass",
+    "main.py (меню)": "import main, pipeline; pipeline.pending_jobs()",
+    "cli.py": "import cli",
+}
+
+
+def _run_probe(code, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    elapsed = (time.perf_counter() - t0) * 1000
+    if proc.returncode:
+        raise RuntimeError(f"{code}: {proc.stderr.strip().splitlines()[-1:]}")
+    return elapsed, proc.stderr
+
+
+def _top_imports(importtime_log, top=8):
+    """
+    Прямые импорты проб (main, cli...) из -X importtime, по накопленному времени (мс).
+    """
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Отступ имени — глубина вложенности импорта: 1 + 2 * глубина пробелов
+        if len(name) - len(name.lstrip(" ")) != 3:
+            continue
+        rows.append((name.strip(), int(cumulative) / 1000))
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+
+def bench_startup(runs=5):
+    """
+    Время запуска каждой пробы в отдельном процессе (минимум из runs, мс) и самые
+    тяжёлые импорты. Файлы .pyc прогреваются первым запуском.
+    """
+    results = {}
+    for name, code in STARTUP_PROBES.items():
+        _run_probe(code)
+        timings = [_run_probe(code)[0] for _ in range(runs)]
+        results[name] = {"min_ms": round(min(timings), 1), "median_ms": round(sorted(timings)[len(timings) // 2], 1),
+                         "top_imports": _top_imports(_run_probe(code, importtime=True)[1])}
+    return results
+
+
+def print_startup(results):
+    base = results["python"]["min_ms"]
+    print(f"\n{'startup':<18} {'min ms':>8} {'median ms':>10} {'import ms':>10}")
+    for name, m in results.items():
+        print(f"{name:<18} {m['min_ms']:>8.1f} {m['median_ms']:>10.1f} {m['min_ms'] - base:>10.1f}")
+    for name, m in results.items():
+        if name == "python":
+            continue
+        print(f"\n{name}: самые тяжёлые импорты")
+        for module, ms in m["top_imports"]:
+            print(f"  {module:<32} {ms:>8.1f} ms")
+    menu = results["main.py (меню)"]["min_ms"]
+    verdict = "OK" if menu <= STARTUP_BUDGET_MS else "OVER BUDGET"
+    print(f"\nДо первого меню: {menu:.1f} мс (бюджет {STARTUP_BUDGET_MS} мс) — {verdict}")
+    return menu <= STARTUP_BUDGET_MS
+
+
+# --- BASELINE ---
+
+def _rate(metrics):
+    if "wallets_per_sec" in metrics:
+        return metrics["wallets_per_sec"]
+    if "records_per_sec" in metrics:
+        return metrics["records_per_sec"]
+    if "ms" in metrics and metrics["ms"]:
+        return 1000.0 / metrics["ms"]
+    return None
+
+
+def compare(current, baseline, threshold):
+    """
+    Сравнивает скорости с baseline. Возвращает список (key, base_rate, cur_rate, change, regression).
+    """
+    rows = []
+    for section in ("networks", "crypto"):
+        for key, metrics in current.get(section, {}).items():
+            base = baseline.get(section, {}).get(key)
+            if not base:
+                continue
+            base_rate, cur_rate = _rate(base), _rate(metrics)
+            if not base_rate or not cur_rate:
+                continue
+            change = cur_rate / base_rate - 1
+            rows.append((f"{section}:{key}", base_rate, cur_rate, change, change < -threshold))
+    return rows
+
+
+def print_report(report):
+    print(f"\n{'network':<28} {'wallets/s':>10} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'derive ms':>10} {'batch w/s':>10} {'batch ms':>9} {'speedup':>8}")
+    for key, m in report["networks"].items():
+        if "skipped" in m:
+            print(f"{key:<28} {'skipped: ' + m['skipped'][:40]}")
+            continue
+        line = (f"{key:<28} {m['wallets_per_sec']:>10.1f} {m['p50_ms']:>9.3f} {m['p99_ms']:>9.3f} "
+                f"{m.get('derive_ms', 0):>10.3f}")
+        if "batch_wallets_per_sec" in m:
+            line += (f" {m['batch_wallets_per_sec']:>10.1f} {m['batch_derive_ms']:>9.3f} {m['batch_speedup']:>7.2f}x"
+                     + ("" if m["batch_matches"] else "  BATCH MISMATCH"))
+        print(line)
+
+    if report.get("crypto"):
+        print(f"\n{'crypto':<28} {'ms':>10} {'records/s':>12}")
+        for key, m in report["crypto"].items():
+            rate = m.get("records_per_sec")
+            print(f"{key:<28} {m['ms']:>10.2f} {rate if rate is not None else '':>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.py", description="Бенчмарк модулей сетей и шифрования")
+    parser.add_argument("--count", type=int, default=200, help="Кошельков на вариант")
+    parser.add_argument("--words", type=int, default=12, choices=[12, 15, 18, 24])
+    parser.add_argument("--seed", type=int, help="Детерминированные мнемоники (воспроизводимые прогоны)")
+    parser.add_argument("--only", help="Только эти модули через запятую (btc,evm...)")
+    parser.add_argument("--no-crypto", action="store_true", help="Не замерять шифрование")
+    parser.add_argument("--json", help="Сохранить отчет в JSON")
+    parser.add_argument("--save-baseline", help="Сохранить отчет как baseline")
+    parser.add_argument("--baseline", help="Сравнить с baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Допустимое падение скорости (0.10 = 10%%)")
+    parser.add_argument("--verify-mnemonics", type=int, metavar="N",
+                        help="Только проверить mnemonics.py против bip_utils на N энтропиях каждой длины")
+    parser.add_argument("--codec", type=int, metavar="N",
+                        help="Только сравнить кодирование пачки из N записей: колонки + zlib против JSON")
+    parser.add_argument("--startup", type=int, metavar="N",
+                        help="Только замерить старт main.py / cli.py (N запусков) и самые тяжёлые импорты")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        return 0 if print_startup(bench_startup(args.startup)) else 1
+
+    if args.codec:
+        print_codec(bench_codec(args.codec, args.words))
+        return 0
+
+    if args.verify_mnemonics:
+        mismatches = verify_mnemonics(args.verify_mnemonics, args.seed or 0)
+        for m in mismatches[:10]:
+            print(f"MISMATCH words={m['words']} entropy={m['entropy']}")
+        total = (args.verify_mnemonics + 2) * len(WORDS_ENTROPY_BYTES)
+        print(f"mnemonics: {total - len(mismatches)}/{total} совпадают с bip_utils")
+        return 1 if mismatches else 0
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "count": args.count,
+            "words": args.words,
+            "seed": args.seed,
+        },
+        "networks": bench_networks(args.count, args.words, args.seed,
+                                   set(args.only.split(",")) if args.only else None),
+        "crypto": {} if args.no_crypto else {**bench_mnemonics(max(args.count, 1000), args.words), **bench_crypto()},
+    }
+    print_report(report)
+    batch_mismatches = [key for key, m in report["networks"].items() if m.get("batch_matches") is False]
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        print(f"\n{'compare':<36} {'base':>10} {'now':>10} {'change':>8}")
+        regressions = 0
+        for key, base_rate, cur_rate, change, regression in rows:
+            regressions += regression
+            flag = "  REGRESSION" if regression else ""
+            print(f"{key:<36} {base_rate:>10.1f} {cur_rate:>10.1f} {change:>+7.1%}{flag}")
+        if regressions:
+            print(f"\n{regressions} регрессий (порог {args.threshold:.0%})")
+            return 1
+    if batch_mismatches:
+        print(f"\ngenerate_batch расходится с generate: {', '.join(batch_mismatches)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,732 @@
+"""
+Консольный (неинтерактивный) режим Key Forge.
+
+Работает без меню: задания передаются аргументами или JSON-файлом, поэтому
+генерацию можно запускать из планировщика или бенчмарка. Не импортирует
+questionary, rich и pyfiglet. По каждому заданию печатает одну строку JSON
+с таймингами.
+
+Примеры:
+    python cli.py generate --network btc --config '{"mode": "TAPROOT"}' --count 100 --password-env KF_PASS
+    python cli.py generate --job-file jobs.json
+    python cli.py generate --networks btc,evm,sol --count 100 --password-env KF_PASS
+    python cli.py generate --network evm --count 1000 --password-env KF_PASS --metrics run.prom
+    python cli.py index lookup 0x9858EfFD232B4033E47d90003D41EC34EcaEda94 --password-env KF_PASS
+    python cli.py index build --password-env KF_PASS
+    python cli.py vault init --password-env KF_PASS
+    python cli.py vanity --network evm --prefix dead --count 1 --password-env KF_PASS
+    python cli.py export "wallets_encrypted/*.enc" --output wallets_decrypted/all.csv --password-env KF_PASS
+    python cli.py generate --network evm --count 100 --password-env KF_PASS --vault
+    python cli.py resume --password-env KF_PASS
+    python cli.py generate --network btc --count 100 --password-env KF_PASS --watch
+    python cli.py watch verify wallets_encrypted/*.watch.jsonl
+    python cli.py dedup build --password-env KF_PASS
+    python cli.py audit "wallets_encrypted/*ETH*.enc" --password-env KF_PASS
+    python cli.py import mnemonics.txt --networks sol,sui --password-env KF_PASS
+    python cli.py daemon serve --workers 8
+    python cli.py generate --network evm --count 100 --password-file /run/secrets/kf --daemon
+
+Формат job-файла — список заданий (или {"jobs": [...]}):
+    [{"network": "evm", "count": 1000, "words": 24, "workers": 8,
+      "config": {}, "passphrase_env": "KF_PHRASE", "password_file": "/run/secrets/kf",
+      "output": "out/evm.enc", "tag": "batch1", "vault": true}]
+
+Вместо "network"/"config" можно указать "networks": ["btc", {"network": "cosmos", "config": {...}}] —
+тогда одна мнемоника используется для всех сетей, и запись содержит адреса каждой сети.
+Polkadot: "config": {"prefixes": [0, 2, 5]} или {"prefixes": "all"} — одна ключевая пара, адрес в каждой сети.
+Cosmos: "config": {"prefixes": ["cosmos", "osmo", ["kava", 459]]} — одна деривация на coin_type.
+"address_range"/"account_range" (например "0..99") задают несколько адресов на мнемонику.
+"vault": true (или путь к файлу хранилища) — шифровать ключом хранилища (vault.py): scrypt
+один раз на весь запуск, а не на каждый файл.
+
+"watch": true — рядом с .enc пишется <имя>.watch.jsonl (watchonly.py): адреса, пути, публичные ключи
+и xpub аккаунта без секретов; "watch_key_env" — ключ HMAC для его проверки наблюдателем.
+
+Файл пишется как <output>.part с контрольными точками в <output>.job.json; если запуск
+прервался (Ctrl+C, OOM, перезагрузка), `cli.py resume` догенерирует остаток в тот же файл.
+
+С --daemon задания выполняет запущенный сервис (daemon.py) с уже прогретым пулом: "workers"
+задания не действует, *_env и *_file читаются в окружении сервиса.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import core
+import engine
+import metrics
+
+JOB_DEFAULTS = {
+    "config": None,
+    "count": 10,
+    "words": 12,
+    "workers": 1,
+    "output": None,
+    "tag": "",
+    "vault": None,
+    "watch": False,
+    "dedup": True,
+}
+
+
+class JobError(Exception):
+    pass
+
+
+def read_secret(job, name, required=False):
+    """
+    Читает секрет задания из поля `name`, `name_env` (переменная окружения) или `name_file` (файл).
+    """
+    if job.get(f"{name}_env"):
+        value = os.environ.get(job[f"{name}_env"])
+        if value is None:
+            raise JobError(f"Переменная окружения {job[f'{name}_env']} не задана")
+        return value
+    if job.get(f"{name}_file"):
+        with open(job[f"{name}_file"], "r", encoding="utf-8") as f:
+            return f.read().rstrip("\r\n")
+    if job.get(name) is not None:
+        return job[name]
+    if required:
+        raise JobError(f"Не задан {name} (укажите {name}_env или {name}_file)")
+    return ""
+
+
+def resolve_targets(job):
+    """
+    Превращает "network"/"config" или список "networks" задания в targets для engine.
+    Элемент "networks" — имя сети или {"network": ..., "config": {...}}.
+    """
+    specs = job.get("networks") or [{"network": job["network"], "config": job.get("config")}]
+    targets = []
+    for spec in specs:
+        if isinstance(spec, str):
+            spec = {"network": spec}
+        GeneratorClass = core.find_network(spec["network"])
+        if GeneratorClass is None:
+            raise JobError(f"Сеть не найдена: {spec['network']}")
+        net_config = dict(spec.get("config") or {})
+        # Диапазоны уровня задания применяются ко всем сетям (см. derivation.py)
+        for key in ("address_range", "account_range"):
+            if job.get(key) is not None and key not in net_config:
+                net_config[key] = job[key]
+        targets.append((GeneratorClass.__module__, net_config, core.resolve_symbol(GeneratorClass, net_config)))
+    return targets
+
+
+def job_password(job):
+    """
+    Пароль шифрования задания или открытое хранилище ключей, если задан "vault".
+    """
+    password = read_secret(job, "password", required=True)
+    if job.get("vault"):
+        import vault
+        password = vault.unlock(password, job["vault"] if isinstance(job["vault"], str) else None)
+    return password
+
+
+def output_path(job, coin_symbol):
+    full_path = job["output"] or os.path.join(core.ENC_DIR, core.make_filename(coin_symbol, job["tag"]))
+    out_dir = os.path.dirname(full_path)
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    return full_path
+
+
+def run_job(job, source=None, on_progress=None):
+    """
+    Выполняет одно задание генерации и возвращает словарь с результатом и таймингами.
+    source — поток пачек вместо своего пула (см. pipeline.generate_to_file),
+    on_progress(size, records) — после каждой записанной пачки.
+    """
+    job = {**JOB_DEFAULTS, **job}
+    if not job.get("network") and not job.get("networks"):
+        raise JobError("Не указана сеть (network или networks)")
+    if int(job["words"]) not in (12, 15, 18, 24):
+        raise JobError(f"Недопустимая длина мнемоники: {job['words']}")
+
+    targets = resolve_targets(job)
+    coin_symbol = engine.multi_symbol(targets)
+    passphrase = read_secret(job, "passphrase")
+    password = job_password(job)
+    count = int(job["count"])
+
+    full_path = output_path(job, coin_symbol)
+
+    # Watch-only файл: публичные ключи и xpub аккаунта считаются только по запросу
+    watch_key = read_secret(job, "watch_key").encode() or None
+    if job["watch"]:
+        for _, net_config, _ in targets:
+            net_config["public_keys"] = True
+
+    # Генерация и запись идут конвейером (pipeline.py): encrypt_seconds — хвост записи после
+    # последней пачки, а не отдельный этап
+    import pipeline
+    started = time.perf_counter()
+    generated_at = [started]
+
+    def progress(size, records):
+        generated_at[0] = time.perf_counter()
+        if on_progress:
+            on_progress(size, records)
+
+    generated = pipeline.generate_to_file(
+        targets, count, int(job["words"]), full_path, password, passphrase,
+        workers=int(job["workers"]), tag=job["tag"], watch=bool(job["watch"]), watch_key=watch_key,
+        dedup=bool(job["dedup"]), source=source, on_progress=progress)
+    finished = time.perf_counter()
+
+    if not generated:
+        os.remove(full_path)
+        raise JobError("Сбой генерации")
+
+    gen_seconds = generated_at[0] - started
+    return {
+        "status": "ok",
+        "network": coin_symbol,
+        "requested": count,
+        "generated": generated,
+        "workers": int(job["workers"]),
+        "generate_seconds": round(gen_seconds, 6),
+        "encrypt_seconds": round(finished - generated_at[0], 6),
+        "total_seconds": round(finished - started, 6),
+        "wallets_per_sec": round(generated / gen_seconds, 2) if gen_seconds else None,
+        "output": full_path,
+    }
+
+
+def load_jobs(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("jobs", [data])
+    return data
+
+
+def emit(result):
+    print(json.dumps(result, ensure_ascii=False), flush=True)
+
+
+# --- КОМАНДЫ ---
+
+def cmd_generate(args):
+    if args.job_file:
+        jobs = []
+        for path in args.job_file:
+            jobs.extend(load_jobs(path))
+    else:
+        jobs = [{
+            "network": args.network,
+            "networks": args.networks.split(",") if args.networks else None,
+            "config": json.loads(args.config) if args.config else None,
+            "count": args.count,
+            "words": args.words,
+            "address_range": args.address_range,
+            "account_range": args.account_range,
+            "workers": args.workers,
+            "passphrase_env": args.passphrase_env,
+            "passphrase_file": args.passphrase_file,
+            "password_env": args.password_env,
+            "password_file": args.password_file,
+            "output": args.output,
+            "tag": args.tag,
+            "vault": args.vault,
+            "watch": args.watch,
+            "watch_key_env": args.watch_key_env,
+            "dedup": not args.no_dedup,
+        }]
+
+    if args.daemon:
+        return _generate_in_daemon(args, jobs)
+
+    if args.metrics:
+        metrics.enable()
+
+    failed = 0
+    for i, job in enumerate(jobs):
+        try:
+            result = run_job(job)
+        except Exception as e:
+            failed += 1
+            result = {"status": "error", "network": job.get("network") or job.get("networks"), "error": str(e)}
+            import dedup
+            if isinstance(e, dedup.DuplicateAddressError):
+                # Не обычная ошибка: повтор адреса значит сломанный источник энтропии
+                result.update(status="duplicate", address=e.address, first=e.first, second=e.second)
+                print(f"!!! {e}", file=sys.stderr, flush=True)
+        emit({"job": i, **result})
+
+    if args.metrics:
+        # Метрики суммируются по всем заданиям запуска
+        metrics.disable().write(args.metrics)
+    return 1 if failed else 0
+
+
+def _generate_in_daemon(args, jobs):
+    """
+    Задания уходят в запущенный сервис (daemon.py): строка JSON на каждый снимок прогресса.
+    """
+    import daemon
+
+    failed = 0
+    for i, job in enumerate(jobs):
+        info = {"status": "error", "error": "Сервис не ответил"}
+        try:
+            socket_path = args.daemon if isinstance(args.daemon, str) else None
+            for info in daemon.submit(job, socket_path=socket_path, port=args.port):
+                emit({"job": i, **info})
+        except OSError as e:
+            raise JobError(f"Сервис не запущен ({e}): python cli.py daemon serve")
+        if info["status"] != "ok":
+            failed += 1
+    return 1 if failed else 0
+
+
+def cmd_daemon(args):
+    import daemon
+
+    if args.action == "serve":
+        try:
+            daemon.serve(args.workers, args.max_jobs, args.socket, args.port, on_ready=emit)
+        except daemon.DaemonError as e:
+            raise JobError(str(e))
+        return 0
+    try:
+        request = daemon.status if args.action == "status" else daemon.stop
+        result = request(args.socket, args.port)
+    except OSError as e:
+        raise JobError(f"Сервис не запущен ({e})")
+    emit(result)
+    return 0 if result.get("status") == "ok" else 1
+
+
+def _index_password(args, required):
+    return read_secret({"password_env": args.password_env, "password_file": args.password_file},
+                       "password", required) or None
+
+
+def cmd_index(args):
+    import index
+
+    if args.action == "lookup":
+        started = time.perf_counter()
+        matches = index.lookup(args.address)
+        lookup_ms = round((time.perf_counter() - started) * 1000, 3)
+        password = _index_password(args, False)
+        for match in matches:
+            if password:
+                try:
+                    match["record"] = index.fetch(match, password)
+                except Exception as e:
+                    match["error"] = str(e) or type(e).__name__
+            emit(match)
+        emit({"status": "ok" if matches else "not_found", "matches": len(matches), "lookup_ms": lookup_ms})
+        return 0 if matches else 1
+
+    if args.action == "verify":
+        problems = 0
+        for result in index.verify(_index_password(args, False), args.folder):
+            problems += result["status"] != "ok"
+            emit(result)
+        return 1 if problems else 0
+
+    # build / rebuild
+    password = _index_password(args, True)
+    if args.action == "rebuild":
+        index.clear()
+    paths = args.files or index.enc_files(args.folder)
+    failed = 0
+    for result in index.build(paths, password, force=args.action == "rebuild"):
+        failed += result["status"] == "error"
+        emit(result)
+    return 1 if failed else 0
+
+
+def cmd_dedup(args):
+    import dedup
+    import index
+
+    if args.action == "status":
+        emit(dedup.status())
+        return 0
+
+    if args.action == "check":
+        found = 0
+        for address in args.addresses:
+            result = dedup.check(address)
+            found += "file" in result
+            emit(result)
+        return 0 if found else 1
+
+    # build / rebuild: адреса из свежего адресного индекса, остальные файлы — расшифровкой (нужен пароль)
+    password = _index_password(args, False)
+    paths = args.files or index.enc_files(args.folder)
+    if args.action == "rebuild":
+        results = dedup.rebuild(paths, password, args.capacity or dedup.DEFAULT_CAPACITY)
+    else:
+        results = dedup.build(paths, password)
+    problems = 0
+    for result in results:
+        problems += result["status"] in ("error", "duplicate", "skipped")
+        emit(result)
+    return 1 if problems else 0
+
+
+def cmd_import(args):
+    import pipeline
+
+    job = {**JOB_DEFAULTS, "network": args.network, "networks": args.networks.split(",") if args.networks else None,
+           "config": json.loads(args.config) if args.config else None,
+           "address_range": args.address_range, "account_range": args.account_range,
+           "passphrase_env": args.passphrase_env, "passphrase_file": args.passphrase_file,
+           "password_env": args.password_env, "password_file": args.password_file,
+           "output": args.output, "tag": args.tag or "import", "vault": args.vault}
+    targets = resolve_targets(job)
+    coin_symbol = engine.multi_symbol(targets)
+    passphrase = read_secret(job, "passphrase")
+    password = job_password(job)
+    # Пароль .enc-источника: отдельный или тот же, что у результата
+    source_password = read_secret({"password_env": args.source_password_env}, "password") or \
+        read_secret(job, "password", required=True)
+    full_path = output_path(job, coin_symbol)
+
+    def on_invalid(line, reason):
+        emit({"status": "invalid", "source": args.source, "line": line, "error": reason})
+
+    started = time.perf_counter()
+    try:
+        stats = pipeline.import_to_file(args.source, targets, full_path, password, passphrase, workers=args.workers,
+                                        tag=job["tag"], source_password=source_password, on_invalid=on_invalid,
+                                        dedup=args.dedup)
+    except (OSError, ValueError) as e:
+        raise JobError(str(e))
+    seconds = time.perf_counter() - started
+    emit({"status": "ok", "network": coin_symbol, **stats, "seconds": round(seconds, 3),
+          "mnemonics_per_sec": round(stats["mnemonics"] / seconds, 1) if seconds else None, "output": full_path})
+    return 1 if stats["invalid"] else 0
+
+
+def cmd_audit(args):
+    import audit
+    import export
+
+    password = read_secret({"password_env": args.password_env, "password_file": args.password_file},
+                           "password", required=True)
+    # Сеть и конфиг из аргументов — только для файлов без метаданных в футере
+    targets = None
+    if args.network:
+        targets = resolve_targets({"network": args.network, "config": json.loads(args.config) if args.config else None})
+    paths = export.find_files(args.patterns)
+    if not paths:
+        raise JobError("Нет .enc файлов")
+
+    last = [0.0]
+
+    def on_progress(verified, rate):
+        now = time.monotonic()
+        if now - last[0] >= 2:
+            last[0] = now
+            print(json.dumps({"status": "running", "verified": verified, "records_per_sec": round(rate, 1)}),
+                  file=sys.stderr, flush=True)
+
+    problems = 0
+    for path in paths:
+        for result in audit.audit_file(path, password, targets, args.workers, on_progress):
+            if result["status"] == "error" or result.get("mismatches"):
+                problems += 1
+            emit(result)
+    return 1 if problems else 0
+
+
+def cmd_vanity(args):
+    import vanity
+
+    job = {**JOB_DEFAULTS, "network": args.network, "config": json.loads(args.config) if args.config else None,
+           "words": args.words, "passphrase_env": args.passphrase_env, "passphrase_file": args.passphrase_file,
+           "password_env": args.password_env, "password_file": args.password_file,
+           "output": args.output, "tag": args.tag, "vault": args.vault}
+    targets = resolve_targets(job)
+    coin_symbol = targets[0][2]
+    passphrase = read_secret(job, "passphrase")
+    password = job_password(job)
+
+    last = [0.0]
+
+    def on_progress(attempts, found, rate, probability):
+        # Прогресс — в stderr, не чаще раза в 2 секунды; итог — строкой JSON в stdout
+        now = time.monotonic()
+        if now - last[0] >= 2:
+            last[0] = now
+            print(json.dumps({"status": "running", "attempts": attempts, "found": found,
+                              "addresses_per_sec": round(rate, 1),
+                              "eta_seconds": round(vanity.expected_seconds(probability, rate), 1)}),
+                  file=sys.stderr, flush=True)
+
+    try:
+        records, stats = vanity.run(targets[0], args.prefix or "", args.suffix or "", args.case_sensitive,
+                                    args.count, args.words, passphrase, args.workers, on_progress)
+    except vanity.PatternError as e:
+        emit({"status": "error", "network": coin_symbol, "error": str(e)})
+        return 1
+
+    full_path = output_path(job, coin_symbol)
+    with core.open_writer(full_path, password, tag=job["tag"], meta=vanity.generation_meta(targets[0], args.words)) as writer:
+        writer.write_many(records)
+    emit({"status": "ok", "network": coin_symbol, **stats,
+          "addresses": [r["address"] for r in records], "output": full_path})
+    return 0
+
+
+def cmd_export(args):
+    import export
+
+    password = _index_password(args, True)
+    paths = export.find_files(args.patterns)
+    if not paths:
+        emit({"status": "error", "error": "Нет файлов по шаблону"})
+        return 1
+    output = args.output or os.path.join(core.CSV_DIR, f"export_{time.strftime('%Y%m%d_%H%M%S')}.{args.format or 'csv'}")
+    summary = export.export_files(paths, password, output, fmt=args.format, workers=args.workers, on_file=emit)
+    emit({"status": "ok" if not summary["failed"] else "partial", **summary})
+    return 1 if summary["failed"] else 0
+
+
+def cmd_resume(args):
+    import pipeline
+
+    paths = args.jobs or pipeline.pending_jobs(args.folder)
+    if not paths:
+        emit({"status": "ok", "resumed": 0})
+        return 0
+    job = {"password_env": args.password_env, "password_file": args.password_file,
+           "passphrase_env": args.passphrase_env, "passphrase_file": args.passphrase_file,
+           "watch_key_env": args.watch_key_env}
+    password = read_secret(job, "password", required=True)
+    passphrase = read_secret(job, "passphrase")
+    watch_key = read_secret(job, "watch_key").encode() or None
+
+    failed = 0
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            state, records = pipeline.resume(path, password, passphrase, workers=args.workers, watch_key=watch_key)
+        except Exception as e:
+            failed += 1
+            emit({"job": path, "status": "error", "error": str(e) or type(e).__name__})
+            continue
+        emit({"job": path, "status": "ok", "requested": state["count"], "generated": records,
+              "seconds": round(time.perf_counter() - started, 6), "output": state["output"]})
+    return 1 if failed else 0
+
+
+def cmd_watch(args):
+    import watchonly
+
+    watch_key = read_secret({"watch_key_env": args.watch_key_env}, "watch_key").encode() or None
+    password = _index_password(args, True) if args.action == "export" else None
+    failed = 0
+    for path in args.files:
+        if args.action == "verify":
+            result = watchonly.verify(path, watch_key)
+        else:
+            try:
+                result = {"file": path, "status": "ok", "output": watchonly.export_file(path, password, watch_key)}
+            except Exception as e:
+                result = {"file": path, "status": "error", "error": str(e) or type(e).__name__}
+        failed += result["status"] != "ok"
+        emit(result)
+    return 1 if failed else 0
+
+
+def cmd_vault(args):
+    import vault
+
+    password = _index_password(args, True)
+    started = time.perf_counter()
+    try:
+        if args.action == "init":
+            v = vault.create(password, args.path)
+        else:
+            v = vault.unlock(password, args.path)
+    except vault.VaultError as e:
+        emit({"status": "error", "action": args.action, "error": str(e)})
+        return 1
+    emit({"status": "ok", "action": args.action, "key_id": v.key_id.hex(), "path": args.path or vault.VAULT_FILE,
+          "seconds": round(time.perf_counter() - started, 4)})
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Key Forge — консольный режим")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Сгенерировать кошельки по заданию")
+    gen.add_argument("--job-file", action="append", help="JSON-файл с заданиями (можно несколько)")
+    gen.add_argument("--network", help="Модуль сети (btc, evm...), NAME или SYMBOL")
+    gen.add_argument("--networks", help="Несколько сетей через запятую: одна мнемоника на все")
+    gen.add_argument("--config", help="Конфиг сети в JSON")
+    gen.add_argument("--count", type=int, default=JOB_DEFAULTS["count"])
+    gen.add_argument("--address-range", help="Индексы адресов на мнемонику, например 0..99")
+    gen.add_argument("--account-range", help="Индексы аккаунтов на мнемонику, например 0..4")
+    gen.add_argument("--words", type=int, default=JOB_DEFAULTS["words"], choices=[12, 15, 18, 24])
+    gen.add_argument("--workers", type=int, default=engine.default_workers())
+    gen.add_argument("--passphrase-env", help="Переменная окружения с BIP39 passphrase")
+    gen.add_argument("--passphrase-file", help="Файл с BIP39 passphrase")
+    gen.add_argument("--password-env", help="Переменная окружения с паролем шифрования")
+    gen.add_argument("--password-file", help="Файл с паролем шифрования")
+    gen.add_argument("--output", help="Путь к .enc файлу (по умолчанию wallets_encrypted/...)")
+    gen.add_argument("--tag", default="", help="Метка в имени файла")
+    gen.add_argument("--vault", nargs="?", const=True, default=None,
+                     help="Шифровать ключом хранилища (по умолчанию data/vault.key): без scrypt на каждый файл")
+    gen.add_argument("--watch", action="store_true",
+                     help="Рядом watch-only файл .watch.jsonl: адреса, пути, публичные ключи и xpub без секретов")
+    gen.add_argument("--watch-key-env", help="Переменная окружения с ключом HMAC для watch-only файла")
+    gen.add_argument("--no-dedup", action="store_true",
+                     help="Не сверять адреса с уже сгенерированными (dedup.py)")
+    gen.add_argument("--metrics", help="Сохранить метрики этапов: .prom/.txt — Prometheus, иначе JSON")
+    gen.add_argument("--daemon", nargs="?", const=True, default=None,
+                     help="Отправить задания запущенному сервису (cli.py daemon serve); значение — путь к сокету. "
+                          "Пароль и passphrase сервис читает сам (--password-file/--password-env)")
+    gen.add_argument("--port", type=int, help="Порт сервиса на 127.0.0.1 (вместо Unix-сокета)")
+    gen.set_defaults(func=cmd_generate)
+
+    idx = sub.add_parser("index", help="Адресный индекс по .enc файлам")
+    idx.add_argument("action", choices=["build", "rebuild", "lookup", "verify"],
+                     help="build — новые и изменённые файлы, rebuild — заново все, lookup — поиск, verify — проверка")
+    idx.add_argument("address", nargs="?", help="Адрес для lookup")
+    idx.add_argument("--files", nargs="+", help="Файлы для build (по умолчанию все .enc в папке)")
+    idx.add_argument("--folder", help=f"Папка с .enc файлами (по умолчанию {core.ENC_DIR})")
+    idx.add_argument("--password-env", help="Переменная окружения с паролем (lookup — показать запись, verify — сверить адреса)")
+    idx.add_argument("--password-file", help="Файл с паролем")
+    idx.set_defaults(func=cmd_index)
+
+    imp = sub.add_parser("import", help="Ключи для готовых мнемоник из файла (текст или .enc) в зашифрованный файл")
+    imp.add_argument("source", help="Текстовый файл (мнемоника на строку) или .enc Key Forge")
+    imp.add_argument("--network", help="Модуль сети (btc, evm...), NAME или SYMBOL")
+    imp.add_argument("--networks", help="Несколько сетей через запятую")
+    imp.add_argument("--config", help="Конфиг сети в JSON")
+    imp.add_argument("--address-range", help="Индексы адресов на мнемонику, например 0..99")
+    imp.add_argument("--account-range", help="Индексы аккаунтов на мнемонику, например 0..4")
+    imp.add_argument("--workers", type=int, default=engine.default_workers())
+    imp.add_argument("--passphrase-env", help="Переменная окружения с BIP39 passphrase (для текстового источника)")
+    imp.add_argument("--passphrase-file", help="Файл с BIP39 passphrase")
+    imp.add_argument("--password-env", help="Переменная окружения с паролем шифрования")
+    imp.add_argument("--password-file", help="Файл с паролем шифрования")
+    imp.add_argument("--source-password-env", help="Пароль .enc-источника, если отличается")
+    imp.add_argument("--output", help="Путь к .enc файлу (по умолчанию wallets_encrypted/...)")
+    imp.add_argument("--tag", default="", help="Метка в имени файла (по умолчанию import)")
+    imp.add_argument("--vault", nargs="?", const=True, default=None, help="Шифровать ключом хранилища")
+    imp.add_argument("--dedup", action="store_true", help="Сверять адреса с уже сгенерированными (dedup.py)")
+    imp.set_defaults(func=cmd_import)
+
+    aud = sub.add_parser("audit", help="Заново вывести каждую запись .enc из мнемоники и сверить с сохранённой")
+    aud.add_argument("patterns", nargs="*", help=f"Glob-шаблоны файлов (по умолчанию {core.ENC_DIR}/*.enc)")
+    aud.add_argument("--workers", type=int, default=engine.default_workers())
+    aud.add_argument("--network", help="Сеть для файлов без метаданных генерации (старые файлы)")
+    aud.add_argument("--config", help="Конфиг сети в JSON (вместе с --network)")
+    aud.add_argument("--password-env", help="Переменная окружения с паролем")
+    aud.add_argument("--password-file", help="Файл с паролем")
+    aud.set_defaults(func=cmd_audit)
+
+    ddp = sub.add_parser("dedup", help="Проверка дубликатов адресов по всем сгенерированным файлам")
+    ddp.add_argument("action", choices=["status", "build", "rebuild", "check"],
+                     help="build — добавить новые и изменённые файлы, rebuild — заново (с --capacity), "
+                          "check — где встречался адрес")
+    ddp.add_argument("addresses", nargs="*", help="Адреса для check")
+    ddp.add_argument("--files", nargs="+", help="Файлы для build (по умолчанию все .enc в папке)")
+    ddp.add_argument("--folder", help=f"Папка с .enc файлами (по умолчанию {core.ENC_DIR})")
+    ddp.add_argument("--capacity", type=int, help="Ёмкость фильтра Блума для rebuild (адресов)")
+    ddp.add_argument("--password-env", help="Переменная окружения с паролем (файлы не из адресного индекса)")
+    ddp.add_argument("--password-file", help="Файл с паролем")
+    ddp.set_defaults(func=cmd_dedup)
+
+    van = sub.add_parser("vanity", help="Поиск адресов с заданным началом/концом на всех ядрах")
+    van.add_argument("--network", required=True, help="Модуль сети (btc, evm, cosmos, sol...)")
+    van.add_argument("--config", help="Конфиг сети в JSON")
+    van.add_argument("--prefix", help="Начало адреса (0x можно не писать: dead -> 0xdead)")
+    van.add_argument("--suffix", help="Конец адреса")
+    van.add_argument("--case-sensitive", action="store_true", help="Учитывать регистр (EVM: EIP-55, base58)")
+    van.add_argument("--count", type=int, default=1, help="Сколько адресов найти")
+    van.add_argument("--words", type=int, default=JOB_DEFAULTS["words"], choices=[12, 15, 18, 24])
+    van.add_argument("--workers", type=int, default=engine.default_workers())
+    van.add_argument("--passphrase-env", help="Переменная окружения с BIP39 passphrase")
+    van.add_argument("--passphrase-file", help="Файл с BIP39 passphrase")
+    van.add_argument("--password-env", help="Переменная окружения с паролем шифрования")
+    van.add_argument("--password-file", help="Файл с паролем шифрования")
+    van.add_argument("--output", help="Путь к .enc файлу")
+    van.add_argument("--tag", default="vanity", help="Метка в имени файла")
+    van.add_argument("--vault", nargs="?", const=True, default=None, help="Шифровать ключом хранилища")
+    van.set_defaults(func=cmd_vanity)
+
+    exp = sub.add_parser("export", help="Расшифровать много .enc файлов в один CSV/JSONL")
+    exp.add_argument("patterns", nargs="*", help=f"Glob-шаблоны файлов (по умолчанию {core.ENC_DIR}/*.enc)")
+    exp.add_argument("--output", help=f"Файл результата (по умолчанию {core.CSV_DIR}/export_<дата>.csv)")
+    exp.add_argument("--format", choices=["csv", "jsonl"], help="По умолчанию — по расширению --output")
+    exp.add_argument("--workers", type=int, default=engine.default_workers())
+    exp.add_argument("--password-env", help="Переменная окружения с паролем")
+    exp.add_argument("--password-file", help="Файл с паролем")
+    exp.set_defaults(func=cmd_export)
+
+    res = sub.add_parser("resume", help="Продолжить прерванные задания генерации с контрольной точки")
+    res.add_argument("jobs", nargs="*", help=f"Файлы состояния *.enc.job.json (по умолчанию все в {core.ENC_DIR})")
+    res.add_argument("--folder", help=f"Папка с заданиями (по умолчанию {core.ENC_DIR})")
+    res.add_argument("--workers", type=int, default=engine.default_workers())
+    res.add_argument("--passphrase-env", help="Переменная окружения с BIP39 passphrase задания")
+    res.add_argument("--passphrase-file", help="Файл с BIP39 passphrase")
+    res.add_argument("--password-env", help="Переменная окружения с паролем шифрования")
+    res.add_argument("--password-file", help="Файл с паролем шифрования")
+    res.add_argument("--watch-key-env", help="Переменная окружения с ключом HMAC watch-only файла")
+    res.set_defaults(func=cmd_resume)
+
+    wat = sub.add_parser("watch", help="Watch-only файлы: проверка и создание для готовых .enc")
+    wat.add_argument("action", choices=["verify", "export"],
+                     help="verify — сверить digest .watch.jsonl, export — сделать .watch.jsonl из .enc")
+    wat.add_argument("files", nargs="+", help="Файлы .watch.jsonl (verify) или .enc (export)")
+    wat.add_argument("--watch-key-env", help="Переменная окружения с ключом HMAC")
+    wat.add_argument("--password-env", help="Переменная окружения с паролем .enc (export)")
+    wat.add_argument("--password-file", help="Файл с паролем .enc (export)")
+    wat.set_defaults(func=cmd_watch)
+
+    vlt = sub.add_parser("vault", help="Хранилище ключей: один scrypt на сессию")
+    vlt.add_argument("action", choices=["init", "check"], help="init — создать, check — проверить пароль")
+    vlt.add_argument("--path", help="Файл хранилища (по умолчанию data/vault.key)")
+    vlt.add_argument("--password-env", help="Переменная окружения с паролем хранилища")
+    vlt.add_argument("--password-file", help="Файл с паролем хранилища")
+    vlt.set_defaults(func=cmd_vault)
+
+    dmn = sub.add_parser("daemon", help="Сервис генерации с тёплым пулом процессов (задания через локальный сокет)")
+    dmn.add_argument("action", choices=["serve", "status", "stop"],
+                     help="serve — запустить, status — пул и задания, stop — дождаться заданий и остановить")
+    dmn.add_argument("--socket", help=f"Unix-сокет (по умолчанию {os.path.join('data', 'keyforge.sock')})")
+    dmn.add_argument("--port", type=int, help="Слушать 127.0.0.1:<порт> вместо Unix-сокета")
+    dmn.add_argument("--workers", type=int, default=engine.default_workers())
+    dmn.add_argument("--max-jobs", type=int, default=4, help="Сколько заданий выполняется одновременно")
+    dmn.set_defaults(func=cmd_daemon)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "generate" and not (args.job_file or args.network or args.networks):
+        parser.error("укажите --network, --networks или --job-file")
+    if args.command == "index" and args.action == "lookup" and not args.address:
+        parser.error("укажите адрес для lookup")
+    if args.command == "generate" and args.daemon and args.metrics:
+        parser.error("--metrics собираются только локально, без --daemon")
+    if args.command == "import" and not (args.network or args.networks):
+        parser.error("укажите --network или --networks")
+    if args.command == "dedup" and args.action == "check" and not args.addresses:
+        parser.error("укажите адреса для check")
+    try:
+        return args.func(args)
+    except JobError as e:
+        emit({"status": "error", "error": str(e)})
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
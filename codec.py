@@ -0,0 +1,210 @@
+"""
+Кодирование пачки записей внутри кадра контейнера (до шифрования).
+
+Первый байт открытого текста кадра — кодировка:
+    "["  — JSON-список записей (файлы до появления кодировок, см. container.py)
+    0x01 — колонки + zlib
+
+Колоночный формат: у всех записей пачки одинаковый набор и порядок ключей,
+поэтому имена полей хранятся один раз на кадр (словарь колонок), а значения —
+по колонкам, каждая в своём виде:
+    CONST     одно значение на всю пачку (network, type, пустая passphrase)
+    MNEMONIC  номера слов BIP39 по 2 байта (24 байта вместо ~75 символов на 12 слов)
+    HEX       сырые байты вместо hex-строки (приватные и публичные ключи)
+    B64       сырые байты вместо base64 (ключи Solana / Sui)
+    STR       строки через \\x00 (адреса, пути, WIF)
+    JSON      всё остальное (числа, списки, None)
+Вид выбирается, только если обратное преобразование даёт ту же строку бит в бит
+и значения не длиннее MAX_WIDTH байт (ширина пишется одним байтом), иначе
+колонка хранится как STR / JSON. Пачки с разными наборами ключей пишутся
+JSON-ом. Словарь колонок — на кадр, а не на файл: каждый кадр читается сам по
+себе (точечная расшифровка через адресный индекс, см. core.read_record_at).
+
+Сравнение с JSON: python bench.py --codec.
+"""
+import sys
+import json
+import itertools
+import zlib
+import base64
+import struct
+from array import array
+
+import mnemonics
+
+ENCODING_JSON = ord("[")
+ENCODING_COLUMNS = 1
+# Уровень zlib: выше 6 размер почти не меняется, а запись медленнее
+ZLIB_LEVEL = 6
+
+CONST, MNEMONIC, HEX, B64, STR, JSON = range(6)
+# Ширина значения в HEX/B64/MNEMONIC — один байт; более длинные значения пишутся как STR
+MAX_WIDTH = 255
+
+_U32 = struct.Struct(">I")
+
+
+class CodecError(Exception):
+    pass
+
+
+def _pack_bytes(data):
+    return _U32.pack(len(data)) + data
+
+
+def _fixed_width(raws):
+    width = len(raws[0])
+    return width if width <= MAX_WIDTH and all(len(r) == width for r in raws) else None
+
+
+def _try_hex(values):
+    if not all(isinstance(v, str) and v and len(v) % 2 == 0 for v in values):
+        return None
+    try:
+        raws = [bytes.fromhex(v) for v in values]
+    except ValueError:
+        return None
+    width = _fixed_width(raws)
+    # Регистр и формат должны восстановиться точно: bytes.hex() даёт строчные без разделителей
+    if width is None or b"".join(raws).hex() != "".join(values):
+        return None
+    return width, b"".join(raws)
+
+
+def _try_b64(values):
+    if not all(isinstance(v, str) and v for v in values):
+        return None
+    try:
+        raws = [base64.b64decode(v, validate=True) for v in values]
+    except ValueError:
+        return None
+    width = _fixed_width(raws)
+    if width is None or any(base64.b64encode(r).decode() != v for r, v in zip(raws, values)):
+        return None
+    return width, b"".join(raws)
+
+
+def _try_mnemonic(values):
+    # Номера слов, а не энтропия: декодирование — выборка из словаря и join, без
+    # пересчёта контрольной суммы на каждую запись
+    index = mnemonics.word_index()
+    words = [v.split(" ") if isinstance(v, str) else None for v in values]
+    if words[0] is None or len(words[0]) > MAX_WIDTH or any(w is None or len(w) != len(words[0]) for w in words):
+        return None
+    try:
+        indexes = array("H", [index[word] for w in words for word in w])
+    except KeyError:
+        return None
+    if sys.byteorder == "little":
+        indexes.byteswap()
+    return len(words[0]), indexes.tobytes()
+
+
+def _encode_column(name, values):
+    first = values[0]
+    if type(first) in (str, int, float, bool, type(None)) and all(v == first and type(v) is type(first) for v in values):
+        return bytes([CONST]) + _pack_bytes(json.dumps(first).encode())
+
+    if name == "mnemonic" or name.endswith("_mnemonic"):
+        packed = _try_mnemonic(values)
+        if packed:
+            return bytes([MNEMONIC]) + struct.pack(">B", packed[0]) + packed[1]
+
+    for kind, encoder in ((HEX, _try_hex), (B64, _try_b64)):
+        packed = encoder(values)
+        if packed:
+            return bytes([kind]) + struct.pack(">B", packed[0]) + packed[1]
+
+    if all(isinstance(v, str) for v in values):
+        blob = "\x00".join(values).encode()
+        if blob.count(b"\x00") == len(values) - 1:
+            return bytes([STR]) + blob
+    return bytes([JSON]) + json.dumps(values).encode()
+
+
+def encode_chunk(records):
+    """
+    Список записей -> открытый текст кадра. Колоночный формат, если у всех записей
+    одинаковые ключи, иначе JSON.
+    """
+    keys = tuple(records[0]) if records else ()
+    if not keys or any(tuple(r) != keys for r in records):
+        return json.dumps(records).encode()
+
+    parts = [struct.pack(">IH", len(records), len(keys))]
+    for name in keys:
+        column = _encode_column(name, [r[name] for r in records])
+        parts.append(_pack_bytes(name.encode()))
+        parts.append(_pack_bytes(column))
+    return bytes([ENCODING_COLUMNS]) + zlib.compress(b"".join(parts), ZLIB_LEVEL)
+
+
+def _split_fixed(data, width, count):
+    if len(data) != width * count:
+        raise CodecError("Неверная длина колонки")
+    return [data[i:i + width] for i in range(0, len(data), width)]
+
+
+def _decode_column(data, count):
+    kind, payload = data[0], data[1:]
+    if kind == CONST:
+        return [json.loads(payload[4:])] * count
+    if kind == STR:
+        values = payload.decode().split("\x00")
+        if len(values) != count:
+            raise CodecError("Неверное число значений в колонке")
+        return values
+    if kind == JSON:
+        values = json.loads(payload)
+        if len(values) != count:
+            raise CodecError("Неверное число значений в колонке")
+        return values
+
+    width, raw = payload[0], payload[1:]
+    if kind == HEX:
+        h = raw.hex()
+        step = width * 2
+        if len(h) != step * count:
+            raise CodecError("Неверная длина колонки")
+        return [h[i:i + step] for i in range(0, len(h), step)]
+    if kind == B64:
+        return [base64.b64encode(r).decode() for r in _split_fixed(raw, width, count)]
+    if kind == MNEMONIC:
+        indexes = array("H")
+        indexes.frombytes(raw)
+        if sys.byteorder == "little":
+            indexes.byteswap()
+        if len(indexes) != width * count:
+            raise CodecError("Неверная длина колонки")
+        words = list(map(mnemonics.wordlist().__getitem__, indexes))
+        return [" ".join(words[i:i + width]) for i in range(0, len(words), width)]
+    raise CodecError(f"Неизвестный вид колонки: {kind}")
+
+
+def decode_chunk(plaintext):
+    """
+    Открытый текст кадра -> список записей (dict), как до кодирования.
+    """
+    if not plaintext:
+        raise CodecError("Пустой кадр")
+    encoding = plaintext[0]
+    if encoding == ENCODING_JSON:
+        return json.loads(plaintext)
+    if encoding != ENCODING_COLUMNS:
+        raise CodecError(f"Неизвестная кодировка пачки: {encoding}")
+
+    body = memoryview(zlib.decompress(plaintext[1:]))
+    count, n_columns = struct.unpack_from(">IH", body)
+    pos = 6
+    names, columns = [], []
+    for _ in range(n_columns):
+        for target in (names, columns):
+            (size,) = _U32.unpack_from(body, pos)
+            target.append(bytes(body[pos + 4:pos + 4 + size]))
+            pos += 4 + size
+    if pos != len(body):
+        raise CodecError("Лишние данные в кадре")
+
+    names = [n.decode() for n in names]
+    values = [_decode_column(c, count) for c in columns]
+    return list(map(dict, map(zip, itertools.repeat(names), zip(*values))))
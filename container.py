@@ -0,0 +1,360 @@
+"""
+Потоковый зашифрованный контейнер (.enc v1 / v2).
+
+Файл состоит из заголовка и последовательности независимо
+аутентифицированных кадров AES-GCM, у каждого свой nonce:
+
+    header : MAGIC(4) | VERSION(1) | SALT(16)                  — v1, ключ из пароля (scrypt)
+    header : MAGIC(4) | VERSION(1) | KEY_ID(8) | SALT(16)      — v2, ключ из хранилища (vault.py)
+    frame  : TYPE(1) | LENGTH(4, big-endian) | NONCE(12) | CIPHERTEXT(LENGTH)
+
+TYPE_DATA — пачка записей (первый байт — кодировка: JSON-список или колонки + zlib,
+см. codec.py), TYPE_FOOTER — итог {"chunks", "records"} и метаданные генерации
+(сети и конфиги — для аудита, см. audit.py; старые читатели лишние ключи не смотрят).
+Associated data каждого кадра = header + TYPE + номер кадра (8 байт), поэтому
+кадры нельзя переставить, подменить из другого файла или выдать данные за футер.
+Файл без валидного футера считается обрезанным.
+
+Модуль работает с готовым ключом; пароль, scrypt и хранилище — в core.py.
+"""
+import io
+import os
+import json
+import time
+import struct
+
+import codec
+import metrics
+
+MAGIC = b"KFC\x00"
+VERSION = 1
+VERSION_VAULT = 2
+SALT_SIZE = 16
+KEY_ID_SIZE = 8
+NONCE_SIZE = 12
+# Размер заголовка v1 (он же минимальный)
+HEADER_SIZE = len(MAGIC) + 1 + SALT_SIZE
+
+TYPE_DATA = 1
+TYPE_FOOTER = 2
+
+FRAME_HEAD = struct.Struct(">BI")
+DEFAULT_CHUNK_RECORDS = 1000
+
+
+class ContainerError(Exception):
+    pass
+
+
+def is_container(head: bytes) -> bool:
+    return head[:len(MAGIC)] == MAGIC
+
+
+def make_header(salt: bytes, key_id: bytes = None) -> bytes:
+    if key_id is None:
+        return MAGIC + bytes([VERSION]) + salt
+    return MAGIC + bytes([VERSION_VAULT]) + key_id + salt
+
+
+def read_header(f):
+    """
+    Читает заголовок и возвращает (header_bytes, salt).
+    """
+    header = f.read(len(MAGIC) + 1)
+    if len(header) != len(MAGIC) + 1 or not is_container(header):
+        raise ContainerError("Не контейнер Key Forge")
+    version = header[len(MAGIC)]
+    if version == VERSION:
+        rest = SALT_SIZE
+    elif version == VERSION_VAULT:
+        rest = KEY_ID_SIZE + SALT_SIZE
+    else:
+        raise ContainerError(f"Неподдерживаемая версия контейнера: {version}")
+    header += f.read(rest)
+    if len(header) != len(MAGIC) + 1 + rest:
+        raise ContainerError("Не контейнер Key Forge")
+    return header, header[-SALT_SIZE:]
+
+
+def header_key_id(header: bytes):
+    """
+    id хранилища для заголовка v2, None для файлов на пароле.
+    """
+    if header[len(MAGIC)] != VERSION_VAULT:
+        return None
+    start = len(MAGIC) + 1
+    return header[start:start + KEY_ID_SIZE]
+
+
+def cipher(key: bytes):
+    # cryptography импортируется при первом шифровании, а не при старте меню
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    return AESGCM(key)
+
+
+def _aad(header, frame_type, index):
+    return header + struct.pack(">BQ", frame_type, index)
+
+
+def _read_frame(f, header, aesgcm, index):
+    """
+    Читает и расшифровывает один кадр с текущей позиции. Возвращает (type, plaintext) или None в конце файла.
+    """
+    head = f.read(FRAME_HEAD.size)
+    if not head:
+        return None
+    if len(head) != FRAME_HEAD.size:
+        raise ContainerError("Файл обрезан посреди кадра")
+    frame_type, length = FRAME_HEAD.unpack(head)
+    nonce = f.read(NONCE_SIZE)
+    ciphertext = f.read(length)
+    if len(nonce) != NONCE_SIZE or len(ciphertext) != length:
+        raise ContainerError("Файл обрезан посреди кадра")
+    m = metrics.active
+    if m: t0 = time.perf_counter()
+    try:
+        plaintext = aesgcm.decrypt(nonce, ciphertext, _aad(header, frame_type, index))
+    except Exception:
+        raise ContainerError(f"Кадр {index} повреждён или неверный пароль")
+    if m: m.observe("decrypt", time.perf_counter() - t0, network="")
+    return frame_type, plaintext
+
+
+def _read_frames(f, header, key):
+    """
+    Отдаёт (type, index, offset, plaintext) по кадрам. Проверяет наличие футера.
+    """
+    aesgcm = cipher(key)
+    index = 0
+    while True:
+        offset = f.tell()
+        frame = _read_frame(f, header, aesgcm, index)
+        if frame is None:
+            raise ContainerError("Файл обрезан: нет футера")
+        frame_type, plaintext = frame
+
+        yield frame_type, index, offset, plaintext
+        if frame_type == TYPE_FOOTER:
+            if f.read(1):
+                raise ContainerError("Лишние данные после футера")
+            return
+        index += 1
+
+
+def _parse_chunk(plaintext):
+    m = metrics.active
+    if m: t0 = time.perf_counter()
+    chunk = codec.decode_chunk(plaintext)
+    if m: m.observe("parse", time.perf_counter() - t0, network="")
+    return chunk
+
+
+def iter_located_chunks(f, key, header=None):
+    """
+    Как iter_chunks, но отдаёт (index, offset, chunk): номер кадра и его смещение в файле
+    (для адресного индекса, см. index.py). В конце сверяет футер.
+    """
+    if header is None:
+        header, _ = read_header(f)
+    chunks = records = 0
+    for frame_type, index, offset, plaintext in _read_frames(f, header, key):
+        if frame_type == TYPE_DATA:
+            chunk = _parse_chunk(plaintext)
+            chunks += 1
+            records += len(chunk)
+            yield index, offset, chunk
+        elif frame_type == TYPE_FOOTER:
+            footer = json.loads(plaintext)
+            if footer.get("chunks") != chunks or footer.get("records") != records:
+                raise ContainerError("Футер не совпадает с содержимым файла")
+
+
+def iter_chunks(f, key, header=None):
+    """
+    Лениво отдаёт пачки записей (списки dict). В конце сверяет футер.
+    `f` должен стоять сразу после заголовка, если header передан.
+    """
+    for _, _, chunk in iter_located_chunks(f, key, header):
+        yield chunk
+
+
+def read_footer(f, key, header=None):
+    """
+    Футер без расшифровки кадров с данными: заголовки кадров читаются, тела пропускаются.
+    Возвращает dict ({"chunks", "records", ...метаданные}).
+    """
+    if header is None:
+        f.seek(0)
+        header, _ = read_header(f)
+    index = 0
+    while True:
+        offset = f.tell()
+        head = f.read(FRAME_HEAD.size)
+        if len(head) != FRAME_HEAD.size:
+            raise ContainerError("Файл обрезан: нет футера")
+        frame_type, length = FRAME_HEAD.unpack(head)
+        if frame_type == TYPE_FOOTER:
+            f.seek(offset)
+            return json.loads(_read_frame(f, header, cipher(key), index)[1])
+        f.seek(NONCE_SIZE + length, os.SEEK_CUR)
+        index += 1
+
+
+def read_chunk(f, key, offset, index, header=None):
+    """
+    Расшифровывает одну пачку по смещению кадра без чтения остального файла.
+    Футер при этом не проверяется — целостность соседних кадров не гарантируется.
+    """
+    if header is None:
+        f.seek(0)
+        header, _ = read_header(f)
+    f.seek(offset)
+    frame = _read_frame(f, header, cipher(key), index)
+    if frame is None or frame[0] != TYPE_DATA:
+        raise ContainerError(f"По смещению {offset} нет кадра с данными")
+    return _parse_chunk(frame[1])
+
+
+def iter_records(f, key, header=None):
+    for chunk in iter_chunks(f, key, header):
+        yield from chunk
+
+
+class ContainerWriter:
+    """
+    Потоковая запись контейнера: записи копятся до `chunk_records` и
+    шифруются отдельным кадром. close() дописывает футер.
+
+    Для дозаписи используйте ContainerWriter.append(): футер существующего
+    файла проверяется и срезается, новые кадры продолжают нумерацию.
+
+    on_chunk(index, offset, records) — необязательный обработчик, вызывается
+    перед записью каждой пачки с будущим смещением кадра (так адресный индекс
+    узнаёт смещения кадров). Исключение обработчика отменяет кадр: так dedup.py
+    не пропускает повтор адреса на диск.
+    meta — метаданные, которые close() добавит в футер.
+    """
+
+    def __init__(self, f, key, salt, chunk_records=DEFAULT_CHUNK_RECORDS, _state=None, header=None):
+        self.f = f
+        self.aesgcm = cipher(key)
+        self.chunk_records = chunk_records
+        self.buffer = []
+        self.on_chunk = None
+        self.meta = {}
+        # Кодировка пачек: codec.encode_chunk (колонки + zlib); для старого формата — json.dumps
+        self.encode = codec.encode_chunk
+        if _state is None:
+            self.header = header or make_header(salt)
+            self.f.write(self.header)
+            self.chunks = self.records = 0
+        else:
+            self.header, self.chunks, self.records = _state
+
+    @classmethod
+    def append(cls, f, key, chunk_records=DEFAULT_CHUNK_RECORDS):
+        """
+        Открывает существующий контейнер (файл в режиме 'r+b') для дозаписи.
+        """
+        f.seek(0)
+        header, salt = read_header(f)
+        chunks = records = 0
+        footer_offset = footer = None
+        for frame_type, _, offset, plaintext in _read_frames(f, header, key):
+            if frame_type == TYPE_DATA:
+                chunks += 1
+                records += len(_parse_chunk(plaintext))
+            else:
+                footer_offset, footer = offset, json.loads(plaintext)
+        f.seek(footer_offset)
+        f.truncate()
+        writer = cls(f, key, salt, chunk_records, _state=(header, chunks, records))
+        writer.meta = {k: v for k, v in footer.items() if k not in ("chunks", "records")}
+        return writer
+
+    @classmethod
+    def resume(cls, f, key, offset, chunk_records=DEFAULT_CHUNK_RECORDS, on_chunk=None):
+        """
+        Продолжает недописанный контейнер (без футера) с контрольной точки `offset` —
+        конца последнего целого кадра. Кадры до неё проверяются, всё после срезается.
+        on_chunk вызывается и для уже записанных кадров.
+        """
+        f.seek(0)
+        header, salt = read_header(f)
+        aesgcm = cipher(key)
+        chunks = records = 0
+        while f.tell() < offset:
+            frame_offset = f.tell()
+            frame = _read_frame(f, header, aesgcm, chunks)
+            if frame is None or frame[0] != TYPE_DATA:
+                raise ContainerError("Контрольная точка не совпадает с файлом")
+            chunk = _parse_chunk(frame[1])
+            if on_chunk:
+                on_chunk(chunks, frame_offset, chunk)
+            chunks += 1
+            records += len(chunk)
+        if f.tell() != offset:
+            raise ContainerError("Контрольная точка не совпадает с файлом")
+        f.truncate()
+        writer = cls(f, key, salt, chunk_records, _state=(header, chunks, records))
+        writer.on_chunk = on_chunk
+        return writer
+
+    def _write_frame(self, frame_type, plaintext):
+        m = metrics.active
+        if m: t0 = time.perf_counter()
+        nonce = os.urandom(NONCE_SIZE)
+        ciphertext = self.aesgcm.encrypt(nonce, plaintext, _aad(self.header, frame_type, self.chunks))
+        if m:
+            t1 = time.perf_counter()
+            m.observe("encrypt", t1 - t0, network="")
+        self.f.write(FRAME_HEAD.pack(frame_type, len(ciphertext)) + nonce + ciphertext)
+        if m: m.observe("write", time.perf_counter() - t1, network="")
+
+    def flush(self):
+        if not self.buffer:
+            return
+        m = metrics.active
+        if m: t0 = time.perf_counter()
+        plaintext = self.encode(self.buffer)
+        if m: m.observe("serialize", time.perf_counter() - t0, network="")
+        offset = self.f.tell()
+        if self.on_chunk:
+            self.on_chunk(self.chunks, offset, self.buffer)
+        self._write_frame(TYPE_DATA, plaintext)
+        self.chunks += 1
+        self.records += len(self.buffer)
+        self.buffer = []
+
+    def write(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.chunk_records:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        self.flush()
+        footer = {**self.meta, "chunks": self.chunks, "records": self.records}
+        self._write_frame(TYPE_FOOTER, json.dumps(footer).encode())
+        self.f.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # При ошибке футер не пишем — файл честно останется "обрезанным"
+        if exc_type is None:
+            self.close()
+
+
+def seal(records, key, salt, chunk_records=DEFAULT_CHUNK_RECORDS, header=None) -> bytes:
+    """
+    Шифрует список записей в контейнер целиком в памяти.
+    """
+    buf = io.BytesIO()
+    with ContainerWriter(buf, key, salt, chunk_records, header=header) as writer:
+        writer.write_many(records)
+    return buf.getvalue()
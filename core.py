@@ -0,0 +1,304 @@
+"""
+Ядро Key Forge без интерфейса: загрузка модулей сетей, шифрование и
+именование файлов. Не импортирует questionary, rich и pyfiglet, поэтому
+используется как из меню (main.py), так и из консольного режима (cli.py).
+"""
+import os
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import container
+import metrics
+import registry
+
+# --- CONSTANTS ---
+ENC_DIR = "wallets_encrypted"
+CSV_DIR = "wallets_decrypted"
+
+
+def ensure_dirs():
+    for folder in [ENC_DIR, CSV_DIR]:
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+
+# --- 1. МОДУЛИ СЕТЕЙ ---
+
+def load_networks():
+    """
+    Импортирует все модули сетей: {NAME: NetworkGenerator}.
+    Для выбора одной сети дешевле registry.scan() + registry.load_plugin().
+    """
+    networks = {}
+    for net_name, entry in registry.scan().items():
+        try:
+            networks[net_name] = registry.load_plugin(entry["module"])
+        except Exception as e:
+            pass
+    return networks
+
+
+def find_network(name):
+    """
+    Ищет NetworkGenerator по имени файла модуля ("btc"), NAME или SYMBOL.
+    Импортируется только найденный модуль.
+    """
+    return registry.find(name)
+
+
+def resolve_symbol(GeneratorClass, net_config):
+    coin_symbol = GeneratorClass.SYMBOL
+    if net_config:
+        if "symbol" in net_config: coin_symbol = net_config["symbol"]
+        if "symbol_suffix" in net_config: coin_symbol += net_config["symbol_suffix"]
+    return coin_symbol
+
+
+def clean_tag(file_tag):
+    """
+    Оставляет в метке только буквы, цифры, '-' и '_'. Возвращает "_метка" или "".
+    """
+    if not file_tag:
+        return ""
+    tag = "".join(c for c in file_tag if c.isalnum() or c in ('-', '_'))
+    return f"_{tag}" if tag else ""
+
+
+def make_filename(coin_symbol, file_tag=""):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"wallets_{coin_symbol}{clean_tag(file_tag)}_{timestamp}.enc"
+
+
+# --- 2. ШИФРОВАНИЕ ---
+
+def derive_key(password: str, salt: bytes) -> bytes:
+    from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+    from cryptography.hazmat.backends import default_backend
+    m = metrics.active
+    if m: t0 = time.perf_counter()
+    kdf = Scrypt(salt=salt, length=32, n=2 ** 14, r=8, p=1, backend=default_backend())
+    key = kdf.derive(password.encode())
+    if m: m.observe("kdf", time.perf_counter() - t0, network="")
+    return key
+
+
+def new_file_key(secret):
+    """
+    Ключ нового файла: (key, salt, header). secret — пароль (scrypt, контейнер v1)
+    или открытый vault.Vault (HKDF без scrypt, контейнер v2).
+    """
+    salt = os.urandom(container.SALT_SIZE)
+    if isinstance(secret, str):
+        return derive_key(secret, salt), salt, container.make_header(salt)
+    return secret.file_key(salt), salt, container.make_header(salt, secret.key_id)
+
+
+def file_key(secret, header, salt):
+    """
+    Ключ существующего контейнера по его заголовку. Пароль тоже открывает файлы
+    хранилища: оно разблокируется один раз и кэшируется до конца процесса.
+    """
+    key_id = container.header_key_id(header)
+    if key_id is None:
+        if isinstance(secret, str):
+            return derive_key(secret, salt)
+        return secret.password_key(salt, derive_key)
+
+    if isinstance(secret, str):
+        import vault
+        secret = vault.unlock(secret)
+    if secret.key_id != key_id:
+        raise container.ContainerError("Файл зашифрован другим хранилищем ключей")
+    return secret.file_key(salt)
+
+
+def session_secret(password):
+    """
+    Открытый vault.Vault, если хранилище есть и пароль к нему подходит, иначе сам пароль.
+    Vault можно передать в процессы пула: файлы хранилища откроются без scrypt в каждом.
+    """
+    import vault
+    if isinstance(password, str) and vault.exists():
+        try:
+            return vault.unlock(password)
+        except vault.VaultError:
+            pass
+    return password
+
+
+def encrypt_data(data_list, password):
+    """
+    Шифрует список записей в контейнер (см. container.py) и возвращает байты.
+    """
+    key, salt, header = new_file_key(password)
+    return container.seal(data_list, key, salt, header=header)
+
+
+def generation_meta(targets, words_num):
+    """
+    Чем сгенерированы записи файла: [(module_name, net_config, coin_symbol), ...] и длина
+    мнемоники. Пишется в футер .enc — по ней audit.py заново выводит ключи.
+    """
+    return {"targets": [list(t) for t in targets], "words": words_num}
+
+
+def read_meta(filepath, password):
+    """
+    Метаданные генерации из футера (без расшифровки записей); {} у старых файлов.
+    """
+    with open(filepath, "rb") as f:
+        head = f.read(container.HEADER_SIZE)
+        if not container.is_container(head):
+            return {}
+        f.seek(0)
+        header, salt = container.read_header(f)
+        footer = container.read_footer(f, file_key(password, header, salt), header)
+    return {k: v for k, v in footer.items() if k not in ("chunks", "records")}
+
+
+def chain_chunks(*handlers):
+    """
+    Один обработчик on_chunk из нескольких (None пропускаются).
+    """
+    handlers = [h for h in handlers if h]
+    if len(handlers) <= 1:
+        return handlers[0] if handlers else None
+
+    def on_chunk(index, offset, records):
+        for handler in handlers:
+            handler(index, offset, records)
+    return on_chunk
+
+
+@contextmanager
+def open_writer(filepath, password, append=False, chunk_records=container.DEFAULT_CHUNK_RECORDS,
+                indexed=True, tag=None, resume_at=None, on_chunk=None, dedup=True, meta=None):
+    """
+    Потоковая запись .enc файла: with open_writer(path, pwd) as w: w.write(record).
+    Вместо пароля можно передать открытый vault.Vault — тогда без scrypt.
+    append=True дописывает записи в существующий контейнер.
+    resume_at — продолжить недописанный файл с контрольной точки (см. pipeline.py).
+    indexed=True — адреса попадают в адресный индекс (index.py); tag — метка для
+    индекса (по умолчанию берётся из имени файла). on_chunk — свой обработчик кадров.
+    dedup=True — адреса каждого кадра сверяются с уже выданными (dedup.py),
+    повтор прерывает запись исключением dedup.DuplicateAddressError.
+    meta — метаданные генерации для футера (см. generation_meta).
+    """
+    collector = None
+    if indexed:
+        import index
+        collector = index.Collector()
+        # Дозапись в непроиндексированный файл не должна оставить в индексе только хвост
+        if append and not index.is_fresh(filepath):
+            collector = None
+    if collector:
+        on_chunk = collector.on_chunk
+
+    checker = None
+    if dedup:
+        import dedup as dedup_module
+        checker = dedup_module.Checker(filepath)
+        if not append and resume_at is None:
+            checker.reset()
+    on_chunk = chain_chunks(on_chunk, checker and checker.on_chunk)
+
+    try:
+        if append or resume_at is not None:
+            with open(filepath, "r+b") as f:
+                header, salt = container.read_header(f)
+                key = file_key(password, header, salt)
+                if resume_at is None:
+                    writer = container.ContainerWriter.append(f, key, chunk_records)
+                    writer.on_chunk = on_chunk
+                else:
+                    writer = container.ContainerWriter.resume(f, key, resume_at, chunk_records, on_chunk)
+                writer.meta.update(meta or {})
+                yield writer
+                writer.close()
+        else:
+            key, salt, header = new_file_key(password)
+            with open(filepath, "wb") as f:
+                writer = container.ContainerWriter(f, key, salt, chunk_records, header=header)
+                writer.on_chunk = on_chunk
+                writer.meta.update(meta or {})
+                yield writer
+                writer.close()
+        if checker:
+            checker.finish()
+    finally:
+        if checker:
+            checker.close()
+
+    if collector:
+        try:
+            index.store(filepath, collector, tag=tag, append=append)
+        except Exception:
+            # Индекс — только кэш: файл уже записан, `cli.py index build` догонит
+            pass
+
+
+def _decrypt_legacy(file_bytes, password):
+    # Старый формат: salt(16) + nonce(12) + ciphertext одним блоком
+    salt = file_bytes[:16]
+    nonce = file_bytes[16:28]
+    ciphertext = file_bytes[28:]
+    key = derive_key(password, salt) if isinstance(password, str) else password.password_key(salt, derive_key)
+    aesgcm = container.cipher(key)
+    return json.loads(aesgcm.decrypt(nonce, ciphertext, None).decode())
+
+
+def iter_records(filepath, password):
+    """
+    Лениво отдаёт записи .enc файла, не держа весь файл в памяти.
+    Бросает исключение при неверном пароле, повреждении или обрезке файла.
+    """
+    with open(filepath, "rb") as f:
+        head = f.read(container.HEADER_SIZE)
+        if not container.is_container(head):
+            yield from _decrypt_legacy(head + f.read(), password)
+            return
+        f.seek(0)
+        header, salt = container.read_header(f)
+        yield from container.iter_records(f, file_key(password, header, salt), header)
+
+
+def iter_located_records(filepath, password):
+    """
+    Как iter_records, но отдаёт (chunk_index, offset, position, record) — расположение
+    записи в контейнере. У старого формата кадров нет: chunk_index и offset равны None,
+    position — номер записи в файле.
+    """
+    with open(filepath, "rb") as f:
+        head = f.read(container.HEADER_SIZE)
+        if not container.is_container(head):
+            for position, record in enumerate(_decrypt_legacy(head + f.read(), password)):
+                yield None, None, position, record
+            return
+        f.seek(0)
+        header, salt = container.read_header(f)
+        for chunk_index, offset, chunk in container.iter_located_chunks(f, file_key(password, header, salt), header):
+            for position, record in enumerate(chunk):
+                yield chunk_index, offset, position, record
+
+
+def read_record_at(filepath, password, chunk_index, offset, position):
+    """
+    Одна запись по расположению из адресного индекса: расшифровывается только её кадр.
+    """
+    with open(filepath, "rb") as f:
+        head = f.read(container.HEADER_SIZE)
+        if chunk_index is None or not container.is_container(head):
+            return _decrypt_legacy(head + f.read(), password)[position]
+        f.seek(0)
+        header, salt = container.read_header(f)
+        chunk = container.read_chunk(f, file_key(password, header, salt), offset, chunk_index, header)
+    return chunk[position]
+
+
+def decrypt_data(filepath, password):
+    try:
+        return list(iter_records(filepath, password))
+    except Exception:
+        return None
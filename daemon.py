@@ -0,0 +1,630 @@
+"""
+Сервис генерации: процессы пула запускаются один раз и остаются тёплыми.
+
+Каждый вызов `cli.py generate` заново поднимает интерпретатор, импортирует
+bip_utils, cryptography и модули сетей и стартует пул — на небольших заданиях
+это дольше самой генерации. Сервис держит пул постоянно: при старте каждый
+процесс импортирует bip_utils и все модули из networks/ (_warm_worker), а
+состояние воркера (engine._init_worker) кэшируется по набору (сети, конфиг,
+длина мнемоники, passphrase), так что повторное задание той же сети не
+инициализирует ничего.
+
+Задания принимаются через Unix-сокет (data/keyforge.sock, права 0600) или,
+где его нет, через 127.0.0.1:<порт>. Порт доступен любому локальному
+пользователю, поэтому в режиме TCP сервис пишет случайный токен в
+data/keyforge.token (права 0600) и принимает только запросы с этим токеном
+(поле "token"; клиент этого модуля подставляет его сам). Протокол — строки
+JSON: запрос одной строкой, ответ — одна или несколько строк.
+
+    {"op": "submit", "job": {...}, "follow": true}   задание в формате job-файла cli.py
+    {"op": "follow", "id": 3}                         следить за заданием
+    {"op": "status"}                                  пул и список заданий
+    {"op": "stop"}                                    дождаться текущих заданий и выйти
+    {"op": "ping"}
+
+На submit/follow сервис шлёт снимок задания при каждом изменении (не чаще
+PROGRESS_INTERVAL): "queued" -> "running" с generated/wallets_per_sec -> итог
+"ok" | "error" | "duplicate" | "cancelled" с теми же полями, что cli.py generate.
+
+Одновременно выполняется до max_jobs заданий, остальные ждут в очереди.
+Пачки выполняемых заданий раздаются пулу по кругу (Scheduler): большое задание
+не задерживает маленькое, пришедшее позже. Запись — тем же конвейером, что и
+cli.py (pipeline.generate_to_file: контейнер .enc, контрольные точки, индекс,
+dedup). "output" задания должен лежать внутри wallets_encrypted/: сервис не
+пишет файлы в произвольные папки. Пароль передаётся не значением, а ссылкой: "password_env" / "password_file"
+читает сам сервис (как и passphrase, watch_key); хранилище ("vault": true)
+разблокируется один раз на время жизни сервиса.
+
+    python cli.py daemon serve --workers 8
+    python cli.py generate --network evm --count 1000 --password-file /run/secrets/kf --daemon
+    python cli.py daemon status
+    python cli.py daemon stop
+
+Остановка по Ctrl+C / SIGTERM прерывает выполняемые задания: их .part и
+.job.json остаются, `cli.py resume` догенерирует остаток.
+"""
+import os
+import json
+import time
+import hmac
+import socket
+import signal
+import secrets
+import threading
+import functools
+import socketserver
+from collections import deque, OrderedDict
+
+import cli
+import core
+import engine
+
+SOCKET_FILE = os.path.join("data", "keyforge.sock")
+TOKEN_FILE = os.path.join("data", "keyforge.token")
+HOST = "127.0.0.1"
+MAX_JOBS = 4
+# Сколько разных (сети, конфиг, passphrase) помнит процесс пула
+STATE_CACHE = 8
+# Снимки прогресса — не чаще раза в PROGRESS_INTERVAL секунд
+PROGRESS_INTERVAL = 0.5
+# Сколько завершённых заданий показывает status
+HISTORY = 100
+
+FINAL = ("ok", "error", "duplicate", "cancelled")
+
+
+class DaemonError(Exception):
+    pass
+
+
+# --- ВОРКЕР ---
+
+_states = OrderedDict()
+
+
+def _warm_worker():
+    """
+    Инициализатор процесса пула: тяжёлые импорты и все модули сетей — один раз на процесс.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import bip_utils  # noqa: F401
+    import derivation  # noqa: F401
+    core.load_networks()
+
+
+def _ready():
+    return os.getpid()
+
+
+def _generate_chunk(init_args, size):
+    """
+    Пачка кошельков задания. Состояние воркера для init_args строится один раз
+    и переключается между заданиями без повторной инициализации.
+    """
+    key = json.dumps(init_args, sort_keys=True)
+    state = _states.pop(key, None)
+    if state is None:
+        engine._init_worker(*init_args, True)
+        state = dict(engine._worker)
+    else:
+        engine._worker.clear()
+        engine._worker.update(state)
+    _states[key] = state
+    while len(_states) > STATE_CACHE:
+        _states.popitem(last=False)
+    size, entries, _ = engine._generate_chunk(size)
+    return size, entries
+
+
+# --- ПЛАНИРОВЩИК ---
+
+class Scheduler:
+    """
+    Общий тёплый пул. Пачки выполняемых заданий отправляются по кругу; в работе не
+    больше max_inflight пачек на весь пул и не больше window на задание (результаты
+    одного задания отдаются строго по порядку и не копятся, если его запись отстаёт).
+    """
+
+    def __init__(self, workers, max_inflight=None):
+        self.workers = workers
+        self.max_inflight = max_inflight or workers * 2
+        self.window = workers * 2
+        self.cond = threading.Condition()
+        self.jobs = deque()
+        self.running = 0
+        self.closed = False
+        self.executor = self._start_pool()
+        self.thread = threading.Thread(target=self._loop, name="daemon-scheduler", daemon=True)
+        self.thread.start()
+
+    def _start_pool(self):
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # Процессы стартуют и прогреваются сразу, а не на первом задании
+        self.pids = sorted({f.result() for f in [executor.submit(_ready) for _ in range(self.workers)]})
+        return executor
+
+    def _next(self):
+        if self.running >= self.max_inflight:
+            return None
+        for _ in range(len(self.jobs)):
+            job = self.jobs[0]
+            self.jobs.rotate(-1)
+            if job.chunks and job.inflight < self.window:
+                return job
+        return None
+
+    def _done(self, future):
+        with self.cond:
+            self.running -= 1
+            self.cond.notify_all()
+
+    def _loop(self):
+        from concurrent.futures.process import BrokenProcessPool
+        with self.cond:
+            while True:
+                job = self._next()
+                while job is None and not self.closed:
+                    self.cond.wait()
+                    job = self._next()
+                if self.closed:
+                    return
+                size = job.chunks.popleft()
+                try:
+                    future = self.executor.submit(_generate_chunk, job.init_args, size)
+                except BrokenProcessPool:
+                    # Процесс пула убит (OOM) — задания с пачками в нём упадут, новые идут в новый пул
+                    self.executor = self._start_pool()
+                    future = self.executor.submit(_generate_chunk, job.init_args, size)
+                job.inflight += 1
+                self.running += 1
+                job.futures.append(future)
+                future.add_done_callback(self._done)
+                self.cond.notify_all()
+
+    def stream(self, job, targets, count, words_num, passphrase):
+        """
+        Поток (size, entries) задания для pipeline.generate_to_file (аргумент source).
+        """
+        chunks = engine.split_chunks(count, self.workers)
+        with self.cond:
+            if self.closed:
+                raise DaemonError("Сервис остановлен")
+            job.init_args = (targets, words_num, passphrase)
+            job.chunks = deque(chunks)
+            self.jobs.append(job)
+            self.cond.notify_all()
+        try:
+            for _ in chunks:
+                with self.cond:
+                    while not job.futures:
+                        if job.aborted:
+                            raise DaemonError("Задание прервано: сервис остановлен")
+                        self.cond.wait()
+                    future = job.futures.popleft()
+                size, entries = future.result()
+                with self.cond:
+                    job.inflight -= 1
+                    self.cond.notify_all()
+                yield size, entries
+        finally:
+            with self.cond:
+                job.chunks.clear()
+                for future in job.futures:
+                    future.cancel()
+                if job in self.jobs:
+                    self.jobs.remove(job)
+                self.cond.notify_all()
+
+    def abort(self, jobs):
+        with self.cond:
+            for job in jobs:
+                job.aborted = True
+                job.chunks.clear()
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+# --- ЗАДАНИЯ ---
+
+class Job:
+    def __init__(self, job_id, spec):
+        self.id = job_id
+        self.spec = spec
+        self.status = "queued"
+        self.requested = int(spec.get("count", cli.JOB_DEFAULTS["count"]))
+        self.generated = 0
+        self.output = None
+        self.result = {}
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.version = 0
+        self.notified = 0.0
+        # Состояние в планировщике
+        self.init_args = None
+        self.chunks = deque()
+        self.futures = deque()
+        self.inflight = 0
+        self.aborted = False
+
+    def public(self):
+        """
+        Снимок задания для клиента — без секретов и ссылок на них.
+        """
+        info = {"id": self.id, "status": self.status,
+                "network": self.spec.get("network") or self.spec.get("networks"),
+                "requested": self.requested, "generated": self.generated, "output": self.output}
+        if self.status == "running" and self.started:
+            elapsed = time.perf_counter() - self.started
+            info["wallets_per_sec"] = round(self.generated / elapsed, 2) if elapsed else None
+        if self.error:
+            info["error"] = self.error
+        info.update(self.result)
+        return info
+
+
+class Service:
+    def __init__(self, workers=None, max_jobs=MAX_JOBS):
+        from concurrent.futures import ThreadPoolExecutor
+        # Файлы пишет основной процесс: конвейер, шифрование (cryptography), индекс и dedup — заранее
+        import pipeline, vault, index, dedup  # noqa: F401
+        self.workers = workers or engine.default_workers()
+        self.max_jobs = max_jobs
+        self.started = time.time()
+        self.scheduler = Scheduler(self.workers)
+        self.runner = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="daemon-job")
+        self.changed = threading.Condition()
+        self.jobs = OrderedDict()
+        self.outputs = set()
+        self.next_id = 1
+        self.closing = False
+
+    def _touch(self, job, force=True):
+        # Вызывается под self.changed
+        now = time.perf_counter()
+        if force or now - job.notified >= PROGRESS_INTERVAL:
+            job.notified = now
+            job.version += 1
+            self.changed.notify_all()
+
+    def submit(self, spec):
+        if not isinstance(spec, dict):
+            raise DaemonError("Задание — объект JSON в формате job-файла cli.py")
+        if not spec.get("network") and not spec.get("networks"):
+            raise DaemonError("Не указана сеть (network или networks)")
+        with self.changed:
+            if self.closing:
+                raise DaemonError("Сервис останавливается")
+            job = Job(self.next_id, spec)
+            self.next_id += 1
+            self.jobs[job.id] = job
+            finished = [j for j in self.jobs.values() if j.status in FINAL]
+            for old in finished[:max(0, len(finished) - HISTORY)]:
+                del self.jobs[old.id]
+            self.runner.submit(self._run, job)
+        return job
+
+    def _reserve_output(self, job, spec):
+        """
+        Путь файла задания. Два задания не пишут в один файл: имя по умолчанию
+        с той же секундой получает метку задания. Путь клиента — только внутри ENC_DIR.
+        """
+        spec = {**cli.JOB_DEFAULTS, **spec}
+        if spec["output"]:
+            _check_output(spec["output"])
+        symbol = engine.multi_symbol(cli.resolve_targets(spec))
+        path = cli.output_path(spec, symbol)
+        with self.changed:
+            if path in self.outputs:
+                if spec["output"]:
+                    raise DaemonError(f"Файл уже пишется другим заданием: {path}")
+                tag = f"{spec['tag']}-job{job.id}" if spec["tag"] else f"job{job.id}"
+                path = os.path.join(core.ENC_DIR, core.make_filename(symbol, tag))
+            self.outputs.add(path)
+            job.output = path
+        return path
+
+    def _run(self, job):
+        with self.changed:
+            if job.status != "queued":
+                return
+            job.status = "running"
+            job.started = time.perf_counter()
+            self._touch(job)
+
+        def progress(size, records):
+            with self.changed:
+                job.generated += records
+                self._touch(job, force=False)
+
+        path = None
+        try:
+            path = self._reserve_output(job, job.spec)
+            result = cli.run_job({**job.spec, "output": path},
+                                 source=functools.partial(self.scheduler.stream, job), on_progress=progress)
+            result["workers"] = self.workers
+            status, error = "ok", None
+        except Exception as e:
+            import dedup
+            result, status, error = {}, "error", str(e) or type(e).__name__
+            if isinstance(e, dedup.DuplicateAddressError):
+                status = "duplicate"
+                result = {"address": e.address, "first": e.first, "second": e.second}
+        finally:
+            with self.changed:
+                self.outputs.discard(path)
+        with self.changed:
+            job.status, job.error = status, error
+            job.result = {k: v for k, v in result.items() if k not in ("status", "requested")}
+            self._touch(job)
+
+    def follow(self, job):
+        """
+        Снимки задания при каждом изменении, до итогового статуса включительно.
+        """
+        version = -1
+        while True:
+            with self.changed:
+                while job.version == version:
+                    self.changed.wait()
+                version = job.version
+                info = job.public()
+            yield info
+            if info["status"] in FINAL:
+                return
+
+    def get(self, job_id):
+        with self.changed:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise DaemonError(f"Задание не найдено: {job_id}")
+        return job
+
+    def status(self):
+        with self.changed:
+            jobs = [job.public() for job in self.jobs.values()]
+        return {"status": "ok", "pid": os.getpid(), "workers": self.workers, "pool": self.scheduler.pids,
+                "max_jobs": self.max_jobs, "uptime": round(time.time() - self.started, 1), "jobs": jobs}
+
+    def close(self, abort=False):
+        """
+        Остановка: задания из очереди отменяются; выполняемые дописываются
+        или, при abort=True, прерываются с контрольной точкой (cli.py resume).
+        """
+        with self.changed:
+            self.closing = True
+            running = []
+            for job in self.jobs.values():
+                if job.status == "queued":
+                    job.status = "cancelled"
+                    self._touch(job)
+                elif job.status == "running":
+                    running.append(job)
+        if abort:
+            self.scheduler.abort(running)
+        self.runner.shutdown(wait=True, cancel_futures=True)
+        self.scheduler.close()
+
+
+def _check_output(path):
+    folder = os.path.realpath(core.ENC_DIR)
+    if os.path.commonpath([folder, os.path.realpath(path)]) != folder:
+        raise DaemonError(f"Файл задания должен лежать в {core.ENC_DIR}/: {path}")
+
+
+# --- ПРОТОКОЛ ---
+
+class Handler(socketserver.StreamRequestHandler):
+    # Запрос должен прийти сразу: молчащий клиент не держит остановку сервиса
+    timeout = 10
+
+    def handle(self):
+        service = self.server.service
+        try:
+            request = json.loads(self.rfile.readline() or "null")
+            if not isinstance(request, dict):
+                raise DaemonError("Запрос — объект JSON одной строкой")
+            op = request.get("op")
+            token = self.server.token
+            if token and op != "ping" and \
+                    not hmac.compare_digest(str(request.get("token", "")).encode(), token.encode()):
+                raise DaemonError("Неверный токен сервиса")
+            if op == "ping":
+                self.send({"status": "ok", "pid": os.getpid()})
+            elif op == "status":
+                self.send(service.status())
+            elif op == "submit":
+                job = service.submit(request.get("job"))
+                if request.get("follow", True):
+                    self.stream(service, job)
+                else:
+                    self.send(job.public())
+            elif op == "follow":
+                self.stream(service, service.get(request.get("id")))
+            elif op == "stop":
+                self.send({"status": "ok", "stopping": True})
+                # shutdown() ждёт выхода из serve_forever — не из потока обработчика
+                threading.Thread(target=self.server.stop, daemon=True).start()
+            else:
+                raise DaemonError(f"Неизвестная операция: {op}")
+        except (BrokenPipeError, ConnectionResetError, socket.timeout):
+            # Клиент ушёл — задание продолжается, за ним можно следить снова (follow)
+            pass
+        except (DaemonError, ValueError) as e:
+            self.send({"status": "error", "error": str(e)})
+
+    def stream(self, service, job):
+        for info in service.follow(job):
+            self.send(info)
+
+    def send(self, message):
+        self.wfile.write(json.dumps(message, ensure_ascii=False).encode() + b"\n")
+        self.wfile.flush()
+
+
+class _ServerMixin:
+    # server_close() ждёт обработчики: клиенты получают итоговый снимок своих заданий
+    daemon_threads = False
+    token = None
+
+    def stop(self):
+        self.service.close()
+        self.shutdown()
+
+
+if hasattr(socket, "AF_UNIX"):
+    class UnixServer(_ServerMixin, socketserver.ThreadingUnixStreamServer):
+        pass
+
+
+class TCPServer(_ServerMixin, socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+    def server_activate(self):
+        super().server_activate()
+        self.token = _write_token()
+
+
+def _write_token():
+    """
+    Новый токен для режима TCP: файл пересоздаётся с правами 0600 до того,
+    как в него попадёт значение.
+    """
+    token = secrets.token_hex(16)
+    os.makedirs(os.path.dirname(TOKEN_FILE), exist_ok=True)
+    if os.path.exists(TOKEN_FILE):
+        os.remove(TOKEN_FILE)
+    fd = os.open(TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+def _read_token():
+    try:
+        with open(TOKEN_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _address(socket_path=None, port=None):
+    if port or not hasattr(socket, "AF_UNIX"):
+        return HOST, int(port or 0)
+    return socket_path or SOCKET_FILE
+
+
+def _bind(address):
+    if isinstance(address, tuple):
+        if not address[1]:
+            raise DaemonError("Unix-сокеты недоступны: укажите порт (--port)")
+        return TCPServer(address, Handler)
+    if os.path.exists(address):
+        try:
+            ping(address)
+        except OSError:
+            # Сокет остался от упавшего сервиса
+            os.remove(address)
+        else:
+            raise DaemonError(f"Сервис уже запущен: {address}")
+    folder = os.path.dirname(address)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    # Сокет доступен только владельцу: через него можно писать файлы от его имени
+    umask = os.umask(0o177)
+    try:
+        return UnixServer(address, Handler)
+    finally:
+        os.umask(umask)
+
+
+def serve(workers=None, max_jobs=MAX_JOBS, socket_path=None, port=None, on_ready=None):
+    """
+    Запускает сервис и обслуживает запросы до stop, Ctrl+C или SIGTERM.
+    on_ready(info) — когда пул прогрет и сокет слушает.
+    """
+    address = _address(socket_path, port)
+    server = _bind(address)
+    try:
+        server.service = Service(workers, max_jobs)
+        # SIGTERM как Ctrl+C; обработчик ставится только из главного потока (сервис в потоке — без него)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+        if on_ready:
+            on_ready({"status": "ready", "pid": os.getpid(), "address": _describe(server.server_address),
+                      "workers": server.service.workers, "pool": server.service.scheduler.pids,
+                      "max_jobs": max_jobs})
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.service.close(abort=True)
+    finally:
+        server.server_close()
+        if not isinstance(address, tuple) and os.path.exists(address):
+            os.remove(address)
+        if server.token and _read_token() == server.token:
+            os.remove(TOKEN_FILE)
+
+
+def _describe(address):
+    if isinstance(address, tuple):
+        return f"{address[0]}:{address[1]}"
+    return address
+
+
+# --- КЛИЕНТ ---
+
+def connect(socket_path=None, port=None, timeout=None):
+    address = _address(socket_path, port)
+    if isinstance(address, tuple):
+        return socket.create_connection(address, timeout=timeout)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def request(message, socket_path=None, port=None):
+    """
+    Отправляет запрос и отдаёт строки ответа (dict) по мере прихода.
+    В режиме TCP к запросу добавляется токен сервиса из TOKEN_FILE.
+    """
+    if isinstance(_address(socket_path, port), tuple) and "token" not in message:
+        message = {**message, "token": _read_token()}
+    with connect(socket_path, port) as sock:
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def ping(socket_path=None, port=None):
+    with connect(socket_path, port, timeout=2) as sock:
+        sock.sendall(b'{"op": "ping"}\n')
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def submit(job, follow=True, socket_path=None, port=None):
+    """
+    Ставит задание в очередь сервиса. follow=True — снимки до итогового статуса.
+    """
+    return request({"op": "submit", "job": job, "follow": follow}, socket_path, port)
+
+
+def status(socket_path=None, port=None):
+    return next(request({"op": "status"}, socket_path, port))
+
+
+def stop(socket_path=None, port=None):
+    return next(request({"op": "stop"}, socket_path, port))
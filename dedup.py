@@ -0,0 +1,448 @@
+"""
+Глобальная проверка дубликатов адресов по всем сгенерированным файлам.
+
+Два уровня:
+  1. Фильтр Блума (data/address_bloom.bin) — битовый массив фиксированного
+     размера, отображённый в память (mmap). Ответ "точно не встречался"
+     стоит один хеш blake2b и k обращений к битам, без диска и SQLite.
+  2. Точное множество (data/address_seen.sqlite) — таблица адрес -> файл,
+     кадр, позиция. Запрос в неё делается только для адресов, которые фильтр
+     считает возможно встречавшимися (ложные срабатывания ~FALSE_POSITIVE).
+     PRIMARY KEY по адресу — последняя страховка: если фильтр отстал (удалён,
+     писался параллельно другим процессом), вставка упадёт, и пачка
+     перепроверяется построчно.
+
+Проверка идёт в потоке записи при закрытии каждого кадра (ContainerWriter.on_chunk,
+см. core.open_writer и pipeline.py) — генерацию она не тормозит. Кадр проверяется
+до записи на диск: дубликат прерывает запись исключением DuplicateAddressError,
+и кадр с ним в .enc / .part (и watch-only файл) не попадает.
+
+Память фиксирована размером фильтра: на 10^8 адресов при 1% ложных
+срабатываний — ~115 МБ (`cli.py dedup rebuild --capacity 100000000`), по
+умолчанию фильтр рассчитан на DEFAULT_CAPACITY адресов (~12 МБ). Когда адресов
+больше ёмкости, растёт только доля запросов в SQLite, точность не страдает.
+
+Пересборка инкрементальная: `cli.py dedup build` добавляет файлы, которых нет
+в множестве или которые изменились; адреса берутся из адресного индекса
+(index.py) без расшифровки, если он свежий, иначе файл расшифровывается.
+"""
+import os
+import math
+import mmap
+import struct
+import sqlite3
+import hashlib
+import itertools
+
+import index
+
+SEEN_FILE = os.path.join("data", "address_seen.sqlite")
+BLOOM_FILE = os.path.join("data", "address_bloom.bin")
+DEFAULT_CAPACITY = 10_000_000
+FALSE_POSITIVE = 0.01
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS seen (
+    address TEXT PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    chunk INTEGER NOT NULL,
+    position INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS seen_file ON seen(file_id, chunk);
+"""
+
+
+class DuplicateAddressError(Exception):
+    def __init__(self, address, first, second):
+        self.address = address
+        self.first = first
+        self.second = second
+        super().__init__(f"ДУБЛИКАТ АДРЕСА {address}: {describe(first)} и {describe(second)}")
+
+
+def describe(location):
+    return f"{location['file']} (кадр {location['chunk']}, запись {location['position']})"
+
+
+def connect(path=None):
+    path = path or SEEN_FILE
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Поток записи pipeline.py открывает множество в основном потоке, а пишет в своём
+    db = sqlite3.connect(path, check_same_thread=False, timeout=60)
+    # WAL: запись кадров не блокирует параллельные `dedup check` и другие задания
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+# --- ФИЛЬТР БЛУМА ---
+
+class Bloom:
+    """
+    Фильтр Блума в файле: заголовок HEADER и биты, отображённые в память.
+    check_add(address) -> True, если адрес возможно уже добавлялся (и добавляет его).
+    """
+
+    HEADER = struct.Struct(">4sBQQQ")  # magic, hashes, bits, capacity, count
+    OFFSET = 32
+    MAGIC = b"KFB\x01"
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY):
+        self.path = path or BLOOM_FILE
+        if not os.path.exists(self.path):
+            self.create(self.path, capacity)
+        self.f = open(self.path, "r+b")
+        self.bits = mmap.mmap(self.f.fileno(), 0)
+        magic, self.hashes, self.size, self.capacity, self.count = self.HEADER.unpack_from(self.bits)
+        if magic != self.MAGIC or len(self.bits) != self.OFFSET + self.size // 8:
+            self.bits.close()
+            self.f.close()
+            raise ValueError(f"Повреждён фильтр {self.path}: выполните `cli.py dedup rebuild`")
+
+    @staticmethod
+    def dimensions(capacity, false_positive=FALSE_POSITIVE):
+        """
+        (число бит, число хешей) для capacity элементов при заданной доле ложных срабатываний.
+        """
+        bits = math.ceil(-capacity * math.log(false_positive) / math.log(2) ** 2)
+        bits = max(8, bits + -bits % 8)
+        return bits, max(1, round(bits / capacity * math.log(2)))
+
+    @classmethod
+    def create(cls, path, capacity=DEFAULT_CAPACITY):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        bits, hashes = cls.dimensions(capacity)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, hashes, bits, capacity, 0).ljust(cls.OFFSET, b"\x00"))
+            # Разреженный файл: место на диске занимают только страницы с выставленными битами
+            f.truncate(cls.OFFSET + bits // 8)
+        os.replace(tmp, path)
+
+    def _positions(self, address):
+        # Двойное хеширование: k позиций из двух половин одного blake2b
+        digest = hashlib.blake2b(address.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % self.size
+            yield self.OFFSET + (pos >> 3), 1 << (pos & 7)
+
+    def __contains__(self, address):
+        return all(self.bits[byte] & mask for byte, mask in self._positions(address))
+
+    def check_add(self, address):
+        bits = self.bits
+        present = True
+        for byte, mask in self._positions(address):
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                present = False
+        if not present:
+            self.count += 1
+        return present
+
+    def false_positive_rate(self):
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+    def flush(self, sync=True):
+        # count — оценка: при параллельной записи несколькими процессами он приблизительный
+        self.bits[:self.HEADER.size] = self.HEADER.pack(self.MAGIC, self.hashes, self.size, self.capacity, self.count)
+        if sync:
+            self.bits.flush()
+
+    def close(self):
+        if not self.bits.closed:
+            self.flush()
+            self.bits.close()
+        self.f.close()
+
+
+# --- ПРОВЕРКА ПРИ ЗАПИСИ ---
+
+def _file_key(filepath):
+    return os.path.abspath(filepath)
+
+
+def _live(path):
+    # Файл ещё существует (или дописывается с контрольными точками, см. pipeline.py)
+    return os.path.exists(path) or os.path.exists(path + ".part")
+
+
+class Checker:
+    """
+    Проверяет и запоминает адреса одного файла по мере записи.
+    Подключается как ContainerWriter.on_chunk; filepath — итоговый путь файла
+    (pipeline.py пишет в .part, но запоминать нужно готовое имя).
+    strict=False — дубликаты не прерывают работу, а копятся в self.duplicates (пересборка).
+    """
+
+    def __init__(self, filepath, strict=True, db=None, bloom=None):
+        self.filepath = _file_key(filepath)
+        self.strict = strict
+        self.duplicates = []
+        self.added = 0
+        self._own = db is None, bloom is None
+        self.db = db or connect()
+        self.bloom = bloom or Bloom()
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO files (path) VALUES (?)", (self.filepath,))
+        self.file_id = self.db.execute("SELECT id FROM files WHERE path = ?", (self.filepath,)).fetchone()[0]
+        self._paths = {self.file_id: self.filepath}
+
+    def reset(self):
+        """
+        Забывает прежние адреса файла (файл перезаписывается с нуля).
+        """
+        with self.db:
+            self.db.execute("DELETE FROM seen WHERE file_id = ?", (self.file_id,))
+            self.db.execute("UPDATE files SET size = NULL, mtime_ns = NULL WHERE id = ?", (self.file_id,))
+
+    def truncate(self, chunks):
+        """
+        Забывает адреса кадров с номера `chunks` — хвост после контрольной точки срезан (resume).
+        """
+        with self.db:
+            self.db.execute("DELETE FROM seen WHERE file_id = ? AND chunk >= ?", (self.file_id, chunks))
+
+    def on_chunk(self, chunk_index, offset, records):
+        rows = []
+        for position, record in enumerate(records):
+            # В мульти-режиме один адрес бывает в записи дважды (address и cosmos_address)
+            addresses = {index.normalize(a) for a, _ in index.record_addresses(record)}
+            rows.extend((address, self.file_id, chunk_index, position) for address in sorted(addresses))
+        self.add(rows)
+
+    def add(self, rows):
+        """
+        rows — (address, file_id, chunk, position) с нормализованными адресами.
+        """
+        try:
+            with self.db:
+                fresh = [row for row in rows if not self.bloom.check_add(row[0]) or self._check(row)]
+                self.db.executemany("INSERT INTO seen (address, file_id, chunk, position) VALUES (?, ?, ?, ?)", fresh)
+        except sqlite3.IntegrityError:
+            # Фильтр пропустил известный адрес или адрес повторился в самой пачке — построчно
+            with self.db:
+                fresh = []
+                for row in rows:
+                    if self._check(row):
+                        self.db.execute("INSERT INTO seen (address, file_id, chunk, position) VALUES (?, ?, ?, ?)", row)
+                        fresh.append(row)
+        self.added += len(fresh)
+        # Биты в mmap переживают и kill -9, счётчик в заголовке — обновляем вместе с ними
+        self.bloom.flush(sync=False)
+
+    def _path(self, file_id):
+        if file_id not in self._paths:
+            row = self.db.execute("SELECT path FROM files WHERE id = ?", (file_id,)).fetchone()
+            self._paths[file_id] = row[0] if row else ""
+        return self._paths[file_id]
+
+    def _check(self, row):
+        """
+        Точная проверка адреса. True — адрес новый, его нужно вставить.
+        """
+        address, file_id, chunk, position = row
+        existing = self.db.execute("SELECT file_id, chunk, position FROM seen WHERE address = ?",
+                                   (address,)).fetchone()
+        if existing is None:
+            return True
+        if tuple(existing) == (file_id, chunk, position):
+            # Тот же кадр заново (resume перечитывает записанные кадры)
+            return False
+        path = self._path(existing[0])
+        if existing[0] != self.file_id and not _live(path):
+            # Файл удалён — адрес снова свободен
+            self.db.execute("DELETE FROM seen WHERE address = ?", (address,))
+            return True
+        first = {"file": path, "chunk": existing[1], "position": existing[2]}
+        second = {"file": self._path(file_id), "chunk": chunk, "position": position}
+        if self.strict:
+            raise DuplicateAddressError(address, first, second)
+        self.duplicates.append({"address": address, "first": first, "second": second})
+        return False
+
+    def finish(self):
+        """
+        Файл записан целиком: запоминаем размер и время изменения (для инкрементальной сборки).
+        """
+        if os.path.exists(self.filepath):
+            st = os.stat(self.filepath)
+            with self.db:
+                self.db.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?",
+                                (st.st_size, st.st_mtime_ns, self.file_id))
+
+    def close(self):
+        own_db, own_bloom = self._own
+        if own_bloom:
+            self.bloom.close()
+        else:
+            self.bloom.flush()
+        if own_db:
+            self.db.close()
+
+
+# --- ПЕРЕСБОРКА И ПОИСК ---
+
+def is_fresh(filepath, db):
+    row = db.execute("SELECT size, mtime_ns FROM files WHERE path = ?", (_file_key(filepath),)).fetchone()
+    if not row or not os.path.exists(filepath):
+        return False
+    st = os.stat(filepath)
+    return tuple(row) == (st.st_size, st.st_mtime_ns)
+
+
+def _index_rows(filepath):
+    # Адреса из свежего адресного индекса — без расшифровки файла
+    db = index.connect()
+    try:
+        if not index.is_fresh(filepath, db):
+            return None
+        return db.execute(
+            "SELECT a.address, a.chunk, a.position FROM addresses a JOIN files f ON f.id = a.file_id "
+            "WHERE f.path = ? ORDER BY a.chunk, a.position", (os.path.abspath(filepath),)
+        ).fetchall()
+    finally:
+        db.close()
+
+
+def prune(db):
+    """
+    Забывает файлы, которых больше нет на диске (биты фильтра остаются до rebuild).
+    """
+    gone = [(file_id,) for file_id, path in db.execute("SELECT id, path FROM files") if not _live(path)]
+    with db:
+        db.executemany("DELETE FROM seen WHERE file_id = ?", gone)
+        db.executemany("DELETE FROM files WHERE id = ?", gone)
+    return len(gone)
+
+
+def build(paths, password=None, force=False):
+    """
+    Добавляет в множество файлы, которых в нём нет или которые изменились (force=True — все).
+    Отдаёт по файлу {"file", "status", ...}: added / fresh / skipped (нужен пароль) / error.
+    Найденные дубликаты не прерывают сборку — они в "duplicates".
+    """
+    import core
+
+    db = connect()
+    bloom = Bloom()
+    try:
+        prune(db)
+        for path in paths:
+            if not force and is_fresh(path, db):
+                yield {"file": path, "status": "fresh"}
+                continue
+            checker = Checker(path, strict=False, db=db, bloom=bloom)
+            try:
+                rows = _index_rows(path)
+                if rows is None and password is None:
+                    yield {"file": path, "status": "skipped", "error": "Нет в адресном индексе — нужен пароль"}
+                    continue
+                checker.reset()
+                if rows is not None:
+                    source = "index"
+                    for chunk, group in itertools.groupby(rows, key=lambda r: r[1]):
+                        checker.add(list(dict.fromkeys((a, checker.file_id, c, p) for a, c, p in group)))
+                else:
+                    source = "decrypt"
+                    batch, chunk = [], None
+                    for chunk_index, _, position, record in core.iter_located_records(path, password):
+                        if chunk_index != chunk and batch:
+                            checker.on_chunk(chunk, None, batch)
+                            batch = []
+                        chunk = chunk_index
+                        batch.append(record)
+                    if batch:
+                        checker.on_chunk(chunk, None, batch)
+                checker.finish()
+            except Exception as e:
+                yield {"file": path, "status": "error", "error": str(e) or type(e).__name__}
+                continue
+            finally:
+                checker.close()
+            result = {"file": path, "status": "added", "addresses": checker.added, "source": source}
+            if checker.duplicates:
+                result["status"] = "duplicate"
+                result["duplicates"] = checker.duplicates
+            yield result
+    finally:
+        bloom.close()
+        db.close()
+
+
+def rebuild(paths, password=None, capacity=DEFAULT_CAPACITY):
+    """
+    Пересоздаёт фильтр на capacity адресов и множество с нуля, затем build().
+    """
+    db = connect()
+    try:
+        with db:
+            db.execute("DELETE FROM seen")
+            db.execute("DELETE FROM files")
+    finally:
+        db.close()
+    Bloom.create(BLOOM_FILE, capacity)
+    yield from build(paths, password, force=True)
+
+
+def check(address):
+    """
+    Где встречался адрес: {"address", "bloom", "file", "chunk", "position"} или без "file".
+    """
+    address = index.normalize(address)
+    db = connect()
+    try:
+        row = db.execute(
+            "SELECT f.path, s.chunk, s.position FROM seen s JOIN files f ON f.id = s.file_id WHERE s.address = ?",
+            (address,)
+        ).fetchone()
+    finally:
+        db.close()
+    result = {"address": address}
+    if os.path.exists(BLOOM_FILE):
+        bloom = Bloom()
+        try:
+            result["bloom"] = address in bloom
+        finally:
+            bloom.close()
+    if row:
+        result.update(file=row[0], chunk=row[1], position=row[2])
+    return result
+
+
+def status():
+    """
+    Размер множества и заполненность фильтра.
+    """
+    db = connect()
+    try:
+        addresses = db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        files = db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+    finally:
+        db.close()
+    result = {"addresses": addresses, "files": files}
+    if os.path.exists(BLOOM_FILE):
+        bloom = Bloom()
+        try:
+            result.update(bloom_capacity=bloom.capacity, bloom_count=bloom.count, bloom_hashes=bloom.hashes,
+                          bloom_mb=round(bloom.size / 8 / 2 ** 20, 1),
+                          false_positive_rate=round(bloom.false_positive_rate(), 6))
+        finally:
+            bloom.close()
+        if bloom.count > bloom.capacity:
+            result["warning"] = "Адресов больше ёмкости фильтра: `cli.py dedup rebuild --capacity N`"
+        elif bloom.count < addresses * (1 - 5 * FALSE_POSITIVE):
+            # Ложные срабатывания не увеличивают счётчик — небольшое отставание нормально
+            result["warning"] = "Фильтр отстаёт от множества: `cli.py dedup rebuild`"
+    return result
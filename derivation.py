@@ -0,0 +1,393 @@
+"""
+Общие помощники деривации для модулей networks/.
+
+SeedContext хранит один seed и кэширует мастер-ключи BIP32 по классу кривой,
+поэтому несколько модулей (или несколько режимов одного модуля) получают
+общий мастер-узел вместо повторного FromSeed.
+
+Диапазоны адресов: конфиг сети может содержать
+    "address_range": "0..99"            — индексы адресов (включительно)
+    "account_range": "0..4"             — индексы аккаунтов
+    "path": "m/44'/60'/0'/0/{0..9999}"  — шаблон пути с диапазонами
+Родительские узлы (аккаунт, change) считаются один раз, на каждый адрес
+приходится только последняя дочерняя деривация.
+
+Пакетная деривация (generate_batch модулей, см. derive_keys_batch): стандартный
+путь пачки seed считается напрямую по BIP32 / SLIP-10 — HMAC-SHA512 и сложение
+по модулю порядка кривой, умножение точки только там, где нужен публичный ключ
+родителя (не-hardened уровни). Объект bip_utils строится лишь для конечного узла.
+"""
+import re
+import hmac
+import time
+
+from bip_utils import (
+    Bip44, Bip49, Bip84, Bip86, Bip32KeyIndex, Bip44Changes, Bip32KeyData,
+    Bip32Secp256k1, Bip32Slip10Ed25519, Secp256k1, Secp256k1PrivateKey,
+    Bip44ConfGetter, Bip49ConfGetter, Bip84ConfGetter, Bip86ConfGetter
+)
+from bip_utils.bip.bip32.slip10.bip32_slip10_mst_key_generator import Bip32Slip10MstKeyGeneratorConst
+
+try:
+    # Тот же бэкенд, что у bip_utils: открытый ключ без промежуточных объектов
+    from coincurve import PublicKey as _CoincurvePublicKey
+except ImportError:
+    _CoincurvePublicKey = None
+
+import metrics
+
+PURPOSES = {Bip44: 44, Bip49: 49, Bip84: 84, Bip86: 86}
+
+CONF_GETTERS = {
+    Bip44: Bip44ConfGetter,
+    Bip49: Bip49ConfGetter,
+    Bip84: Bip84ConfGetter,
+    Bip86: Bip86ConfGetter,
+}
+
+
+class SeedContext:
+    def __init__(self, seed_bytes):
+        self.seed_bytes = seed_bytes
+        self._masters = {}
+
+    def master(self, bip32_cls):
+        """
+        Мастер-узел BIP32/SLIP-10 для класса кривой (считается один раз на seed).
+        """
+        node = self._masters.get(bip32_cls)
+        if node is None:
+            node = self._masters[bip32_cls] = bip32_cls.FromSeed(self.seed_bytes)
+        return node
+
+    def bip44(self, bip_cls, coin):
+        """
+        Аналог bip_cls.FromSeed(seed, coin), но на общем мастер-узле.
+        """
+        conf = CONF_GETTERS[bip_cls].GetConfig(coin)
+        bip32_cls = conf.Bip32Class()
+        node = self.master(bip32_cls)
+
+        # BIP49/84/86 отличаются только версиями ключа (ypub/zpub) — перекладываем тот же ключ
+        if node.KeyNetVersions().Private() != conf.KeyNetVersions().Private():
+            priv = node.PrivateKey()
+            node = bip32_cls(priv.KeyObject(), None, priv.Data(), conf.KeyNetVersions())
+        return bip_cls(node, conf)
+
+
+def from_seed(bip_cls, seed_bytes, coin, seed_ctx=None):
+    if seed_ctx is not None:
+        return seed_ctx.bip44(bip_cls, coin)
+    return bip_cls.FromSeed(seed_bytes, coin)
+
+
+def master_from_seed(bip32_cls, seed_bytes, seed_ctx=None):
+    if seed_ctx is not None:
+        return seed_ctx.master(bip32_cls)
+    return bip32_cls.FromSeed(seed_bytes)
+
+
+# --- ДИАПАЗОНЫ И ШАБЛОНЫ ПУТЕЙ ---
+
+_SEGMENT_RE = re.compile(r"^(?:\{(\d+)\.\.(\d+)\}|(\d+))(['hH]?)$")
+
+
+def parse_range(spec):
+    """
+    "0..99" / [0, 99] / 5 -> range (границы включительно).
+    """
+    if isinstance(spec, int):
+        return range(spec, spec + 1)
+    if isinstance(spec, (list, tuple)):
+        start, end = spec
+    else:
+        start, _, end = str(spec).partition("..")
+        end = end or start
+    start, end = int(start), int(end)
+    if end < start:
+        raise ValueError(f"Пустой диапазон: {spec}")
+    return range(start, end + 1)
+
+
+def has_ranges(config):
+    if not config:
+        return False
+    return ("address_range" in config or "account_range" in config
+            or "{" in config.get("path", ""))
+
+
+def parse_path(template):
+    """
+    "m/44'/60'/0'/0/{0..9}" -> [(range, hardened), ...] по уровням.
+    """
+    parts = template.strip().split("/")
+    if parts[0] != "m":
+        raise ValueError(f"Путь должен начинаться с 'm': {template}")
+
+    levels = []
+    for part in parts[1:]:
+        match = _SEGMENT_RE.match(part.strip())
+        if not match:
+            raise ValueError(f"Неверный сегмент пути '{part}' в {template}")
+        start, end, single, hardened = match.groups()
+        indexes = range(int(single), int(single) + 1) if single is not None else parse_range(f"{start}..{end}")
+        levels.append((indexes, bool(hardened)))
+    return levels
+
+
+def iter_path_nodes(root, template):
+    """
+    Отдаёт (path_str, node) для каждого пути шаблона, начиная от мастер-узла `root`.
+    root — объект Bip32 или Bip44/49/84/86 (тогда узлы оборачиваются в тот же класс,
+    чтобы работали PublicKey().ToAddress() и ToWif()). На ed25519 все уровни hardened.
+    """
+    wrap = None
+    if hasattr(root, "Bip32Object"):
+        bip_cls, conf = type(root), root.CoinConf()
+        wrap = lambda node: bip_cls(node, conf)
+        root = root.Bip32Object()
+
+    levels = parse_path(template)
+    # SLIP-10 ed25519 (Sui, Solana...) умеет только hardened-деривацию — как и Bip44, усиливаем все уровни
+    if not root.IsPublicDerivationSupported():
+        levels = [(indexes, True) for indexes, _ in levels]
+
+    def walk(node, depth, path):
+        if depth == len(levels):
+            yield path, wrap(node) if wrap else node
+            return
+        indexes, hardened = levels[depth]
+        for idx in indexes:
+            child = node.ChildKey(Bip32KeyIndex.HardenIndex(idx) if hardened else idx)
+            yield from walk(child, depth + 1, f"{path}/{idx}'" if hardened else f"{path}/{idx}")
+
+    yield from walk(root, 0, "m")
+
+
+def _range_segment(spec):
+    indexes = parse_range(spec)
+    if len(indexes) == 1:
+        return str(indexes[0])
+    return f"{{{indexes[0]}..{indexes[-1]}}}"
+
+
+def bip44_template(bip_obj, config=None, change_level=False):
+    """
+    Шаблон пути для объекта Bip44/49/84/86 с учётом диапазонов из конфига.
+    change_level=True — для сетей, где адрес заканчивается на уровне Change (Solana):
+    там каждый адрес — отдельный аккаунт, поэтому address_range перебирает аккаунты.
+    """
+    config = config or {}
+    if config.get("path"):
+        return config["path"]
+
+    return bip44_path(PURPOSES[type(bip_obj)], bip_obj.CoinConf().CoinIndex(), config, change_level)
+
+
+def bip44_path(purpose, coin_idx, config=None, change_level=False):
+    """
+    "m/purpose'/coin'/{аккаунты}'/0/{адреса}" по диапазонам из конфига.
+    """
+    config = config or {}
+    if change_level:
+        accounts = _range_segment(config.get("account_range", config.get("address_range", 0)))
+        return f"m/{purpose}'/{coin_idx}'/{accounts}'/0'"
+
+    accounts = _range_segment(config.get("account_range", 0))
+    addresses = _range_segment(config.get("address_range", 0))
+    return f"m/{purpose}'/{coin_idx}'/{accounts}'/0/{addresses}"
+
+
+def account_xpub(bip_obj, path, cache=None):
+    """
+    Расширенный публичный ключ аккаунта для пути адреса: "m/84'/0'/3'/0/5" -> zpub узла m/84'/0'/3'.
+    Версия ключа (xpub / ypub / zpub) — из конфигурации монеты. None для ed25519:
+    там нет публичной деривации, и наблюдателю xpub бесполезен.
+    """
+    root = bip_obj.Bip32Object()
+    if not root.IsPublicDerivationSupported():
+        return None
+    account_path = "/".join(path.split("/")[:4])
+    if cache is not None and account_path in cache:
+        return cache[account_path]
+    xpub = root.DerivePath(account_path).PublicKey().ToExtended()
+    if cache is not None:
+        cache[account_path] = xpub
+    return xpub
+
+
+def _add_public(keys, node, bip_obj, path, cache):
+    # config["public_keys"]: поля для watch-only файла (см. watchonly.py). Без пути xpub
+    # бесполезен наблюдателю — стандартный путь тоже пишется явно
+    keys.setdefault("path", path)
+    keys["public_key"] = node.PublicKey().RawCompressed().ToHex()
+    xpub = account_xpub(bip_obj, path, cache)
+    if xpub:
+        keys["xpub"] = xpub
+
+
+def derive_keys(bip_obj, config, make_keys, change_level=False):
+    """
+    Общая деривация для модулей на Bip44/49/84/86.
+
+    Без диапазонов — стандартный путь Account(0)...AddressIndex(0), возвращает
+    словарь make_keys(node), как и раньше. С диапазонами — список словарей
+    с полем "path" для каждого адреса.
+    config["public_keys"] = True добавляет "public_key", "xpub" аккаунта и "path" (и для стандартного пути).
+    """
+    # Символ сети модулю неизвестен: bip32 / encode пишутся общими (network="", см. metrics.py)
+    m = metrics.active
+    if m: t0 = time.perf_counter()
+    public = bool(config and config.get("public_keys"))
+
+    if not config or not (has_ranges(config) or config.get("path")):
+        acc_obj = bip_obj.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT)
+        node = acc_obj if change_level else acc_obj.AddressIndex(0)
+        if not m and not public:
+            return make_keys(node)
+        if m:
+            t1 = time.perf_counter()
+            m.observe("bip32", t1 - t0, "")
+        keys = make_keys(node)
+        if public:
+            _add_public(keys, node, bip_obj, bip44_template(bip_obj, None, change_level), None)
+        if m:
+            m.observe("encode", time.perf_counter() - t1, "")
+        return keys
+
+    results = []
+    xpubs = {}
+    for path, node in iter_path_nodes(bip_obj, bip44_template(bip_obj, config, change_level)):
+        if m:
+            t1 = time.perf_counter()
+            m.observe("bip32", t1 - t0, "")
+        keys = make_keys(node)
+        keys["path"] = path
+        if public:
+            _add_public(keys, node, bip_obj, path, xpubs)
+        results.append(keys)
+        if m:
+            t0 = time.perf_counter()
+            m.observe("encode", t0 - t1, "")
+    return results if has_ranges(config) else results[0]
+
+
+# --- ПАКЕТНАЯ ДЕРИВАЦИЯ ---
+
+_HARDENED = Bip32KeyIndex.HardenIndex(0)
+_SECP256K1_ORDER = Secp256k1.Order()
+# Кривые с быстрым путём: ключ HMAC мастер-узла и допускает ли кривая не-hardened уровни
+_BATCH_CURVES = {
+    Bip32Secp256k1: (Bip32Slip10MstKeyGeneratorConst.HMAC_KEY_SECP256K1_BYTES, True),
+    Bip32Slip10Ed25519: (Bip32Slip10MstKeyGeneratorConst.HMAC_KEY_ED25519_BYTES, False),
+}
+
+
+def batch_supported(config):
+    """
+    Есть ли быстрый путь для конфига: стандартный путь с одним адресом (без диапазонов
+    и шаблона "path") и без public_keys — xpub требует отпечатков родителей, которые
+    быстрый путь не считает.
+    """
+    return not config or not (has_ranges(config) or config.get("path") or config.get("public_keys"))
+
+
+def _secp256k1_public(priv_bytes):
+    if _CoincurvePublicKey is not None:
+        return _CoincurvePublicKey.from_secret(priv_bytes).format()
+    return Secp256k1PrivateKey.FromBytes(priv_bytes).PublicKey().RawCompressed().ToBytes()
+
+
+def _derive_raw(seed_bytes, hmac_key, indexes, secp256k1):
+    """
+    (private_key, chain_code) узла по индексам пути или None, если ключ на каком-то
+    уровне недопустим (вероятность ~2^-127 — тогда считает обычный generate()).
+    """
+    digest = hmac.digest(hmac_key, seed_bytes, "sha512")
+    key, chain_code = digest[:32], digest[32:]
+    if secp256k1 and not 0 < int.from_bytes(key, "big") < _SECP256K1_ORDER:
+        return None
+    for index in indexes:
+        if index & _HARDENED:
+            data = b"\x00" + key
+        else:
+            data = _secp256k1_public(key)
+        digest = hmac.digest(chain_code, data + index.to_bytes(4, "big"), "sha512")
+        chain_code = digest[32:]
+        if not secp256k1:
+            key = digest[:32]
+            continue
+        tweak = int.from_bytes(digest[:32], "big")
+        child = (tweak + int.from_bytes(key, "big")) % _SECP256K1_ORDER
+        if tweak >= _SECP256K1_ORDER or not child:
+            return None
+        key = child.to_bytes(32, "big")
+    return key, chain_code
+
+
+def path_nodes_batch(seeds, bip32_cls, template, key_net_ver=None):
+    """
+    Пакетный аналог iter_path_nodes для пути без диапазонов: [(path_str, Bip32) | None]
+    по seed. None — кривая без быстрого пути или недопустимый ключ: такой seed считает
+    обычный generate(). У узлов верные ключи, цепной код, глубина и индекс, но нет
+    отпечатка родителя (для ToExtended() — iter_path_nodes).
+    """
+    curve = _BATCH_CURVES.get(bip32_cls)
+    if curve is None:
+        return [None] * len(seeds)
+    hmac_key, secp256k1 = curve
+
+    levels = parse_path(template)
+    if any(len(indexes) != 1 for indexes, _ in levels):
+        raise ValueError(f"Пакетная деривация — только путь без диапазонов: {template}")
+    # SLIP-10 ed25519 — только hardened, как в iter_path_nodes
+    levels = [(indexes[0], hardened or not secp256k1) for indexes, hardened in levels]
+    path = "m" + "".join(f"/{idx}'" if hardened else f"/{idx}" for idx, hardened in levels)
+    indexes = [Bip32KeyIndex.HardenIndex(idx) if hardened else idx for idx, hardened in levels]
+
+    nodes = []
+    for seed_bytes in seeds:
+        raw = _derive_raw(seed_bytes, hmac_key, indexes, secp256k1)
+        if raw is None:
+            nodes.append(None)
+            continue
+        key_data = Bip32KeyData(chain_code=raw[1], depth=len(indexes), index=indexes[-1] if indexes else 0)
+        nodes.append((path, bip32_cls.FromPrivateKey(raw[0], key_data, key_net_ver)))
+    return nodes
+
+
+def bip44_path_batch(seeds, bip_cls, coin, template):
+    """
+    path_nodes_batch для Bip44/49/84/86: узлы обёрнуты в bip_cls монеты, как в
+    iter_path_nodes (работают PublicKey().ToAddress() и ToWif()).
+    """
+    conf = CONF_GETTERS[bip_cls].GetConfig(coin)
+    nodes = path_nodes_batch(seeds, conf.Bip32Class(), template, conf.KeyNetVersions())
+    return [(node[0], bip_cls(node[1], conf)) if node is not None else None for node in nodes]
+
+
+def derive_keys_batch(seeds, bip_cls, coin, config, make_keys, generate, change_level=False):
+    """
+    generate_batch для модулей на Bip44/49/84/86 — пакетный derive_keys: make_keys(node)
+    для каждого seed. Конфиги без быстрого пути (диапазоны, шаблон, public_keys) и seed,
+    для которых быстрый путь не сработал, считает generate(seed_bytes) — обычный generate модуля.
+    """
+    if not batch_supported(config):
+        return [generate(seed_bytes) for seed_bytes in seeds]
+    m = metrics.active
+    if m: t0 = time.perf_counter()
+    # Стандартный путь derive_keys: Account(0) / Change(0) [/ AddressIndex(0)]
+    coin_idx = CONF_GETTERS[bip_cls].GetConfig(coin).CoinIndex()
+    template = f"m/{PURPOSES[bip_cls]}'/{coin_idx}'/0'/0" + ("" if change_level else "/0")
+    nodes = bip44_path_batch(seeds, bip_cls, coin, template)
+    if m:
+        t1 = time.perf_counter()
+        for _ in seeds:
+            m.observe("bip32", (t1 - t0) / len(seeds), "")
+    results = [make_keys(node[1]) if node is not None else generate(seed_bytes)
+               for seed_bytes, node in zip(seeds, nodes)]
+    if m:
+        t2 = time.perf_counter()
+        for _ in seeds:
+            m.observe("encode", (t2 - t1) / len(seeds), "")
+    return results
@@ -0,0 +1,397 @@
+"""
+Движок генерации кошельков.
+
+Делит `count` кошельков на пачки и раздаёт их пулу процессов. Каждый процесс
+один раз импортирует bip_utils и выбранный модуль из networks/, а затем
+генерирует пачки целиком: у модуля с generate_batch ключи всей пачки
+считаются одним вызовом (см. derive_batch). Результаты возвращаются строго
+в исходном порядке.
+"""
+import os
+import sys
+import time
+import itertools
+from collections import deque
+
+import metrics
+import mnemonics
+from registry import load_plugin, make_caller, make_batch_caller
+
+# Размер пачки по умолчанию ограничен, чтобы прогресс обновлялся плавно
+MAX_CHUNK_SIZE = 256
+
+# Состояние процесса-воркера (заполняется в _init_worker)
+_worker = {}
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _init_worker(targets, words_num, passphrase, pool=False, with_metrics=False):
+    """
+    Инициализация воркера: тяжёлые импорты выполняются один раз на процесс.
+    targets — список (module_name, net_config, coin_symbol).
+    pool=True — процесс пула: собранные метрики возвращаются вместе с пачкой.
+    """
+    from bip_utils import Bip39SeedGenerator
+
+    if pool and with_metrics:
+        metrics.enable()
+
+    _worker.clear()
+    _worker.update({
+        "pool": pool,
+        "symbol": multi_symbol(targets),
+        # Адаптер вызова строится один раз на модуль (см. registry.make_caller)
+        "targets": [(make_caller(load_plugin(module_name), net_config), coin_symbol)
+                    for module_name, net_config, coin_symbol in targets],
+        # Одна сеть — пачка считается одним вызовом generate_batch (см. registry.make_batch_caller);
+        # у нескольких сетей общий мастер-ключ на мнемонику (build_multi_entries)
+        "batch": make_batch_caller(load_plugin(targets[0][0]), targets[0][1]) if len(targets) == 1 else None,
+        # Энтропия читается блоками, мнемоники кодируются пачкой (см. mnemonics.py)
+        "mnemonics": mnemonics.iter_mnemonics(words_num),
+        "seed_gen": Bip39SeedGenerator,
+        "passphrase": passphrase,
+    })
+
+
+def call_generator(caller, seed_bytes, mnemonic, seed_ctx=None, coin_symbol=""):
+    """
+    Вызывает generate() модуля через адаптер. Возвращает ключи или None при ошибке.
+    """
+    m = metrics.active
+    if m: t0 = time.perf_counter()
+    try:
+        w_keys = caller(seed_bytes, mnemonic, seed_ctx)
+    except Exception:
+        return None
+    finally:
+        if m: m.observe("derive", time.perf_counter() - t0, coin_symbol)
+
+    if "error" in w_keys: return None
+    return w_keys
+
+
+def call_batch(batch, seeds, mnemonics, coin_symbol=""):
+    """
+    Вызывает адаптер generate_batch для пачки. Возвращает список ключей (None у seed, для
+    которых модуль вернул ошибку) или None, если упала вся пачка.
+    """
+    m = metrics.active
+    if m: t0 = time.perf_counter()
+    try:
+        results = batch(seeds, mnemonics)
+    except Exception:
+        return None
+    finally:
+        if m and seeds:
+            # Гистограмма derive — по кошелькам: среднее время пачки на каждый
+            per_wallet = (time.perf_counter() - t0) / len(seeds)
+            for _ in seeds:
+                m.observe("derive", per_wallet, coin_symbol)
+
+    if len(results) != len(seeds): return None
+    return [None if w_keys is None or "error" in w_keys else w_keys for w_keys in results]
+
+
+def build_entries(caller, seed_bytes, mnemonic, coin_symbol, passphrase):
+    """
+    Собирает записи кошелька одной сети: обычно одну, а при диапазонах адресов
+    (см. derivation.py) — по записи на адрес. Пустой список, если модуль не смог сгенерировать ключи.
+    """
+    w_keys = call_generator(caller, seed_bytes, mnemonic, coin_symbol=coin_symbol)
+    return keys_to_entries(w_keys, mnemonic, coin_symbol, passphrase)
+
+
+def keys_to_entries(w_keys, mnemonic, coin_symbol, passphrase):
+    """
+    Ключи generate() одной сети -> записи файла. Пустой список, если ключей нет.
+    """
+    if w_keys is None: return []
+
+    entries = []
+    for keys in (w_keys if isinstance(w_keys, list) else [w_keys]):
+        entry = {
+            "network": coin_symbol,
+            "address": keys.get("address"),
+            "private_key": keys.get("private_key"),
+            "mnemonic": mnemonic,
+            "passphrase": passphrase
+        }
+        for k, v in keys.items():
+            if k not in entry: entry[k] = v
+        entries.append(entry)
+    return entries
+
+
+def build_multi_entries(targets, seed_bytes, mnemonic, passphrase):
+    """
+    Одна мнемоника — несколько сетей. Поля каждой сети получают префикс символа:
+    BTC_address, ETH_private_key... Мастер-ключи BIP32 общие для сетей на одной кривой.
+    При диапазонах адресов i-я запись содержит i-й адрес каждой сети.
+    Если хотя бы одна сеть не сгенерировалась, мнемоника пропускается целиком.
+    """
+    from derivation import SeedContext
+    seed_ctx = SeedContext(seed_bytes)
+    per_chain = []
+    for caller, coin_symbol in targets:
+        w_keys = call_generator(caller, seed_bytes, mnemonic, seed_ctx, coin_symbol)
+        if w_keys is None: return []
+        per_chain.append((coin_symbol, w_keys if isinstance(w_keys, list) else [w_keys]))
+
+    entries = []
+    for i in range(max(len(keys_list) for _, keys_list in per_chain)):
+        entry = {
+            "network": multi_symbol(targets),
+            "mnemonic": mnemonic,
+            "passphrase": passphrase
+        }
+        for coin_symbol, keys_list in per_chain:
+            keys = keys_list[i] if i < len(keys_list) else keys_list[-1]
+            for k, v in keys.items():
+                entry[f"{coin_symbol}_{k}"] = v
+        entries.append(entry)
+    return entries
+
+
+def derive_entries(seed_bytes, mnemonic, passphrase):
+    """
+    Записи мнемоники для сетей воркера (см. _init_worker): build_entries или build_multi_entries.
+    """
+    targets = _worker["targets"]
+    if len(targets) > 1:
+        return build_multi_entries(targets, seed_bytes, mnemonic, passphrase)
+    caller, coin_symbol = targets[0]
+    return build_entries(caller, seed_bytes, mnemonic, coin_symbol, passphrase)
+
+
+def derive_batch(items):
+    """
+    Записи для пачки [(seed_bytes, mnemonic, passphrase)] — список записей на каждый item
+    (пустой, если модуль не сгенерировал ключи). Одна сеть — один вызов generate_batch;
+    если пачка упала целиком, она пересчитывается по одному кошельку, как раньше.
+    """
+    w = _worker
+    results = None
+    if w["batch"] is not None and items:
+        coin_symbol = w["targets"][0][1]
+        results = call_batch(w["batch"], [item[0] for item in items], [item[1] for item in items], coin_symbol)
+    if results is None:
+        return [_derive_one(*item) for item in items]
+    return [keys_to_entries(w_keys, mnemonic, coin_symbol, passphrase)
+            for w_keys, (_, mnemonic, passphrase) in zip(results, items)]
+
+
+def _derive_one(seed_bytes, mnemonic, passphrase):
+    try:
+        return derive_entries(seed_bytes, mnemonic, passphrase)
+    except Exception:
+        return []
+
+
+def multi_symbol(targets):
+    return "-".join(target[-1] for target in targets)
+
+
+def _generate_chunk(size):
+    """
+    Генерирует пачку из `size` кошельков в текущем процессе.
+    Возвращает (size, entries, stats) — неудачные кошельки просто пропускаются,
+    stats — снимок метрик воркера пула (или None).
+    """
+    w = _worker
+    m = metrics.active
+    items = []
+    for _ in range(size):
+        try:
+            if m: t0 = time.perf_counter()
+            mnemonic = next(w["mnemonics"])
+            if m:
+                t1 = time.perf_counter()
+                m.observe("mnemonic", t1 - t0, w["symbol"])
+            seed_bytes = w["seed_gen"](mnemonic).Generate(w["passphrase"])
+            if m: m.observe("seed", time.perf_counter() - t1, w["symbol"])
+            items.append((seed_bytes, mnemonic, w["passphrase"]))
+        except Exception:
+            if m: m.count("errors", 1, w["symbol"])
+
+    entries = []
+    for new_entries in derive_batch(items):
+        entries.extend(new_entries)
+        if m: m.count("wallets", len(new_entries), w["symbol"])
+    stats = m.snapshot() if m and w["pool"] else None
+    return size, entries, stats
+
+
+def _import_chunk(items):
+    """
+    Пачка готовых мнемоник [(номер строки, мнемоника, passphrase или None)] в текущем процессе.
+    Возвращает (size, entries, invalid, stats); invalid — [(номер строки, причина)].
+    """
+    w = _worker
+    m = metrics.active
+    entries, invalid, ready, lines = [], [], [], []
+    for line, mnemonic, passphrase in items:
+        problem = mnemonics.check(mnemonic)
+        if problem:
+            invalid.append((line, problem))
+            continue
+        try:
+            if m: t0 = time.perf_counter()
+            passphrase = w["passphrase"] if passphrase is None else passphrase
+            seed_bytes = w["seed_gen"](mnemonic).Generate(passphrase)
+            if m: m.observe("seed", time.perf_counter() - t0, w["symbol"])
+        except Exception as e:
+            invalid.append((line, str(e) or type(e).__name__))
+            if m: m.count("errors", 1, w["symbol"])
+            continue
+        ready.append((seed_bytes, mnemonic, passphrase))
+        lines.append(line)
+
+    for line, new_entries in zip(lines, derive_batch(ready)):
+        if not new_entries:
+            invalid.append((line, "Модуль сети не сгенерировал ключи"))
+            if m: m.count("errors", 1, w["symbol"])
+            continue
+        entries.extend(new_entries)
+        if m: m.count("wallets", len(new_entries), w["symbol"])
+    invalid.sort()
+    stats = m.snapshot() if m and w["pool"] else None
+    return len(items), entries, invalid, stats
+
+
+def ordered_map(func, items, init_args, workers, max_inflight=None):
+    """
+    func(*item) для каждого item в пуле из workers процессов (initializer=_init_worker,
+    init_args — его аргументы без pool). Результаты — строго в исходном порядке; в работе
+    не больше max_inflight задач (по умолчанию 2 на процесс): если потребитель отстаёт,
+    новые задачи не отправляются и готовые результаты не копятся в памяти.
+    """
+    # multiprocessing — только при workers > 1, а не при импорте
+    from concurrent.futures import ProcessPoolExecutor
+    items = iter(items)
+    max_inflight = max_inflight or workers * 2
+    init_args = (*init_args, True, metrics.active is not None)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as executor:
+        pending = deque(executor.submit(func, *item) for item in itertools.islice(items, max_inflight))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                item = next(items, None)
+                if item is not None:
+                    pending.append(executor.submit(func, *item))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def split_chunks(count, workers, chunk_size=None):
+    if not chunk_size:
+        # ~4 пачки на воркер дают ровную загрузку без лишних накладных расходов
+        chunk_size = max(1, min(MAX_CHUNK_SIZE, count // (max(workers, 1) * 4)))
+    full, rest = divmod(count, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def generate_wallets(module_name, net_config, coin_symbol, count, words_num, passphrase="",
+                     workers=1, chunk_size=None):
+    """
+    Генерирует `count` кошельков сети из модуля `module_name` (например, "networks.btc").
+
+    Отдаёт кортежи (size, entries) по мере готовности в исходном порядке пачек:
+    size — сколько мнемоник было в пачке (для прогресс-бара), entries — готовые записи
+    (при диапазонах адресов записей на мнемонику несколько).
+    При workers <= 1 всё выполняется в текущем процессе без пула.
+    """
+    return generate_multi_wallets([(module_name, net_config, coin_symbol)], count, words_num, passphrase,
+                                  workers, chunk_size)
+
+
+def generate_multi_wallets(targets, count, words_num, passphrase="", workers=1, chunk_size=None, max_inflight=None):
+    """
+    То же, что generate_wallets, но для списка сетей targets = [(module_name, net_config, coin_symbol), ...].
+    Мнемоника и seed считаются один раз и идут во все сети; при нескольких сетях
+    каждая запись содержит адреса и ключи всех сетей (см. build_multi_entries).
+    max_inflight — сколько пачек одновременно в работе у пула (по умолчанию 2 на процесс).
+    """
+    chunks = split_chunks(count, workers, chunk_size)
+    targets = list(targets)
+
+    if workers <= 1:
+        _init_worker(targets, words_num, passphrase)
+        for size in chunks:
+            size, entries, _ = _generate_chunk(size)
+            yield size, entries
+        return
+
+    init_args = (targets, words_num, passphrase)
+    results = ordered_map(_generate_chunk, ((size,) for size in chunks), init_args, workers, max_inflight)
+    for size, entries, stats in _with_metrics(results):
+        yield size, entries
+
+
+def _with_metrics(results):
+    # Метрики воркеров пула приезжают вместе с пачками — сливаем их в метрики процесса
+    for *result, stats in results:
+        if stats and metrics.active:
+            metrics.active.merge(stats)
+        yield (*result, stats)
+
+
+def import_mnemonics(targets, items, passphrase="", workers=1, batch_size=MAX_CHUNK_SIZE, max_inflight=None):
+    """
+    Ключи для готовых мнемоник. items — поток (номер строки, мнемоника, passphrase или None —
+    тогда общая passphrase), например mnemonics.read_source(). Мнемоники проверяются
+    (контрольная сумма BIP39) и выводятся в пуле процессов пачками по batch_size.
+    Отдаёт (size, entries, invalid) в исходном порядке: size — мнемоник в пачке,
+    invalid — [(номер строки, причина)]. Поток читается по мере обработки, память не растёт.
+    """
+    items = iter(items)
+    batches = iter(lambda: list(itertools.islice(items, batch_size)), [])
+    init_args = (list(targets), 12, passphrase)
+
+    if workers <= 1:
+        _init_worker(*init_args)
+        for batch in batches:
+            size, entries, invalid, _ = _import_chunk(batch)
+            yield size, entries, invalid
+        return
+
+    results = ordered_map(_import_chunk, ((batch,) for batch in batches), init_args, workers, max_inflight)
+    for size, entries, invalid, _ in _with_metrics(results):
+        yield size, entries, invalid
+
+
+# --- ЗАМЕР МАСШТАБИРУЕМОСТИ ---
+
+def measure_scaling(module_name, count, worker_counts, words_num=12, net_config=None):
+    """
+    Прогоняет одну и ту же генерацию на разном числе процессов.
+    Возвращает список (workers, seconds, wallets_per_sec, speedup).
+    """
+    results = []
+    base_rate = None
+    for workers in worker_counts:
+        started = time.perf_counter()
+        total = 0
+        for _, entries in generate_wallets(module_name, net_config or {}, "BENCH", count, words_num,
+                                           workers=workers):
+            total += len(entries)
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0.0
+        base_rate = base_rate or rate
+        results.append((workers, elapsed, rate, rate / base_rate if base_rate else 0.0))
+    return results
+
+
+if __name__ == "__main__":
+    # python engine.py networks.evm 2000 1,2,4,8
+    module_arg = sys.argv[1] if len(sys.argv) > 1 else "networks.evm"
+    count_arg = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    workers_arg = [int(x) for x in sys.argv[3].split(",")] if len(sys.argv) > 3 else [1, default_workers()]
+
+    print(f"{'workers':>8} {'seconds':>10} {'wallets/s':>12} {'speedup':>8}")
+    for w, sec, rate, speedup in measure_scaling(module_arg, count_arg, workers_arg):
+        print(f"{w:>8} {sec:>10.2f} {rate:>12.1f} {speedup:>7.2f}x")
@@ -0,0 +1,134 @@
+"""
+Массовая расшифровка и экспорт .enc файлов в один CSV или JSONL.
+
+Каждый файл (scrypt + AES-GCM) обрабатывается отдельным процессом пула и
+потоково пишется во временный JSONL рядом с результатом, поэтому память не
+зависит ни от числа файлов, ни от их размера. Затем части склеиваются в
+порядке файлов; у каждой записи есть колонка source_file. Ошибка одного
+файла (неверный пароль, обрезка) попадает в отчёт и не прерывает остальные.
+
+    python cli.py export "wallets_encrypted/*BTC*.enc" --output all.csv --password-env KF_PASS
+"""
+import os
+import csv
+import glob
+import json
+import time
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import core
+
+FORMATS = ("csv", "jsonl")
+
+
+def find_files(patterns=None):
+    """
+    .enc файлы по glob-шаблонам (по умолчанию — все в wallets_encrypted/), без повторов.
+    """
+    patterns = patterns or [os.path.join(core.ENC_DIR, "*.enc")]
+    seen, files = set(), []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            key = os.path.abspath(path)
+            if key not in seen and os.path.isfile(path):
+                seen.add(key)
+                files.append(path)
+    return files
+
+
+def _export_part(path, password, part_path):
+    """
+    Воркер: расшифровывает один файл в JSONL-часть. Возвращает отчёт по файлу.
+    """
+    started = time.perf_counter()
+    source = os.path.basename(path)
+    fields = {}
+    records = 0
+    try:
+        with open(part_path, "w", encoding="utf-8") as out:
+            for record in core.iter_records(path, password):
+                for key in record:
+                    fields.setdefault(key, None)
+                out.write(json.dumps({"source_file": source, **record}, ensure_ascii=False))
+                out.write("\n")
+                records += 1
+    except Exception as e:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return {"file": path, "status": "error", "error": str(e) or type(e).__name__}
+    return {"file": path, "status": "ok", "records": records, "fields": list(fields),
+            "seconds": round(time.perf_counter() - started, 4), "part": part_path}
+
+
+def _public(result):
+    return {k: v for k, v in result.items() if k not in ("part", "fields")}
+
+
+def _merge(results, output, fmt):
+    if fmt == "jsonl":
+        with open(output, "w", encoding="utf-8") as out:
+            for r in results:
+                with open(r["part"], "r", encoding="utf-8") as part:
+                    shutil.copyfileobj(part, out)
+        return
+
+    # Заголовок CSV — объединение полей всех файлов в порядке появления
+    fieldnames = {"source_file": None}
+    for r in results:
+        for key in r["fields"]:
+            fieldnames.setdefault(key, None)
+    with open(output, "w", newline="", encoding="utf-8") as out:
+        writer = csv.DictWriter(out, fieldnames=list(fieldnames), restval="")
+        writer.writeheader()
+        for r in results:
+            with open(r["part"], "r", encoding="utf-8") as part:
+                for line in part:
+                    writer.writerow(json.loads(line))
+
+
+def export_files(paths, password, output, fmt=None, workers=1, on_file=None):
+    """
+    Расшифровывает `paths` и пишет все записи в `output` (csv или jsonl, по умолчанию — по расширению).
+    password — пароль или открытый vault.Vault. on_file(result) вызывается по мере готовности файлов.
+    Возвращает сводку {"files", "failed", "records", "seconds", "output"}.
+    """
+    fmt = fmt or ("jsonl" if output.endswith((".jsonl", ".json")) else "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt}")
+
+    started = time.perf_counter()
+    password = core.session_secret(password)
+    out_dir = os.path.dirname(output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    # Части лежат рядом с результатом (на том же диске) и удаляются в конце
+    parts_dir = tempfile.mkdtemp(prefix=".export_", dir=out_dir or ".")
+    jobs = [(path, password, os.path.join(parts_dir, f"{i}.jsonl")) for i, path in enumerate(paths)]
+
+    results = [None] * len(jobs)
+    try:
+        if workers <= 1 or len(jobs) <= 1:
+            for i, job in enumerate(jobs):
+                results[i] = _export_part(*job)
+                if on_file: on_file(_public(results[i]))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+                futures = {executor.submit(_export_part, *job): i for i, job in enumerate(jobs)}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    if on_file: on_file(_public(results[futures[future]]))
+
+        ok = [r for r in results if r["status"] == "ok"]
+        _merge(ok, output, fmt)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    return {
+        "files": len(results),
+        "failed": len(results) - len(ok),
+        "records": sum(r["records"] for r in ok),
+        "seconds": round(time.perf_counter() - started, 4),
+        "output": output,
+    }
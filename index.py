@@ -0,0 +1,305 @@
+"""
+Адресный индекс по всем .enc файлам.
+
+SQLite-база data/address_index.sqlite: адрес -> сеть, метка, файл, номер и
+смещение кадра контейнера, позиция записи в пачке. Поиск адреса идёт по
+индексу за миллисекунды, а для показа записи расшифровывается только один
+кадр (см. core.read_record_at) — вместо scrypt и полной расшифровки каждого
+файла по очереди.
+
+Индекс пополняется при записи (core.open_writer). В нём нет мнемоник и
+ключей — только адреса и расположение записей. Это кэш: если файл
+изменили в обход Key Forge, verify покажет его как устаревший, а
+build / rebuild пересчитают.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import tempfile
+
+import core
+
+INDEX_FILE = os.path.join("data", "address_index.sqlite")
+# Строк индекса в памяти при записи одного файла, остальные — во временном файле
+SPILL_ROWS = 100_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    network TEXT,
+    tag TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    records INTEGER,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS addresses (
+    address TEXT NOT NULL,
+    network TEXT,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    chunk INTEGER,
+    offset INTEGER,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS addresses_address ON addresses(address);
+CREATE INDEX IF NOT EXISTS addresses_file ON addresses(file_id);
+"""
+
+_FILENAME_RE = re.compile(r"^wallets_(.+)_\d{8}_\d{6}\.enc$")
+
+
+def connect(path=None):
+    path = path or INDEX_FILE
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA foreign_keys = ON")
+    db.executescript(SCHEMA)
+    return db
+
+
+def normalize(address):
+    # EVM-адреса с контрольной суммой сравниваем без учёта регистра, остальные — как есть
+    address = address.strip()
+    return address.lower() if address[:2].lower() == "0x" else address
+
+
+def record_addresses(record):
+    """
+    Адреса записи: (address, network). В мульти-режиме — по одному на сеть (BTC_address...).
+    """
+    if record.get("address"):
+        yield record["address"], record.get("network", "")
+    for key, value in record.items():
+        if key.endswith("_address") and value:
+            yield value, key[:-len("_address")]
+
+
+def file_tag(filepath, network):
+    """
+    Метка из имени wallets_{SYMBOL}{_метка}_{дата}.enc (см. core.make_filename).
+    """
+    match = _FILENAME_RE.match(os.path.basename(filepath))
+    if not match or not network or not match.group(1).startswith(network):
+        return ""
+    return match.group(1)[len(network):].lstrip("_")
+
+
+def _file_key(filepath):
+    return os.path.abspath(filepath)
+
+
+def _stat(filepath):
+    st = os.stat(filepath)
+    return st.st_size, st.st_mtime_ns
+
+
+# --- ЗАПИСЬ ---
+
+class Collector:
+    """
+    Собирает строки индекса по мере записи файла (ContainerWriter.on_chunk).
+    Больше SPILL_ROWS строк в памяти не держит — остальное во временном файле.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.network = ""
+        self.records = 0
+        self._spill = None
+
+    def on_chunk(self, chunk_index, offset, records):
+        for position, record in enumerate(records):
+            self.add(record, chunk_index, offset, position)
+
+    def add(self, record, chunk_index, offset, position):
+        if not self.network:
+            self.network = record.get("network", "")
+        for address, network in record_addresses(record):
+            self.rows.append((normalize(address), network, chunk_index, offset, position))
+        self.records += 1
+        if len(self.rows) >= SPILL_ROWS:
+            if self._spill is None:
+                self._spill = tempfile.TemporaryFile("w+", encoding="utf-8")
+            self._spill.writelines(json.dumps(row) + "\n" for row in self.rows)
+            self.rows.clear()
+
+    def iter_rows(self):
+        if self._spill is not None:
+            self._spill.seek(0)
+            for line in self._spill:
+                yield tuple(json.loads(line))
+        yield from self.rows
+
+
+def store(filepath, collector, tag=None, append=False, db=None):
+    """
+    Сохраняет строки файла. append=True добавляет к уже проиндексированным
+    (дозапись), иначе прежние строки файла заменяются.
+    """
+    own = db is None
+    db = db or connect()
+    try:
+        key = _file_key(filepath)
+        size, mtime_ns = _stat(filepath)
+        if tag is None:
+            tag = file_tag(filepath, collector.network)
+        with db:
+            row = db.execute("SELECT id, records FROM files WHERE path = ?", (key,)).fetchone()
+            if row and not append:
+                db.execute("DELETE FROM files WHERE id = ?", (row[0],))
+                row = None
+            if row:
+                file_id = row[0]
+                db.execute("UPDATE files SET size = ?, mtime_ns = ?, records = ?, indexed_at = ? WHERE id = ?",
+                           (size, mtime_ns, row[1] + collector.records, time.time(), file_id))
+            else:
+                file_id = db.execute(
+                    "INSERT INTO files (path, network, tag, size, mtime_ns, records, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, collector.network, tag, size, mtime_ns, collector.records, time.time())
+                ).lastrowid
+            db.executemany(
+                "INSERT INTO addresses (address, network, file_id, chunk, offset, position) VALUES (?, ?, ?, ?, ?, ?)",
+                ((address, network, file_id, chunk, offset, pos) for address, network, chunk, offset, pos in collector.iter_rows())
+            )
+    finally:
+        if own:
+            db.close()
+
+
+def is_fresh(filepath, db=None):
+    """
+    True, если файл проиндексирован и не менялся после этого.
+    """
+    own = db is None
+    db = db or connect()
+    try:
+        row = db.execute("SELECT size, mtime_ns FROM files WHERE path = ?", (_file_key(filepath),)).fetchone()
+        return bool(row) and os.path.exists(filepath) and tuple(row) == _stat(filepath)
+    finally:
+        if own:
+            db.close()
+
+
+def index_file(filepath, password, db=None):
+    """
+    Расшифровывает файл целиком и (пере)индексирует его. Бросает исключение при неверном пароле.
+    """
+    collector = Collector()
+    for chunk_index, offset, position, record in core.iter_located_records(filepath, password):
+        collector.add(record, chunk_index, offset, position)
+    store(filepath, collector, db=db)
+    return collector.records
+
+
+def enc_files(folder=None):
+    folder = folder or core.ENC_DIR
+    if not os.path.isdir(folder):
+        return []
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".enc"))
+
+
+def build(paths, password, force=False):
+    """
+    Индексирует файлы, которых нет в индексе или которые изменились (force=True — все).
+    Отдаёт по файлу словарь {"file", "status", ...}: indexed / fresh / error.
+    """
+    db = connect()
+    try:
+        for path in paths:
+            if not force and is_fresh(path, db):
+                yield {"file": path, "status": "fresh"}
+                continue
+            started = time.perf_counter()
+            try:
+                records = index_file(path, password, db)
+            except Exception as e:
+                yield {"file": path, "status": "error", "error": str(e) or type(e).__name__}
+                continue
+            yield {"file": path, "status": "indexed", "records": records,
+                   "seconds": round(time.perf_counter() - started, 4)}
+    finally:
+        db.close()
+
+
+def clear():
+    db = connect()
+    try:
+        with db:
+            db.execute("DELETE FROM addresses")
+            db.execute("DELETE FROM files")
+    finally:
+        db.close()
+
+
+# --- ПОИСК И ПРОВЕРКА ---
+
+def lookup(address):
+    """
+    Все вхождения адреса: список словарей с файлом, сетью, меткой и позицией записи.
+    """
+    db = connect()
+    try:
+        rows = db.execute(
+            "SELECT a.address, a.network, f.path, f.tag, a.chunk, a.offset, a.position "
+            "FROM addresses a JOIN files f ON f.id = a.file_id WHERE a.address = ?",
+            (normalize(address),)
+        ).fetchall()
+    finally:
+        db.close()
+    keys = ("address", "network", "file", "tag", "chunk", "offset", "position")
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def fetch(match, password):
+    """
+    Расшифровывает только запись из результата lookup().
+    """
+    return core.read_record_at(match["file"], password, match["chunk"], match["offset"], match["position"])
+
+
+def verify(password=None, folder=None):
+    """
+    Сверяет индекс с диском. Отдаёт {"file", "status"}:
+      ok — не менялся; stale — изменён после индексации; missing — удалён;
+      unindexed — .enc файл в папке, которого нет в индексе.
+    С паролем дополнительно расшифровывает файлы и сверяет сами адреса (mismatch).
+    """
+    db = connect()
+    try:
+        known = {}
+        for file_id, path in db.execute("SELECT id, path FROM files ORDER BY path").fetchall():
+            known[path] = file_id
+            if not os.path.exists(path):
+                yield {"file": path, "status": "missing"}
+            elif not is_fresh(path, db):
+                yield {"file": path, "status": "stale"}
+            elif password is None:
+                yield {"file": path, "status": "ok"}
+            else:
+                yield {"file": path, **_deep_check(db, file_id, path, password)}
+
+        for path in enc_files(folder):
+            if _file_key(path) not in known:
+                yield {"file": _file_key(path), "status": "unindexed"}
+    finally:
+        db.close()
+
+
+def _deep_check(db, file_id, path, password):
+    indexed = sorted(db.execute(
+        "SELECT address, network, chunk, offset, position FROM addresses WHERE file_id = ?", (file_id,)
+    ).fetchall(), key=repr)
+    collector = Collector()
+    try:
+        for chunk_index, offset, position, record in core.iter_located_records(path, password):
+            collector.add(record, chunk_index, offset, position)
+    except Exception as e:
+        return {"status": "error", "error": str(e) or type(e).__name__}
+    if sorted(collector.iter_rows(), key=repr) != indexed:
+        return {"status": "mismatch"}
+    return {"status": "ok", "records": collector.records}
@@ -1,132 +1,94 @@
 import os
 import time
-import json
-import importlib
-import pkgutil
-import inspect
-from datetime import datetime
+import itertools
+import importlib.util
 import questionary
-from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
 
 # Импортируем наш новый менеджер стилей
 import ui_manager
 from ui_manager import console, print_banner, print_success, print_error, print_info
 
-# Библиотеки ядра
-from bip_utils import Bip39MnemonicGenerator, Bip39SeedGenerator, Bip39WordsNum
-from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from cryptography.hazmat.backends import default_backend
+# Ядро (без интерфейса)
+import core
+import engine
+import metrics
+import registry
+from core import ENC_DIR, CSV_DIR, load_networks, derive_key, encrypt_data, decrypt_data
 
-# Подключение скрипта добавления сетей
-try:
-    import add_network
-except ImportError:
-    add_network = None
+# Скрипт добавления сетей импортируется при выборе пункта меню (он тянет bip_utils)
+HAS_WIZARD = importlib.util.find_spec("add_network") is not None
 
-# --- CONSTANTS ---
-ENC_DIR = "wallets_encrypted"
-CSV_DIR = "wallets_decrypted"
 
-for folder in [ENC_DIR, CSV_DIR]:
-    if not os.path.exists(folder):
-        os.makedirs(folder)
+# --- MAIN LOGIC ---
 
-
-# --- 1. CORE FUNCTIONS ---
-
-def load_networks():
-    networks = {}
-    package_name = 'networks'
-    if not os.path.isdir(package_name):
-        os.makedirs(package_name)
-        with open(os.path.join(package_name, '__init__.py'), 'w') as f: pass
-        return {}
-
-    for _, module_name, _ in pkgutil.iter_modules([package_name]):
-        try:
-            module = importlib.import_module(f"{package_name}.{module_name}")
-            if hasattr(module, 'NetworkGenerator'):
-                networks[module.NetworkGenerator.NAME] = module.NetworkGenerator
-        except Exception as e:
-            pass
-    return networks
-
-
-def derive_key(password: str, salt: bytes) -> bytes:
-    kdf = Scrypt(salt=salt, length=32, n=2 ** 14, r=8, p=1, backend=default_backend())
-    return kdf.derive(password.encode())
-
-
-def encrypt_data(data_list, password):
-    json_str = json.dumps(data_list)
-    salt = os.urandom(16)
-    key = derive_key(password, salt)
-    aesgcm = AESGCM(key)
-    nonce = os.urandom(12)
-    ciphertext = aesgcm.encrypt(nonce, json_str.encode(), None)
-    return salt + nonce + ciphertext
-
-
-def decrypt_data(filepath, password):
-    try:
-        with open(filepath, 'rb') as f:
-            file_bytes = f.read()
-        salt = file_bytes[:16]
-        nonce = file_bytes[16:28]
-        ciphertext = file_bytes[28:]
-        key = derive_key(password, salt)
-        aesgcm = AESGCM(key)
-        return json.loads(aesgcm.decrypt(nonce, ciphertext, None).decode())
-    except Exception:
-        return None
-
-
-# --- 2. MAIN LOGIC ---
-
-def run_generator():
-    # A. Выбор сети
-    importlib.invalidate_caches()
-    networks = load_networks()
+def run_generator(multi=False):
+    """
+    multi=True — одна мнемоника для нескольких сетей (seed считается один раз).
+    """
+    from rich.table import Table
+    from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn
+    # A. Выбор сети (по манифесту, без импорта модулей)
+    networks = registry.scan()
 
     if not networks:
         print_error("Нет доступных сетей!")
         return
 
-    net_name = questionary.select(
-        "Выберите сеть:",
-        choices=list(networks.keys()),
-        style=ui_manager.custom_style
-    ).ask()
+    if multi:
+        net_names = questionary.checkbox(
+            "Выберите сети (пробел — отметить):",
+            choices=list(networks.keys()),
+            style=ui_manager.custom_style
+        ).ask()
+    else:
+        net_name = questionary.select(
+            "Выберите сеть:",
+            choices=list(networks.keys()),
+            style=ui_manager.custom_style
+        ).ask()
+        net_names = [net_name] if net_name else None
 
-    if not net_name: return
+    if not net_names: return
 
-    GeneratorClass = networks[net_name]
-    coin_symbol = GeneratorClass.SYMBOL
-    net_config = {}
+    # B. Настройка каждой выбранной сети
+    targets = []
+    for net_name in net_names:
+        GeneratorClass = registry.load_plugin(networks[net_name]["module"])
+        net_config = {}
 
-    # B. Настройка конкретной сети
-    if hasattr(GeneratorClass, "configure"):
-        try:
-            print_info(f"Настройка параметров {net_name}...")
-            net_config = GeneratorClass.configure()
-            if net_config is None: return
+        if hasattr(GeneratorClass, "configure"):
+            try:
+                print_info(f"Настройка параметров {net_name}...")
+                net_config = GeneratorClass.configure()
+                if net_config is None: return
 
-            if "symbol" in net_config: coin_symbol = net_config["symbol"]
-            if "symbol_suffix" in net_config: coin_symbol += net_config["symbol_suffix"]
+            except Exception as e:
+                print_error(f"Ошибка настройки модуля: {e}")
+                return
 
-        except Exception as e:
-            print_error(f"Ошибка настройки модуля: {e}")
-            return
+        targets.append((GeneratorClass.__module__, net_config, core.resolve_symbol(GeneratorClass, net_config)))
+
+    coin_symbol = engine.multi_symbol(targets)
 
     # C. Общие настройки
     console.print()
-    count_str = questionary.text("Количество кошельков:", default="10", validate=lambda x: x.isdigit(),
+    count_str = questionary.text("Количество кошельков (мнемоник):", default="10", validate=lambda x: x.isdigit(),
                                  style=ui_manager.custom_style).ask()
     if not count_str: return
     count = int(count_str)
 
+    addr_str = questionary.text("Адресов на мнемонику:", default="1", validate=lambda x: x.isdigit() and int(x) > 0,
+                                style=ui_manager.custom_style).ask()
+    if not addr_str: return
+    acc_str = questionary.text("Аккаунтов на мнемонику:", default="1", validate=lambda x: x.isdigit() and int(x) > 0,
+                               style=ui_manager.custom_style).ask()
+    if not acc_str: return
+
+    # Диапазоны деривируются от одного seed (см. derivation.py): без лишних PBKDF2 и FromSeed
+    for _, net_config, _ in targets:
+        if int(addr_str) > 1: net_config["address_range"] = f"0..{int(addr_str) - 1}"
+        if int(acc_str) > 1: net_config["account_range"] = f"0..{int(acc_str) - 1}"
+
     words_num = int(
         questionary.select("Длина мнемоники:", choices=["12", "15", "18", "24"], style=ui_manager.custom_style).ask())
 
@@ -137,110 +99,104 @@ def run_generator():
     save_pass = questionary.password("Пароль для шифрования файла:", style=ui_manager.custom_style).ask()
     if not save_pass: return
 
-    # D. Процесс генерации
-    wallets_data = []
-
-    with Progress(
-            SpinnerColumn(),
-            TextColumn("[bold green]{task.description}"),
-            BarColumn(),
-            TextColumn("{task.percentage:>3.0f}%"),
-            console=console
-    ) as progress:
-        task = progress.add_task(f"Генерация {coin_symbol}...", total=count)
-
-        bip_words_enum = \
-            {12: Bip39WordsNum.WORDS_NUM_12, 15: Bip39WordsNum.WORDS_NUM_15, 18: Bip39WordsNum.WORDS_NUM_18,
-             24: Bip39WordsNum.WORDS_NUM_24}[words_num]
-
-        for _ in range(count):
-            try:
-                # 1. ГЕНЕРАЦИЯ МНЕМОНИКИ
-                mnemonic = Bip39MnemonicGenerator().FromWordsNumber(bip_words_enum)
-                seed_bytes = Bip39SeedGenerator(mnemonic).Generate(passphrase)
-
-                # 2. ПОЛУЧЕНИЕ КЛЮЧЕЙ (Dynamic argument inspection)
-                w_keys = {}
-                try:
-                    # Get the function signature
-                    sig = inspect.signature(GeneratorClass.generate)
-
-                    # Prepare arguments based on what the function accepts
-                    call_args = {'seed_bytes': seed_bytes}
-
-                    # Add config if the function accepts it
-                    if 'config' in sig.parameters:
-                        call_args['config'] = net_config
-
-                    # Add mnemonic if the function accepts it
-                    if 'mnemonic' in sig.parameters:
-                        call_args['mnemonic'] = str(mnemonic)
-
-                    # Call the function with the appropriate arguments
-                    w_keys = GeneratorClass.generate(**call_args)
-                except Exception as e:
-                    # If there's an error in key generation, skip to the next iteration
-                    continue
-
-                if "error" in w_keys: continue
-
-                # 3. СОХРАНЕНИЕ
-                entry = {
-                    "network": coin_symbol,
-                    "address": w_keys.get("address"),
-                    "private_key": w_keys.get("private_key"),
-                    "mnemonic": str(mnemonic),
-                    "passphrase": passphrase
-                }
-                for k, v in w_keys.items():
-                    if k not in entry: entry[k] = v
-
-                wallets_data.append(entry)
-                progress.advance(task)
-            except Exception as e:
-                pass
-
-    if not wallets_data:
-        print_error("Сбой генерации.")
-        return
+    # Хранилище ключей: scrypt один раз за сессию, ключ файла — через HKDF (vault.py)
+    import vault
+    if vault.exists() and questionary.confirm("Шифровать ключом хранилища (vault)?", default=True,
+                                              style=ui_manager.custom_style).ask():
+        try:
+            save_pass = vault.unlock(save_pass)
+        except vault.VaultError as e:
+            print_error(str(e))
+            return
 
-    # E. Preview
-    console.print("\n[bold]🔍 Предпросмотр (Первый кошелек):[/bold]")
-    preview_table = Table(show_header=True, header_style="bold magenta")
-    preview_table.add_column("Address", style="green")
-    preview_table.add_column("Mnemonic (Partial)", style="dim")
+    # Watch-only: адреса, пути, публичные ключи и xpub без секретов — для мониторинга балансов
+    watch = questionary.confirm("Сохранить watch-only файл (адреса и xpub без ключей)?", default=False,
+                                style=ui_manager.custom_style).ask()
+    if watch:
+        for _, net_config, _ in targets:
+            net_config["public_keys"] = True
 
-    mnem_preview = wallets_data[0]["mnemonic"].split()[:3]
-    preview_table.add_row(wallets_data[0]["address"], " ".join(mnem_preview) + " ...")
-    console.print(preview_table)
+    workers_str = questionary.text("Количество процессов (ядер CPU):", default=str(engine.default_workers()),
+                                   validate=lambda x: x.isdigit() and int(x) > 0,
+                                   style=ui_manager.custom_style).ask()
+    if not workers_str: return
+    workers = int(workers_str)
 
-    # F. Сохранение
-    console.print()
+    # D. Имя файла и метка — до генерации: записи идут в файл по мере готовности
     file_tag = questionary.text(
         "Добавить метку к файлу? (Enter - пропустить):",
         style=ui_manager.custom_style
     ).ask()
 
-    if file_tag:
-        clean_tag = "".join(c for c in file_tag if c.isalnum() or c in ('-', '_'))
-        if clean_tag:
-            file_tag = f"_{clean_tag}"
-        else:
-            file_tag = ""
-    else:
-        file_tag = ""
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"wallets_{coin_symbol}{file_tag}_{timestamp}.enc"
+    filename = core.make_filename(coin_symbol, file_tag)
     full_path = os.path.join(ENC_DIR, filename)
 
-    with open(full_path, "wb") as f:
-        f.write(encrypt_data(wallets_data, save_pass))
+    # KEYFORGE_METRICS=путь — сохранить задержки этапов (.prom — Prometheus, иначе JSON)
+    metrics_path = os.environ.get("KEYFORGE_METRICS")
+    if metrics_path:
+        metrics.enable()
+
+    def show_preview(first):
+        # E. Preview — как только готова первая запись
+        preview_table = Table(title="🔍 Предпросмотр (Первый кошелек)", show_header=True, header_style="bold magenta")
+        preview_table.add_column("Address", style="green")
+        preview_table.add_column("Mnemonic (Partial)", style="dim")
+
+        # В мульти-режиме адресов несколько (BTC_address, ETH_address...) — показываем первый
+        address = first.get("address") or next(v for k, v in first.items() if k.endswith("_address"))
+        mnem_preview = first["mnemonic"].split()[:3]
+        preview_table.add_row(address, " ".join(mnem_preview) + " ...")
+        progress.console.print(preview_table)
+
+    # F. Генерация -> шифрование -> запись одним конвейером (pipeline.py)
+    import pipeline
+    with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold green]{task.description}"),
+            BarColumn(),
+            TextColumn("{task.percentage:>3.0f}%"),
+            ui_manager.RateColumn(),
+            TimeRemainingColumn(),
+            console=ui_manager.get_console()
+    ) as progress:
+        task = progress.add_task(f"Генерация {coin_symbol}...", total=count)
+        try:
+            saved = pipeline.generate_to_file(targets, count, words_num, full_path, save_pass, passphrase,
+                                              workers=workers, tag=file_tag, watch=watch, on_first=show_preview,
+                                              on_progress=lambda size, _: progress.advance(task, size))
+        except Exception as e:
+            saved = 0
+            import dedup
+            if isinstance(e, dedup.DuplicateAddressError):
+                ui_manager.print_alert("ДУБЛИКАТ АДРЕСА",
+                                       f"{e.address}\n\nуже есть: {dedup.describe(e.first)}"
+                                       f"\nповтор:   {dedup.describe(e.second)}\n\n"
+                                       "Генерация остановлена. Не используйте эти кошельки и проверьте источник энтропии.")
+            else:
+                print_error(f"Ошибка генерации: {e}")
+
+    if not saved:
+        if metrics_path: metrics.disable()
+        if os.path.exists(pipeline.state_path(full_path)):
+            print_info("Записанная часть сохранена: «⏯ Продолжить генерацию» в меню")
+        elif os.path.exists(full_path):
+            os.remove(full_path)
+        print_error("Сбой генерации.")
+        return
 
-    print_success(f"Сохранено {len(wallets_data)} шт.")
+    print_success(f"Сохранено {saved} шт.")
     console.print(f"📂 Путь: [underline]{full_path}[/underline]")
+    if watch:
+        import watchonly
+        console.print(f"👁  Watch-only: [underline]{watchonly.watch_path(full_path)}[/underline]")
+    if metrics_path:
+        metrics.disable().write(metrics_path)
+        print_info(f"Метрики этапов: {metrics_path}")
     input("\nНажмите Enter в меню...")
+
+
 def run_decryptor():
+    from rich.table import Table
     if not os.path.exists(ENC_DIR):
         print_error(f"Папка {ENC_DIR} не найдена!")
         return
@@ -256,9 +212,15 @@ def run_decryptor():
     pwd = questionary.password("Пароль от файла:", style=ui_manager.custom_style).ask()
 
     filepath = os.path.join(ENC_DIR, filename)
-    data = decrypt_data(filepath, pwd)
 
-    if data:
+    # Записи читаются потоково: в памяти только текущая пачка файла
+    records = core.iter_records(filepath, pwd)
+    try:
+        first = next(records)
+    except Exception:
+        first = None
+
+    if first:
         print_success("Успешно расшифровано!")
 
         act = questionary.select(
@@ -267,30 +229,37 @@ def run_decryptor():
             style=ui_manager.custom_style
         ).ask()
 
-        if "Показать" in act:
-            table = Table(title=filename, style="magenta")
-            if len(data) > 0:
+        try:
+            if "Показать" in act:
+                table = Table(title=filename, style="magenta")
                 # Добавляем колонки динамически
-                for k in data[0].keys():
+                columns = list(first.keys())
+                for k in columns:
                     table.add_column(k, overflow="fold")
                 # Добавляем строки (ограничим вывод 20 строками)
-                for row in data[:20]:
-                    table.add_row(*[str(row.get(k, "")) for k in data[0].keys()])
-
-            console.print(table)
-            if len(data) > 20:
-                print_info(f"... и еще {len(data) - 20} строк")
-
-        elif "CSV" in act:
-            import csv
-            base_name = os.path.basename(filename).replace(".enc", ".csv")
-            csv_path = os.path.join(CSV_DIR, f"decrypted_{base_name}")
-
-            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=data[0].keys())
-                writer.writeheader()
-                writer.writerows(data)
-            print_success(f"Сохранено: {csv_path}")
+                table.add_row(*[str(first.get(k, "")) for k in columns])
+                for row in itertools.islice(records, 19):
+                    table.add_row(*[str(row.get(k, "")) for k in columns])
+
+                console.print(table)
+                # Остаток только считаем — заодно проверяется целостность файла
+                rest = sum(1 for _ in records)
+                if rest:
+                    print_info(f"... и еще {rest} строк")
+
+            elif "CSV" in act:
+                import csv
+                base_name = os.path.basename(filename).replace(".enc", ".csv")
+                csv_path = os.path.join(CSV_DIR, f"decrypted_{base_name}")
+
+                with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.DictWriter(f, fieldnames=first.keys())
+                    writer.writeheader()
+                    writer.writerow(first)
+                    writer.writerows(records)
+                print_success(f"Сохранено: {csv_path}")
+        except Exception as e:
+            print_error(f"Файл поврежден: {e}")
 
         input("\nНажмите Enter...")
     else:
@@ -298,26 +267,337 @@ def run_decryptor():
         time.sleep(1)
 
 
+def run_vanity():
+    """
+    Поиск адреса с заданным началом/концом на всех ядрах (см. vanity.py).
+    """
+    from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
+    import vanity
+
+    networks = registry.scan()
+    net_name = questionary.select("Выберите сеть:", choices=list(networks.keys()), style=ui_manager.custom_style).ask()
+    if not net_name: return
+
+    GeneratorClass = registry.load_plugin(networks[net_name]["module"])
+    net_config = {}
+    if hasattr(GeneratorClass, "configure"):
+        try:
+            net_config = GeneratorClass.configure()
+            if net_config is None: return
+        except Exception as e:
+            print_error(f"Ошибка настройки модуля: {e}")
+            return
+    coin_symbol = core.resolve_symbol(GeneratorClass, net_config)
+    target = (GeneratorClass.__module__, net_config, coin_symbol)
+
+    try:
+        fixed, alphabet = vanity.analyze(target)
+    except Exception as e:
+        print_error(f"Сеть не подходит для поиска: {e}")
+        return
+    print_info(f"Адреса начинаются с '{fixed}', алфавит: {alphabet}")
+
+    prefix = questionary.text(f"Начало адреса (после '{fixed}'):", style=ui_manager.custom_style).ask()
+    if prefix is None: return
+    suffix = questionary.text("Конец адреса (Enter - любой):", style=ui_manager.custom_style).ask()
+    if suffix is None: return
+    case_sensitive = False
+    if alphabet != "bech32":
+        case_sensitive = questionary.confirm("Учитывать регистр?", default=False, style=ui_manager.custom_style).ask()
+
+    try:
+        pattern, probability = vanity.make_pattern(fixed, alphabet, prefix, suffix, case_sensitive)
+    except vanity.PatternError as e:
+        print_error(str(e))
+        return
+    print_info(f"Сложность: ~{round(1 / probability):,} адресов на одно совпадение".replace(",", " "))
+
+    want_str = questionary.text("Сколько адресов найти:", default="1", validate=lambda x: x.isdigit() and int(x) > 0,
+                                style=ui_manager.custom_style).ask()
+    if not want_str: return
+    save_pass = questionary.password("Пароль для шифрования файла:", style=ui_manager.custom_style).ask()
+    if not save_pass: return
+    workers = engine.default_workers()
+
+    records = []
+    started = time.perf_counter()
+    attempts = 0
+    with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold green]{task.description}"),
+            BarColumn(),
+            TextColumn("{task.completed}/{task.total}"),
+            console=ui_manager.get_console()
+    ) as progress:
+        task = progress.add_task("Поиск...", total=int(want_str))
+        try:
+            for batch_attempts, new in vanity.search(target, pattern, int(want_str), workers=workers):
+                attempts += batch_attempts
+                records.extend(new)
+                rate = attempts / (time.perf_counter() - started)
+                eta = vanity.expected_seconds(probability, rate)
+                progress.update(task, completed=len(records),
+                                description=f"{attempts:,} попыток · {rate:,.0f} адр/с · 50% за ~{eta:,.0f} с".replace(",", " "))
+        except KeyboardInterrupt:
+            print_info("Поиск остановлен")
+
+    if not records:
+        print_error("Ничего не найдено.")
+        return
+
+    for r in records:
+        console.print(f"🎯 [bold green]{r['address']}[/bold green]  [dim]{r.get('path', '')}[/dim]")
+
+    full_path = os.path.join(ENC_DIR, core.make_filename(coin_symbol, "vanity"))
+    with core.open_writer(full_path, save_pass, tag="vanity", meta=vanity.generation_meta(target, 12)) as writer:
+        writer.write_many(records)
+    print_success(f"Сохранено {len(records)} шт.")
+    console.print(f"📂 Путь: [underline]{full_path}[/underline]")
+    input("\nНажмите Enter в меню...")
+
+
+def run_bulk_export():
+    """
+    Все (или отмеченные) .enc файлы -> один CSV/JSONL с колонкой source_file.
+    """
+    from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn
+    import export
+
+    files = export.find_files()
+    if not files:
+        print_error("Нет зашифрованных файлов (.enc)!")
+        return
+
+    names = [os.path.basename(f) for f in files]
+    selected = questionary.checkbox("Файлы для экспорта:", choices=[questionary.Choice(n, checked=True) for n in names],
+                                    style=ui_manager.custom_style).ask()
+    if not selected: return
+    paths = [files[names.index(n)] for n in selected]
+
+    fmt = questionary.select("Формат:", choices=["csv", "jsonl"], style=ui_manager.custom_style).ask()
+    if not fmt: return
+    pwd = questionary.password("Пароль от файлов:", style=ui_manager.custom_style).ask()
+    if not pwd: return
+
+    output = os.path.join(CSV_DIR, f"export_{time.strftime('%Y%m%d_%H%M%S')}.{fmt}")
+    failed = []
+
+    with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold green]{task.description}"),
+            BarColumn(),
+            TextColumn("{task.completed}/{task.total}"),
+            TimeRemainingColumn(),
+            console=ui_manager.get_console()
+    ) as progress:
+        task = progress.add_task("Расшифровка файлов...", total=len(paths))
+
+        def on_file(result):
+            if result["status"] != "ok":
+                failed.append(result)
+            progress.advance(task)
+
+        summary = export.export_files(paths, pwd, output, fmt=fmt, workers=engine.default_workers(), on_file=on_file)
+
+    for result in failed:
+        print_error(f"{os.path.basename(result['file'])}: {result['error']}")
+    print_success(f"Экспортировано {summary['records']} записей из {summary['files'] - summary['failed']} файлов "
+                  f"за {summary['seconds']:.1f} с")
+    console.print(f"📂 Путь: [underline]{output}[/underline]")
+    input("\nНажмите Enter...")
+
+
+def run_audit():
+    """
+    Аудит файла: каждая запись заново выводится из мнемоники и сверяется с сохранённой.
+    """
+    from rich.table import Table
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    import audit
+    import export
+
+    files = export.find_files()
+    if not files:
+        print_error("Нет зашифрованных файлов (.enc)!")
+        return
+    names = [os.path.basename(f) for f in files]
+    name = questionary.select("Файл:", choices=names, style=ui_manager.custom_style).ask()
+    if not name: return
+    path = files[names.index(name)]
+    pwd = questionary.password("Пароль от файла:", style=ui_manager.custom_style).ask()
+    if not pwd: return
+
+    mismatches = []
+    summary = {}
+    with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold green]{task.description}"),
+            console=ui_manager.get_console()
+    ) as progress:
+        task = progress.add_task("Аудит...")
+
+        def on_progress(verified, rate):
+            progress.update(task, description=f"Проверено {verified:,} · {rate:,.0f} зап/с".replace(",", " "))
+
+        for result in audit.audit_file(path, pwd, workers=engine.default_workers(), on_progress=on_progress):
+            if "records" in result:
+                summary = result
+            else:
+                mismatches.append(result)
+
+    if mismatches:
+        table = Table(title="❗ Расхождения", show_header=True, header_style="bold red")
+        table.add_column("Кадр")
+        table.add_column("Запись")
+        table.add_column("Поля / ошибка", overflow="fold")
+        for m in mismatches[:50]:
+            table.add_row(str(m["chunk"]), str(m["position"]), m.get("error") or ", ".join(m["fields"]))
+        console.print(table)
+    if summary["status"] == "error":
+        print_error(summary["error"])
+    elif mismatches:
+        print_error(f"Не совпало {len(mismatches)} из {summary['records']} записей — не используйте эти кошельки")
+    else:
+        print_success(f"Все {summary['records']} записей совпали ({summary['records_per_sec']} зап/с)")
+    input("\nНажмите Enter...")
+
+
+def run_resume():
+    """
+    Продолжение прерванной генерации с последней контрольной точки (pipeline.resume).
+    """
+    from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn
+    import pipeline
+
+    jobs = pipeline.pending_jobs()
+    if not jobs:
+        print_info("Нет прерванных заданий")
+        return
+    states = [pipeline.load_state(path) for path in jobs]
+    labels = [f"{os.path.basename(st['output'])} — {st['completed']}/{st['count']}" for st in states]
+    label = questionary.select("Задание:", choices=labels, style=ui_manager.custom_style).ask()
+    if not label: return
+    path, state = jobs[labels.index(label)], states[labels.index(label)]
+
+    pwd = questionary.password("Пароль для шифрования файла:", style=ui_manager.custom_style).ask()
+    if not pwd: return
+    passphrase = ""
+    if state["passphrase"]:
+        passphrase = questionary.password("Passphrase задания:", style=ui_manager.custom_style).ask()
+        if not passphrase: return
+
+    with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold green]{task.description}"),
+            BarColumn(),
+            TextColumn("{task.percentage:>3.0f}%"),
+            ui_manager.RateColumn(),
+            TimeRemainingColumn(),
+            console=ui_manager.get_console()
+    ) as progress:
+        task = progress.add_task("Продолжение...", total=state["count"])
+        try:
+            _, saved = pipeline.resume(path, pwd, passphrase, workers=engine.default_workers(),
+                                       on_progress=lambda size, _: progress.advance(task, size))
+        except Exception as e:
+            saved = 0
+            print_error(f"Ошибка: {e}")
+
+    if saved:
+        print_success(f"Сохранено {saved} шт.")
+        console.print(f"📂 Путь: [underline]{state['output']}[/underline]")
+    input("\nНажмите Enter...")
+
+
+def run_lookup():
+    """
+    Поиск адреса по индексу: расшифровывается только кадр с нужной записью.
+    """
+    from rich.table import Table
+    import index
+
+    address = questionary.text("Адрес:", style=ui_manager.custom_style).ask()
+    if not address: return
+
+    started = time.perf_counter()
+    matches = index.lookup(address)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not matches:
+        print_error(f"Адрес не найден в индексе ({elapsed_ms:.1f} мс)")
+        print_info("Файлы вне индекса: python cli.py index verify / index build")
+        input("\nНажмите Enter...")
+        return
+
+    table = Table(title=f"Найдено за {elapsed_ms:.1f} мс", style="magenta")
+    for col in ("Файл", "Сеть", "Метка", "Пачка", "Позиция"):
+        table.add_column(col, overflow="fold")
+    for m in matches:
+        table.add_row(os.path.basename(m["file"]), m["network"], m["tag"] or "-",
+                      str(m["chunk"] if m["chunk"] is not None else "-"), str(m["position"]))
+    console.print(table)
+
+    match = matches[0]
+    if len(matches) > 1:
+        labels = [f"{os.path.basename(m['file'])} #{m['position']}" for m in matches]
+        label = questionary.select("Показать запись:", choices=labels, style=ui_manager.custom_style).ask()
+        if not label: return
+        match = matches[labels.index(label)]
+
+    pwd = questionary.password("Пароль от файла (Enter - пропустить):", style=ui_manager.custom_style).ask()
+    if pwd:
+        try:
+            record = index.fetch(match, pwd)
+        except Exception:
+            print_error("Неверный пароль или файл изменён (python cli.py index verify)")
+        else:
+            detail = Table(show_header=False, style="magenta")
+            detail.add_column("Поле", style="bold")
+            detail.add_column("Значение", overflow="fold")
+            for k, v in record.items():
+                detail.add_row(k, str(v))
+            console.print(detail)
+
+    input("\nНажмите Enter...")
+
+
 def main_menu():
-    console.clear()
     print_banner("")
 
-    choices = ["🚀 Сгенерировать кошельки", "🔓 Расшифровать файл", "❌ Выход"]
-    if add_network: choices.insert(2, "➕ Добавить сеть (Wizard)")
+    choices = ["🚀 Сгенерировать кошельки", "🌐 Одна мнемоника → несколько сетей", "🎯 Vanity-адрес",
+               "🔓 Расшифровать файл", "📦 Экспорт всех файлов", "🔎 Найти адрес", "🧪 Аудит файла", "❌ Выход"]
+    if HAS_WIZARD: choices.insert(7, "➕ Добавить сеть (Wizard)")
+    import pipeline
+    if pipeline.pending_jobs():
+        choices.insert(1, "⏯ Продолжить генерацию")
 
     action = questionary.select("Меню:", choices=choices, style=ui_manager.custom_style).ask()
 
     # --- ЛОГИКА ВЫХОДА ---
     if not action or "Выход" in action:
         return False  # Сигнал для остановки цикла
+    core.ensure_dirs()
 
     # --- ОБРАБОТКА ДЕЙСТВИЙ ---
     if "Сгенерировать" in action:
         run_generator()
+    elif "Продолжить" in action:
+        run_resume()
+    elif "несколько сетей" in action:
+        run_generator(multi=True)
+    elif "Vanity" in action:
+        run_vanity()
     elif "Расшифровать" in action:
         run_decryptor()
+    elif "Экспорт всех" in action:
+        run_bulk_export()
+    elif "Найти адрес" in action:
+        run_lookup()
+    elif "Аудит" in action:
+        run_audit()
     elif "Добавить" in action:
         try:
+            import add_network
             add_network.main()
         except SystemExit:
             pass
@@ -0,0 +1,168 @@
+"""
+Метрики генерации: счетчики и гистограммы задержек по этапам и сетям.
+
+Инструментирование выключено по умолчанию: точки замера проверяют
+`metrics.active` и при None ничего не делают (одна проверка на этап).
+
+    metrics.enable()                    # в начале запуска
+    ...                                 # этапы сами пишут в metrics.active
+    metrics.active.write("run.prom")    # JSON или Prometheus text (.prom/.txt)
+    metrics.disable()
+
+Этапы: mnemonic (энтропия + кодирование), seed (PBKDF2), bip32 (деривация
+BIP32/SLIP-10), encode (адрес и формат ключа), derive (весь generate() модуля),
+serialize (JSON), kdf (scrypt), encrypt / decrypt (AES-GCM), parse (JSON), write.
+
+Сеть передаётся в каждую точку замера явно (network="" — общий для всех сетей
+этап): метрики пишут и поток записи, и генерация, общего «текущего» состояния нет.
+bip32 и encode считает derivation.py внутри generate() модуля, которому символ
+сети неизвестен, — они общие; разбивка по сетям — у mnemonic, seed и derive.
+"""
+import json
+import time
+import bisect
+from collections import defaultdict
+
+# Границы корзин гистограммы в секундах (как у Prometheus: le = "меньше или равно")
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Текущие метрики процесса или None (инструментирование выключено)
+active = None
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def merge(self, data):
+        for i, c in enumerate(data["counts"]):
+            self.counts[i] += c
+        self.total += data["sum"]
+        self.count += data["count"]
+
+    def quantile(self, q):
+        """
+        Оценка квантиля по корзинам: линейная интерполяция внутри корзины, как
+        histogram_quantile в Prometheus. Квантиль в корзине +Inf — её нижняя граница.
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= target:
+                if i == len(BUCKETS):
+                    return BUCKETS[-1]
+                lower = BUCKETS[i - 1] if i else 0.0
+                return lower + (BUCKETS[i] - lower) * (target - seen) / c
+            seen += c
+        return BUCKETS[-1]
+
+    def to_dict(self):
+        return {"counts": list(self.counts), "sum": self.total, "count": self.count}
+
+
+class Metrics:
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.stages = defaultdict(Histogram)
+        self.started = time.time()
+
+    def observe(self, stage, seconds, network):
+        self.stages[(stage, network)].observe(seconds)
+
+    def count(self, name, n, network):
+        self.counters[(name, network)] += n
+
+    # --- обмен между процессами ---
+
+    def snapshot(self, reset=True):
+        """
+        Сериализуемый снимок (для передачи из воркера в основной процесс).
+        """
+        data = {
+            "counters": [[name, net, n] for (name, net), n in self.counters.items()],
+            "stages": [[stage, net, h.to_dict()] for (stage, net), h in self.stages.items()],
+        }
+        if reset:
+            self.counters.clear()
+            self.stages.clear()
+        return data
+
+    def merge(self, data):
+        for name, net, n in data["counters"]:
+            self.counters[(name, net)] += n
+        for stage, net, h in data["stages"]:
+            self.stages[(stage, net)].merge(h)
+
+    # --- экспорт ---
+
+    def to_dict(self):
+        stages = {}
+        for (stage, net), h in sorted(self.stages.items()):
+            stages.setdefault(stage, {})[net or "all"] = {
+                "count": h.count,
+                "sum_seconds": round(h.total, 6),
+                "avg_ms": round(h.total / h.count * 1000, 4) if h.count else 0.0,
+                "p50_ms": round(h.quantile(0.5) * 1000, 4),
+                "p99_ms": round(h.quantile(0.99) * 1000, 4),
+                "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts)),
+            }
+        counters = {}
+        for (name, net), n in sorted(self.counters.items()):
+            counters.setdefault(name, {})[net or "all"] = n
+        return {"started": self.started, "duration_seconds": round(time.time() - self.started, 3),
+                "counters": counters, "stages": stages}
+
+    def to_prometheus(self):
+        lines = ["# HELP keyforge_stage_seconds Latency of Key Forge pipeline stages",
+                 "# TYPE keyforge_stage_seconds histogram"]
+        for (stage, net), h in sorted(self.stages.items()):
+            labels = f'stage="{stage}",network="{net}"'
+            cumulative = 0
+            for bound, c in zip(BUCKETS, h.counts):
+                cumulative += c
+                lines.append(f'keyforge_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'keyforge_stage_seconds_bucket{{{labels},le="+Inf"}} {h.count}')
+            lines.append(f"keyforge_stage_seconds_sum{{{labels}}} {h.total:.9f}")
+            lines.append(f"keyforge_stage_seconds_count{{{labels}}} {h.count}")
+
+        names = sorted({name for name, _ in self.counters})
+        for name in names:
+            lines.append(f"# TYPE keyforge_{name}_total counter")
+            for (cname, net), n in sorted(self.counters.items()):
+                if cname == name:
+                    lines.append(f'keyforge_{name}_total{{network="{net}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        .prom / .txt — Prometheus text format, иначе JSON.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith((".prom", ".txt")):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+
+def enable():
+    global active
+    active = Metrics()
+    return active
+
+
+def disable():
+    global active
+    current, active = active, None
+    return current
@@ -0,0 +1,142 @@
+"""
+Пакетная генерация BIP39-мнемоник.
+
+Вместо нового Bip39MnemonicGenerator и маленького os.urandom на каждую
+мнемонику энтропия читается большими блоками, а контрольная сумма и
+11-битные индексы слов считаются целочисленными сдвигами по заранее
+загруженному словарю bip_utils. Результат бит в бит совпадает с
+Bip39MnemonicGenerator().FromEntropy(entropy) — проверка: python bench.py --verify-mnemonics.
+
+Для импорта готовых мнемоник (cli.py import) — обратное: read_source() потоково
+читает текстовый или .enc файл, check() проверяет контрольную сумму теми же
+сдвигами, без Bip39MnemonicValidator на каждую строку.
+"""
+import os
+import hashlib
+
+# Длина мнемоники -> байт энтропии (BIP39: ENT = 32 * words / 3 бит)
+ENTROPY_BYTES = {12: 16, 15: 20, 18: 24, 21: 28, 24: 32}
+BLOCK_SIZE = 1024
+
+_wordlist = None
+_word_index = None
+
+
+def wordlist():
+    """
+    Английский словарь BIP39 из bip_utils (загружается один раз на процесс).
+    """
+    global _wordlist
+    if _wordlist is None:
+        from bip_utils import Bip39Languages
+        from bip_utils.bip.bip39.bip39_mnemonic_utils import Bip39WordsListGetter
+
+        words = Bip39WordsListGetter().GetByLanguage(Bip39Languages.ENGLISH)
+        _wordlist = [words.GetWordAtIdx(i) for i in range(words.Length())]
+    return _wordlist
+
+
+def encode(entropy: bytes) -> str:
+    """
+    Энтропия -> строка мнемоники (английский словарь, слова через пробел).
+    """
+    if len(entropy) not in ENTROPY_BYTES.values():
+        raise ValueError(f"Неверная длина энтропии: {len(entropy)} байт")
+    words = wordlist()
+    checksum_bits = len(entropy) // 4
+    bits = (int.from_bytes(entropy, "big") << checksum_bits) | (hashlib.sha256(entropy).digest()[0] >> (8 - checksum_bits))
+    words_num = (len(entropy) * 8 + checksum_bits) // 11
+    return " ".join(words[(bits >> (11 * (words_num - 1 - i))) & 0x7FF] for i in range(words_num))
+
+
+def word_index():
+    """
+    Слово -> его номер в словаре BIP39 (для компактного хранения мнемоник, см. codec.py).
+    """
+    global _word_index
+    if _word_index is None:
+        _word_index = {word: i for i, word in enumerate(wordlist())}
+    return _word_index
+
+
+def normalize(line):
+    """
+    Строка файла -> мнемоника: нижний регистр, слова через один пробел.
+    """
+    return " ".join(line.split()).lower()
+
+
+def check(mnemonic):
+    """
+    None для корректной мнемоники BIP39 (английский словарь), иначе причина.
+    """
+    words = mnemonic.split(" ")
+    if len(words) not in ENTROPY_BYTES:
+        return f"Неверное число слов: {len(words)}"
+    index = word_index()
+    bits = 0
+    for word in words:
+        i = index.get(word)
+        if i is None:
+            return f"Слово не из словаря BIP39: {word}"
+        bits = bits << 11 | i
+    checksum_bits = len(words) * 11 // 33
+    entropy = (bits >> checksum_bits).to_bytes(ENTROPY_BYTES[len(words)], "big")
+    if hashlib.sha256(entropy).digest()[0] >> (8 - checksum_bits) != bits & ((1 << checksum_bits) - 1):
+        return "Неверная контрольная сумма"
+    return None
+
+
+def read_source(path, password=None):
+    """
+    Потоково отдаёт (номер строки, мнемоника, passphrase) из файла:
+      - текст: мнемоника на строку, пустые строки и строки с # пропускаются;
+        passphrase None — берётся общая из задания;
+      - .enc (Key Forge): поле mnemonic каждой записи с её passphrase, номер — номер записи.
+        Записи одной мнемоники подряд (диапазоны адресов) отдаются один раз.
+    """
+    with open(path, "rb") as f:
+        head = f.read(4)
+    import container
+    if container.is_container(head) or path.endswith(".enc"):
+        if password is None:
+            raise ValueError(f"{path}: зашифрованный файл — нужен пароль")
+        import core
+        previous = None
+        for number, record in enumerate(core.iter_records(path, password), 1):
+            item = (record.get("mnemonic") or "", record.get("passphrase") or "")
+            if item != previous:
+                previous = item
+                yield number, normalize(item[0]), item[1]
+        return
+
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield number, normalize(line), None
+
+
+def encode_block(block: bytes, entropy_len: int):
+    """
+    Блок энтропии -> список мнемоник (по entropy_len байт на мнемонику).
+    """
+    return [encode(block[i:i + entropy_len]) for i in range(0, len(block) - entropy_len + 1, entropy_len)]
+
+
+def iter_mnemonics(words_num, block_size=BLOCK_SIZE, randbytes=os.urandom):
+    """
+    Бесконечный поток мнемоник. Энтропия читается из CSPRNG блоками по block_size мнемоник.
+    """
+    entropy_len = ENTROPY_BYTES[words_num]
+    wordlist()
+    while True:
+        yield from encode_block(randbytes(entropy_len * block_size), entropy_len)
+
+
+def generate(words_num, count):
+    """
+    Список из `count` мнемоник.
+    """
+    entropy_len = ENTROPY_BYTES[words_num]
+    return encode_block(os.urandom(entropy_len * count), entropy_len)
@@ -1,12 +1,34 @@
-import questionary
 from bip_utils import (
-    Bip44, Bip44Coins, Bip44Changes,
+    Bip44, Bip44Coins,
     Bip49, Bip49Coins,
     Bip84, Bip84Coins,
     Bip86, Bip86Coins
 )
-# Подключаем наш новый менеджер стилей
-import ui_manager
+from derivation import from_seed, derive_keys, derive_keys_batch
+
+# mode из config -> (класс BIP, монета, подпись типа); неизвестный режим — NATIVE
+MODES = {
+    "NATIVE": (Bip84, Bip84Coins.BITCOIN, "Native (BIP-84)"),
+    "TAPROOT": (Bip86, Bip86Coins.BITCOIN, "Taproot (BIP-86)"),
+    "LEGACY": (Bip44, Bip44Coins.BITCOIN, "Legacy (BIP-44)"),
+    "NESTED": (Bip49, Bip49Coins.BITCOIN, "Nested (BIP-49)"),
+}
+DEFAULT_MODE = (Bip84, Bip84Coins.BITCOIN, "Native (Default)")
+
+
+def _mode(config):
+    # Если конфиг не передали (дефолт), используем NATIVE
+    mode = config.get("mode", "NATIVE") if config else "NATIVE"
+    return MODES.get(mode, DEFAULT_MODE)
+
+
+def _make_keys(type_str):
+    return lambda acc_obj: {
+        "address": acc_obj.PublicKey().ToAddress(),
+        "private_key": acc_obj.PrivateKey().ToWif(),
+        "type": type_str
+    }
+
 
 class NetworkGenerator:
     NAME = "Bitcoin (Multi-Format)"
@@ -18,6 +40,10 @@ class NetworkGenerator:
         Возвращает конфигурацию (словарь), выбранную пользователем.
         НЕ СОХРАНЯЕТ состояние внутри класса.
         """
+        # UI импортируется только здесь: generate() работает и без него (cli.py)
+        import questionary
+        import ui_manager
+
         choice = questionary.select(
             "🟠 Выберите формат Bitcoin адресов:",
             choices=[
@@ -40,33 +66,23 @@ class NetworkGenerator:
         return config
 
     @staticmethod
-    def generate(seed_bytes, config=None):
+    def generate(seed_bytes, config=None, seed_ctx=None):
         """
-        Принимает seed и config (словарь, полученный из configure)
+        Принимает seed и config (словарь, полученный из configure).
+        seed_ctx — общий мастер-ключ, если main.py генерирует сразу несколько сетей.
         """
-        # Если конфиг не передали (дефолт), используем NATIVE
-        mode = config.get("mode", "NATIVE") if config else "NATIVE"
-
-        if mode == "NATIVE":
-            bip_obj = Bip84.FromSeed(seed_bytes, Bip84Coins.BITCOIN)
-            type_str = "Native (BIP-84)"
-        elif mode == "TAPROOT":
-            bip_obj = Bip86.FromSeed(seed_bytes, Bip86Coins.BITCOIN)
-            type_str = "Taproot (BIP-86)"
-        elif mode == "LEGACY":
-            bip_obj = Bip44.FromSeed(seed_bytes, Bip44Coins.BITCOIN)
-            type_str = "Legacy (BIP-44)"
-        elif mode == "NESTED":
-            bip_obj = Bip49.FromSeed(seed_bytes, Bip49Coins.BITCOIN)
-            type_str = "Nested (BIP-49)"
-        else:
-            bip_obj = Bip84.FromSeed(seed_bytes, Bip84Coins.BITCOIN)
-            type_str = "Native (Default)"
+        bip_cls, coin, type_str = _mode(config)
+        bip_obj = from_seed(bip_cls, seed_bytes, coin, seed_ctx)
 
-        acc_obj = bip_obj.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(0)
+        # config может задавать диапазоны адресов/аккаунтов (см. derivation.py)
+        return derive_keys(bip_obj, config, _make_keys(type_str))
 
-        return {
-            "address": acc_obj.PublicKey().ToAddress(),
-            "private_key": acc_obj.PrivateKey().ToWif(),
-            "type": type_str
-        }
\ No newline at end of file
+    @staticmethod
+    def generate_batch(seeds, config=None, mnemonics=None):
+        """
+        Пачка seed за вызов: режим разбирается один раз, стандартный путь считается
+        напрямую (см. derivation.derive_keys_batch).
+        """
+        bip_cls, coin, type_str = _mode(config)
+        return derive_keys_batch(seeds, bip_cls, coin, config, _make_keys(type_str),
+                                 lambda seed_bytes: NetworkGenerator.generate(seed_bytes, config))
\ No newline at end of file
@@ -1,8 +1,70 @@
 import hashlib
-import questionary
 from bip_utils import Bip32Secp256k1
 from bip_utils.bech32 import Bech32Encoder
-import ui_manager
+from derivation import master_from_seed, iter_path_nodes, bip44_path, has_ranges, batch_supported, path_nodes_batch
+
+DEFAULT_CONFIG = {"prefix": "cosmos", "coin_type": 118}
+
+
+def parse_prefixes(spec):
+    """
+    "cosmos,osmo,kava:459" -> [["cosmos", 118], ["osmo", 118], ["kava", 459]]. None, если строка неверна.
+    """
+    chains = []
+    for item in spec.split(","):
+        prefix, _, coin_type = item.strip().partition(":")
+        if not prefix.isalpha() or (coin_type and not coin_type.isdigit()):
+            return None
+        chains.append([prefix.lower(), int(coin_type or 118)])
+    return chains
+
+
+def group_chains(config):
+    """
+    [(coin_type, [prefix, ...]), ...] в порядке появления: одна деривация на coin_type.
+    config["prefixes"] — список строк (coin_type из конфига) или пар [prefix, coin_type].
+    """
+    default_type = config.get("coin_type", 118)
+    groups = {}
+    for item in config.get("prefixes") or [config.get("prefix", "cosmos")]:
+        prefix, coin_type = (item, default_type) if isinstance(item, str) else item
+        # Свой шаблон "path" задаёт coin_type явно — все префиксы на нём
+        groups.setdefault(default_type if config.get("path") else int(coin_type), []).append(prefix)
+    return list(groups.items())
+
+
+def hash160(pub_key_bytes):
+    ripemd160 = hashlib.new('ripemd160')
+    ripemd160.update(hashlib.sha256(pub_key_bytes).digest())
+    return ripemd160.digest()
+
+
+def add_group_keys(keys, path, acc_obj, group_idx, coin_type, prefixes, multi, public=False):
+    """
+    Поля одного узла группы coin_type (см. group_chains) в словарь ключей кошелька.
+    public — config["public_keys"]: сжатый публичный ключ для watch-only файла.
+    """
+    public_key = acc_obj.PublicKey().RawCompressed().ToBytes()
+    key_hash = hash160(public_key)
+    private_key = acc_obj.PrivateKey().Raw().ToHex()
+
+    if group_idx == 0:
+        keys.update({
+            "address": Bech32Encoder.Encode(prefixes[0], key_hash),
+            "private_key": private_key,
+            "path": path,
+            "type": f"Cosmos (ID: {coin_type})"
+        })
+        if public:
+            keys["public_key"] = public_key.hex()
+    for prefix in prefixes if multi else []:
+        keys[f"{prefix}_address"] = Bech32Encoder.Encode(prefix, key_hash)
+        if group_idx:
+            # Другой coin_type — другой ключ
+            keys[f"{prefix}_private_key"] = private_key
+            keys[f"{prefix}_path"] = path
+            if public:
+                keys[f"{prefix}_public_key"] = public_key.hex()
 
 
 class NetworkGenerator:
@@ -11,12 +73,16 @@ class NetworkGenerator:
 
     @staticmethod
     def configure():
+        import questionary
+        import ui_manager
+
         action = questionary.select(
             "⚛️ Настройка Cosmos Generator:",
             choices=[
                 "1. Нативный Cosmos (cosmos1...)",
                 "2. Кастомный префикс (celestia1, osmo1...)",
-                "3. 🛠  Полная настройка (Префикс + Coin Type)"
+                "3. 🛠  Полная настройка (Префикс + Coin Type)",
+                "4. 🌐 Несколько префиксов (один ключ — адрес в каждой сети)"
             ],
             style=ui_manager.custom_style
         ).ask()
@@ -44,32 +110,67 @@ class NetworkGenerator:
                 config["coin_type"] = int(custom_type)
                 config["symbol"] = custom_prefix.upper()
 
+        elif action.startswith("4"):
+            spec = questionary.text(
+                "Префиксы через запятую (свой Coin Type — через двоеточие):",
+                default="cosmos,osmo,celestia,juno,kava:459",
+                validate=lambda x: True if parse_prefixes(x) else "Например: cosmos,osmo,kava:459",
+                style=ui_manager.custom_style
+            ).ask()
+            if not spec: return None
+            config["prefixes"] = parse_prefixes(spec)
+            config["prefix"], config["coin_type"] = config["prefixes"][0]
+            config["symbol"] = "COSMOS"
+
         return config
 
     @staticmethod
-    def generate(seed_bytes, config=None):
+    def generate(seed_bytes, config=None, seed_ctx=None):
         # Дефолтные настройки, если config не пришел
         if not config:
-            config = {"prefix": "cosmos", "coin_type": 118}
+            config = DEFAULT_CONFIG
 
         # Чистая логика генерации
-        coin_type = config.get("coin_type", 118)
-        prefix = config.get("prefix", "cosmos")
+        bip_obj = master_from_seed(Bip32Secp256k1, seed_bytes, seed_ctx)
 
-        bip44_path = f"m/44'/{coin_type}'/0'/0/0"
-        bip_obj = Bip32Secp256k1.FromSeed(seed_bytes)
-        acc_obj = bip_obj.DerivePath(bip44_path)
+        # config["prefixes"]: hash160 ключа один для всех сетей с одним coin_type,
+        # поэтому путь деривируется один раз на coin_type, а bech32 — на каждый префикс
+        groups = group_chains(config)
+        multi = bool(config.get("prefixes"))
+        public = bool(config.get("public_keys"))
 
-        pub_key_bytes = acc_obj.PublicKey().RawCompressed().ToBytes()
-        sha256_hash = hashlib.sha256(pub_key_bytes).digest()
-        ripemd160 = hashlib.new('ripemd160')
-        ripemd160.update(sha256_hash)
+        results = None
+        for group_idx, (coin_type, prefixes) in enumerate(groups):
+            # Путь с учётом диапазонов адресов/аккаунтов или шаблона "path" (см. derivation.py)
+            template = config.get("path") or bip44_path(44, coin_type, config)
+            nodes = list(iter_path_nodes(bip_obj, template))
+            if results is None:
+                results = [{} for _ in nodes]
 
-        address = Bech32Encoder.Encode(prefix, ripemd160.digest())
+            for keys, (path, acc_obj) in zip(results, nodes):
+                add_group_keys(keys, path, acc_obj, group_idx, coin_type, prefixes, multi, public)
 
-        return {
-            "address": address,
-            "private_key": acc_obj.PrivateKey().Raw().ToHex(),
-            "path": bip44_path,
-            "type": f"Cosmos (ID: {coin_type})"
-        }
\ No newline at end of file
+        return results if has_ranges(config) else results[0]
+
+    @staticmethod
+    def generate_batch(seeds, config=None, mnemonics=None):
+        """
+        Пачка seed за вызов: группы coin_type разбираются один раз, путь каждой группы
+        считается напрямую для всей пачки (см. derivation.path_nodes_batch).
+        """
+        config = config or DEFAULT_CONFIG
+        if not batch_supported(config):
+            return [NetworkGenerator.generate(seed_bytes, config) for seed_bytes in seeds]
+
+        multi = bool(config.get("prefixes"))
+        results = [{} for _ in seeds]
+        for group_idx, (coin_type, prefixes) in enumerate(group_chains(config)):
+            template = bip44_path(44, coin_type, config)
+            for i, node in enumerate(path_nodes_batch(seeds, Bip32Secp256k1, template)):
+                if node is None:
+                    results[i] = None
+                elif results[i] is not None:
+                    add_group_keys(results[i], *node, group_idx, coin_type, prefixes, multi)
+        # Seed, для которых быстрый путь не сработал хотя бы в одной группе, — обычным generate
+        return [NetworkGenerator.generate(seed_bytes, config) if keys is None else keys
+                for seed_bytes, keys in zip(seeds, results)]
@@ -1,4 +1,12 @@
-from bip_utils import Bip44, Bip44Coins, Bip44Changes
+from bip_utils import Bip44, Bip44Coins
+from derivation import from_seed, derive_keys, derive_keys_batch
+
+
+def _keys(acc_obj):
+    return {
+        "address": acc_obj.PublicKey().ToAddress(),
+        "private_key": acc_obj.PrivateKey().Raw().ToHex()
+    }
 
 
 class NetworkGenerator:
@@ -6,11 +14,14 @@ class NetworkGenerator:
     SYMBOL = "ETH"
 
     @staticmethod
-    def generate(seed_bytes):
-        bip_obj = Bip44.FromSeed(seed_bytes, Bip44Coins.ETHEREUM)
-        acc_obj = bip_obj.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(0)
+    def generate(seed_bytes, config=None, seed_ctx=None):
+        bip_obj = from_seed(Bip44, seed_bytes, Bip44Coins.ETHEREUM, seed_ctx)
 
-        return {
-            "address": acc_obj.PublicKey().ToAddress(),
-            "private_key": acc_obj.PrivateKey().Raw().ToHex()
-        }
\ No newline at end of file
+        # config может задавать диапазоны адресов/аккаунтов (см. derivation.py)
+        return derive_keys(bip_obj, config, _keys)
+
+    @staticmethod
+    def generate_batch(seeds, config=None, mnemonics=None):
+        # Пачка seed за вызов: стандартный путь считается напрямую (см. derivation.derive_keys_batch)
+        return derive_keys_batch(seeds, Bip44, Bip44Coins.ETHEREUM, config, _keys,
+                                 lambda seed_bytes: NetworkGenerator.generate(seed_bytes, config))
@@ -1,39 +1,73 @@
 import os
 import json
-import requests
-import questionary
-import ui_manager
+import importlib.util
 
-# Проверка наличия библиотеки
-try:
-    from substrateinterface import Keypair, KeypairType
-
-    HAS_SUBSTRATE_LIB = True
-except ImportError:
-    HAS_SUBSTRATE_LIB = False
+# Проверка наличия библиотеки без импорта: substrateinterface тянет requests, scalecodec
+# и др. и нужна только в generate (в воркерах), а не при настройке сети в меню
+HAS_SUBSTRATE_LIB = importlib.util.find_spec("substrateinterface") is not None
 
 DATA_DIR = "data"
 REGISTRY_FILE = os.path.join(DATA_DIR, "polkadot_registry.json")
+DEFAULT_CONFIG = {"prefix": 0, "network_name": "Polkadot"}
 REGISTRY_URL = "https://raw.githubusercontent.com/paritytech/ss58-registry/main/ss58-registry.json"
 
 
-def load_registry():
-    networks = {}
-    if os.path.exists(REGISTRY_FILE):
+# Разобранный реестр процесса: (mtime_ns, size) файла -> список сетей
+_registry_cache = {"stamp": None, "index": []}
+_chains_cache = {}
+
+
+def registry_index():
+    """
+    Разобранный реестр SS58: [{"prefix", "network", "name", "symbol", "account"}, ...].
+    JSON читается один раз и перечитывается только после изменения файла (update_registry).
+    """
+    try:
+        st = os.stat(REGISTRY_FILE)
+    except OSError:
+        return []
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _registry_cache["stamp"] != stamp:
+        index = []
         try:
             with open(REGISTRY_FILE, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                for net in data.get("registry", []):
-                    name = net.get("displayName", net.get("network"))
-                    prefix = net.get("prefix")
-                    if name and prefix is not None:
-                        networks[f"{name} (ID:{prefix})"] = prefix
-        except:
+            for net in data.get("registry", []):
+                name = net.get("displayName", net.get("network"))
+                if not name or net.get("prefix") is None:
+                    continue
+                index.append({
+                    "prefix": net["prefix"],
+                    "network": net.get("network") or f"ss58_{net['prefix']}",
+                    "name": name,
+                    "symbol": (net.get("symbols") or [""])[0],
+                    "account": net.get("standardAccount") or "",
+                })
+        except Exception:
             pass
-    return networks
+        _registry_cache.update(stamp=stamp, index=index)
+    return _registry_cache["index"]
+
+
+def load_registry():
+    return {f"{net['name']} (ID:{net['prefix']})": net["prefix"] for net in registry_index()}
+
+
+def resolve_chains(prefixes):
+    """
+    "all" или список префиксов -> [(prefix, network), ...] для мульти-адресного режима.
+    "all" — все сети реестра с аккаунтами на *25519 (H160/secp256k1-сети вроде Moonbeam пропускаются).
+    """
+    by_prefix = {net["prefix"]: net["network"] for net in registry_index()}
+    if prefixes == "all":
+        return [(net["prefix"], net["network"]) for net in registry_index() if "25519" in net["account"]]
+    return [(int(p), by_prefix.get(int(p), f"ss58_{int(p)}")) for p in prefixes]
 
 
 def update_registry():
+    import requests
+    import ui_manager
+
     ui_manager.print_info("Скачивание реестра ParityTech...")
     try:
         resp = requests.get(REGISTRY_URL, timeout=10)
@@ -55,6 +89,9 @@ class NetworkGenerator:
 
     @staticmethod
     def configure():
+        import questionary
+        import ui_manager
+
         if not HAS_SUBSTRATE_LIB:
             ui_manager.print_error("Не установлена библиотека 'substrate-interface'!")
             ui_manager.print_info("pip install substrate-interface")
@@ -64,6 +101,7 @@ class NetworkGenerator:
             "⚙️ Настройка Polkadot:",
             choices=[
                 "🔍 Выбрать сеть из списка",
+                "🌐 Несколько сетей (один ключ — адрес в каждой)",
                 "🔄 Обновить реестр (Интернет)",
                 "🛠 Ввести ID вручную"
             ],
@@ -96,6 +134,26 @@ class NetworkGenerator:
                 config["symbol"] = config["network_name"][:4].upper()
                 return config
 
+        elif "Несколько" in action:
+            nets = load_registry()
+            if not nets:
+                ui_manager.print_error("Реестр пуст. Сначала обновите его.")
+                return NetworkGenerator.configure()
+
+            all_choice = "⭐ Все сети реестра (*25519)"
+            chosen = questionary.checkbox("Сети (пробел — отметить):", choices=[all_choice] + sorted(nets.keys()),
+                                          style=ui_manager.custom_style).ask()
+            if not chosen:
+                return NetworkGenerator.configure()
+            if all_choice in chosen:
+                config["prefixes"] = "all"
+            else:
+                config["prefixes"] = [nets[c] for c in chosen]
+            config["prefix"] = resolve_chains(config["prefixes"])[0][0]
+            config["network_name"] = "Multi-SS58"
+            config["symbol"] = "SS58"
+            return config
+
         elif "Ввести ID" in action:
             pid = questionary.text("SS58 Prefix (ID):", validate=lambda x: x.isdigit(),
                                    style=ui_manager.custom_style).ask()
@@ -112,39 +170,73 @@ class NetworkGenerator:
     def generate(seed_bytes, config=None, mnemonic=None):
         """
         Теперь принимает mnemonic (строку). Это критично для совместимости с Talisman.
+
+        config["prefixes"] (список SS58-префиксов или "all") — ключевая пара считается
+        один раз, а публичный ключ кодируется в адрес каждой сети: поля {network}_address.
         """
         if not HAS_SUBSTRATE_LIB:
             return {"error": "No substrate-interface lib"}
+        if not config: config = DEFAULT_CONFIG
+        return _keys(seed_bytes, mnemonic, config, _chains(config["prefixes"]) if config.get("prefixes") else [])
 
-        if not config: config = {"prefix": 0, "network_name": "Polkadot"}
-        prefix = config.get("prefix", 0)
+    @staticmethod
+    def generate_batch(seeds, config=None, mnemonics=None):
+        """
+        Пачка за вызов: ключевая пара Sr25519 по-прежнему считается на каждую мнемонику,
+        а конфиг и список сетей config["prefixes"] (со сверкой файла реестра) — один раз на пачку.
+        """
+        if not HAS_SUBSTRATE_LIB:
+            return [{"error": "No substrate-interface lib"} for _ in seeds]
+        if not config: config = DEFAULT_CONFIG
+        chains = _chains(config["prefixes"]) if config.get("prefixes") else []
+        return [_keys(seed_bytes, mnemonic, config, chains)
+                for seed_bytes, mnemonic in zip(seeds, mnemonics or [None] * len(seeds))]
 
-        try:
-            # ЕСЛИ ЕСТЬ МНЕМОНИКА (Пришла из нового main.py)
-            if mnemonic:
-                kp = Keypair.create_from_mnemonic(
-                    mnemonic=mnemonic,
-                    ss58_format=prefix,
-                    crypto_type=KeypairType.SR25519
-                )
-
-            # ЕСЛИ НЕТ (Fallback, на всякий случай)
-            else:
-                # Берем 32 байта, как раньше, но это менее надежно для Sr25519
-                seed_32 = seed_bytes[:32]
-                kp = Keypair.create_from_seed(
-                    seed_hex=seed_32,
-                    ss58_format=prefix,
-                    crypto_type=KeypairType.SR25519
-                )
-
-            return {
-                "address": kp.ss58_address,
-                "private_key": kp.private_key.hex(),
-                "public_key": kp.public_key.hex(),
-                "ss58_prefix": prefix,
-                "type": f"{config.get('network_name')} (Sr25519 / Mnemonic)"
-            }
-        except Exception as e:
-            ui_manager.print_error(f"Polkadot Gen Error: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+
+def _keys(seed_bytes, mnemonic, config, chains):
+    from substrateinterface import Keypair, KeypairType
+    from substrateinterface.utils.ss58 import ss58_encode
+
+    prefix = config.get("prefix", 0)
+
+    try:
+        # ЕСЛИ ЕСТЬ МНЕМОНИКА (Пришла из нового main.py)
+        if mnemonic:
+            kp = Keypair.create_from_mnemonic(
+                mnemonic=mnemonic,
+                ss58_format=prefix,
+                crypto_type=KeypairType.SR25519
+            )
+
+        # ЕСЛИ НЕТ (Fallback, на всякий случай)
+        else:
+            # Берем 32 байта, как раньше, но это менее надежно для Sr25519
+            seed_32 = seed_bytes[:32]
+            kp = Keypair.create_from_seed(
+                seed_hex=seed_32,
+                ss58_format=prefix,
+                crypto_type=KeypairType.SR25519
+            )
+
+        keys = {
+            "address": kp.ss58_address,
+            "private_key": kp.private_key.hex(),
+            "public_key": kp.public_key.hex(),
+            "ss58_prefix": prefix,
+            "type": f"{config.get('network_name')} (Sr25519 / Mnemonic)"
+        }
+        for chain_prefix, network in chains:
+            keys[f"{network}_address"] = ss58_encode(kp.public_key, ss58_format=chain_prefix)
+        return keys
+    except Exception as e:
+        return {"error": f"Polkadot Gen Error: {e}"}
+
+
+def _chains(prefixes):
+    # Список сетей считается один раз на процесс и заново — только если изменился файл реестра
+    registry_index()
+    key = (prefixes if prefixes == "all" else tuple(prefixes), _registry_cache["stamp"])
+    chains = _chains_cache.get(key)
+    if chains is None:
+        chains = _chains_cache[key] = resolve_chains(prefixes)
+    return chains
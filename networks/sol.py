@@ -1,16 +1,30 @@
 import base64
-from bip_utils import Bip44, Bip44Coins, Bip44Changes
+from bip_utils import Bip44, Bip44Coins
+from derivation import from_seed, derive_keys, derive_keys_batch
+
+
+def _keys(acc_obj):
+    return {
+        "address": acc_obj.PublicKey().ToAddress(),
+        "private_key": base64.b64encode(acc_obj.PrivateKey().Raw().ToBytes()).decode("utf-8")
+    }
+
 
 class NetworkGenerator:
     NAME = "Solana (SOL)"
     SYMBOL = "SOL"
 
     @staticmethod
-    def generate(seed_bytes):
-        bip_obj = Bip44.FromSeed(seed_bytes, Bip44Coins.SOLANA)
-        acc_obj = bip_obj.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT)
+    def generate(seed_bytes, config=None, seed_ctx=None):
+        bip_obj = from_seed(Bip44, seed_bytes, Bip44Coins.SOLANA, seed_ctx)
 
-        return {
-            "address": acc_obj.PublicKey().ToAddress(),
-            "private_key": base64.b64encode(acc_obj.PrivateKey().Raw().ToBytes()).decode("utf-8")
-        }
\ No newline at end of file
+        # Адрес Solana заканчивается на уровне Change: m/44'/501'/N'/0'.
+        # Диапазоны из config перебирают N (см. derivation.py)
+        return derive_keys(bip_obj, config, _keys, change_level=True)
+
+    @staticmethod
+    def generate_batch(seeds, config=None, mnemonics=None):
+        # SLIP-10 ed25519: все уровни hardened, открытый ключ нужен только конечному узлу
+        return derive_keys_batch(seeds, Bip44, Bip44Coins.SOLANA, config, _keys,
+                                 lambda seed_bytes: NetworkGenerator.generate(seed_bytes, config),
+                                 change_level=True)
@@ -1,15 +1,26 @@
-from bip_utils import Bip44, Bip44Coins, Bip44Changes
+from bip_utils import Bip44, Bip44Coins
+from derivation import from_seed, derive_keys, derive_keys_batch
+
+
+def _keys(acc_obj):
+    return {
+        "address": acc_obj.PublicKey().ToAddress(),
+        "private_key": acc_obj.PrivateKey().Raw().ToHex()
+    }
+
 
 class NetworkGenerator:
     NAME = "SUI Network"
     SYMBOL = "SUI"
 
     @staticmethod
-    def generate(seed_bytes):
-        bip_obj = Bip44.FromSeed(seed_bytes, Bip44Coins.SUI)
-        acc_obj = bip_obj.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(0)
-
-        return {
-            "address": acc_obj.PublicKey().ToAddress(),
-            "private_key": acc_obj.PrivateKey().Raw().ToHex()
-        }
\ No newline at end of file
+    def generate(seed_bytes, config=None, seed_ctx=None):
+        bip_obj = from_seed(Bip44, seed_bytes, Bip44Coins.SUI, seed_ctx)
+
+        # config может задавать диапазоны адресов/аккаунтов (см. derivation.py)
+        return derive_keys(bip_obj, config, _keys)
+
+    @staticmethod
+    def generate_batch(seeds, config=None, mnemonics=None):
+        return derive_keys_batch(seeds, Bip44, Bip44Coins.SUI, config, _keys,
+                                 lambda seed_bytes: NetworkGenerator.generate(seed_bytes, config))
@@ -0,0 +1,439 @@
+"""
+Конвейер генерация -> сериализация -> шифрование -> запись с ограниченной памятью.
+
+Этапы:
+  1. Пул процессов (engine.generate_multi_wallets) — в работе не больше
+     max_inflight пачек, порядок пачек сохраняется.
+  2. Основной поток принимает пачки, двигает прогресс и отдаёт их в очередь
+     на запись (queue.Queue с maxsize — при медленном диске он ждёт, и новые
+     пачки у пула не заказываются).
+  3. Поток записи: ContainerWriter сериализует, шифрует кадры по
+     chunk_records записей и пишет их в файл (см. container.py).
+
+В памяти одновременно не больше max_inflight + QUEUE_SIZE пачек и одного
+кадра контейнера, сколько бы кошельков ни генерировалось.
+
+Контрольные точки: файл пишется как <имя>.enc.part, а рядом лежит
+<имя>.enc.job.json — сети, конфиг, сколько мнемоник заказано и сколько уже
+записано целыми кадрами, и смещение конца последнего кадра. Раз в
+CHECKPOINT_SECONDS (и при Ctrl+C) поток записи закрывает текущий кадр на
+границе пачки, делает fsync и обновляет состояние. После сбоя resume()
+срезает всё после контрольной точки и догенерирует остаток в тот же файл.
+Паролей и passphrase в состоянии нет — их спрашивают заново.
+
+Тот же конвейер пишет и импорт готовых мнемоник (import_to_file): вместо
+генерации — потоковое чтение файла-источника и проверка BIP39 в пуле.
+
+Каждый записанный кадр сверяется с уже выданными адресами (dedup.py) — повтор
+прерывает задание исключением dedup.DuplicateAddressError.
+"""
+import os
+import hmac
+import json
+import time
+import hashlib
+import queue
+import threading
+import functools
+
+import core
+import engine
+
+# Пачек в очереди между генерацией и записью
+QUEUE_SIZE = 8
+# Как часто сохраняется контрольная точка (секунд)
+CHECKPOINT_SECONDS = 30
+PART_SUFFIX = ".part"
+# Отпечаток passphrase в .job.json: scrypt с солью, чтобы файл состояния не упрощал перебор
+PASSPHRASE_SCRYPT = {"n": 2 ** 14, "r": 8, "p": 1}
+STATE_SUFFIX = ".job.json"
+
+_STOP = object()
+_ABORT = object()
+
+
+class ResumeError(Exception):
+    pass
+
+
+def part_path(filepath):
+    return filepath + PART_SUFFIX
+
+
+def state_path(filepath):
+    return filepath + STATE_SUFFIX
+
+
+def passphrase_check(passphrase, salt=None):
+    """
+    Отпечаток passphrase для .job.json: {"salt", "digest"} (hex). Сама passphrase не хранится.
+    """
+    salt = salt or os.urandom(16)
+    digest = hashlib.scrypt(passphrase.encode(), salt=salt, dklen=16, **PASSPHRASE_SCRYPT)
+    return {"salt": salt.hex(), "digest": digest.hex()}
+
+
+def check_passphrase(state, passphrase):
+    """
+    Passphrase для продолжения задания. Задание без passphrase продолжается без неё;
+    другая passphrase — ResumeError (иначе в файле окажутся записи с разными passphrase).
+    """
+    if not state["passphrase"]:
+        return ""
+    if not passphrase:
+        raise ResumeError("Задание запускалось с passphrase — укажите её")
+    expected = state.get("passphrase_check")
+    # Файлы состояния до появления отпечатка проверить нечем
+    if expected and not hmac.compare_digest(
+            passphrase_check(passphrase, bytes.fromhex(expected["salt"]))["digest"], expected["digest"]):
+        raise ResumeError("Passphrase не совпадает с той, с которой запускалось задание")
+    return passphrase
+
+
+def new_state(targets, count, words_num, filepath, tag=None, passphrase=""):
+    state = {
+        "output": filepath,
+        "targets": [list(t) for t in targets],
+        "count": count,
+        "words": words_num,
+        "tag": tag or "",
+        "passphrase": bool(passphrase),
+        "completed": 0,
+        "records": 0,
+        "chunks": 0,
+        "offset": None,
+        "created_at": time.time(),
+        "updated_at": time.time(),
+    }
+    if passphrase:
+        state["passphrase_check"] = passphrase_check(passphrase)
+    return state
+
+
+def save_state(state):
+    # Атомарно: после сбоя на диске либо старое состояние, либо новое
+    path = state_path(state["output"])
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_state(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def pending_jobs(folder=None):
+    """
+    Файлы состояния прерванных заданий в папке (по умолчанию wallets_encrypted).
+    """
+    folder = folder or core.ENC_DIR
+    if not os.path.isdir(folder):
+        return []
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(STATE_SUFFIX))
+
+
+class WriterThread(threading.Thread):
+    """
+    Пишет пачки записей из очереди в .enc файл через core.open_writer.
+    С state пишет в .part и периодически сохраняет контрольную точку.
+    """
+
+    def __init__(self, filepath, password, tag=None, queue_size=QUEUE_SIZE, state=None, watch=None,
+                 watch_key=None, **writer_args):
+        super().__init__(name="keyforge-writer", daemon=True)
+        self.filepath = filepath
+        self.password = password
+        self.tag = tag
+        self.state = state
+        # watch — путь watch-only файла (watchonly.py), пишется кадрами вместе с .enc
+        self.watch = watch
+        self.watch_key = watch_key
+        self.watch_writer = None
+        self.writer_args = writer_args
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.records = 0
+        self.error = None
+        self.completed = state["completed"] if state else 0
+
+    def checkpoint(self, writer):
+        writer.flush()
+        for f in (writer.f, self.watch_writer.f if self.watch_writer else None):
+            if f:
+                f.flush()
+                os.fsync(f.fileno())
+        self.state.update(completed=self.completed, records=writer.records, chunks=writer.chunks,
+                          offset=writer.f.tell(), updated_at=time.time())
+        if self.watch_writer:
+            self.state["watch_offset"] = self.watch_writer.f.tell()
+        save_state(self.state)
+
+    def _open_watch(self, writer):
+        import watchonly
+
+        offset = self.state.get("watch_offset") if self.state else None
+        if offset is None:
+            source = os.path.basename(self.state["output"] if self.state else self.filepath)
+            self.watch_writer = watchonly.WatchWriter(open(self.watch, "wb"), source, self.watch_key)
+        else:
+            self.watch_writer = watchonly.WatchWriter.resume(open(self.watch, "r+b"), offset, self.watch_key)
+            if self.watch_writer.records != writer.records:
+                raise ResumeError("Контрольная точка не совпадает с watch-only файлом")
+
+        # Публичные поля пишутся теми же кадрами, что и .enc — контрольные точки у файлов общие
+        on_chunk = writer.on_chunk
+
+        def write_chunk(index, offset, records):
+            if on_chunk:
+                on_chunk(index, offset, records)
+            self.watch_writer.write_many(records)
+
+        writer.on_chunk = write_chunk
+
+    def run(self):
+        try:
+            with core.open_writer(self.filepath, self.password, tag=self.tag, **self.writer_args) as writer:
+                if self.watch:
+                    self._open_watch(writer)
+                if self.state and self.state["offset"] is None:
+                    self.checkpoint(writer)
+                elif self.state and writer.records != self.state["records"]:
+                    raise ResumeError("Контрольная точка не совпадает с файлом")
+                last_checkpoint = time.monotonic()
+                while True:
+                    item = self.queue.get()
+                    if item is _STOP:
+                        break
+                    if item is _ABORT:
+                        if self.state:
+                            self.checkpoint(writer)
+                        # Выход по исключению: футер не пишется, файл не выдаётся за целый
+                        raise InterruptedError("Запись прервана")
+                    size, batch = item
+                    writer.write_many(batch)
+                    self.completed += size
+                    # Кадр закрывается только между пачками: одна мнемоника не делится между точками
+                    if self.state and time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS:
+                        self.checkpoint(writer)
+                        last_checkpoint = time.monotonic()
+                writer.flush()
+                if self.watch_writer:
+                    self.watch_writer.close()
+                self.records = writer.records
+        except BaseException as e:
+            self.error = e
+        finally:
+            if self.watch_writer:
+                self.watch_writer.f.close()
+
+    def put(self, size, batch):
+        """
+        Кладёт пачку в очередь; ждёт, пока в ней есть место (backpressure).
+        """
+        self._put((size, batch))
+
+    def _put(self, item):
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                self.queue.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                if not self.is_alive():
+                    raise self.error or RuntimeError("Поток записи завершился")
+
+    def finish(self):
+        """
+        Дописывает футер и ждёт окончания записи. Возвращает число записей в файле.
+        """
+        self._put(_STOP)
+        self.join()
+        if self.error is not None:
+            raise self.error
+        return self.records
+
+    def abort(self):
+        """
+        Останавливает запись без футера. Пачки из очереди дописываются, и с контрольными
+        точками файл остаётся для resume(); без них недописанный файл удаляется.
+        """
+        while self.is_alive():
+            try:
+                self.queue.put(_ABORT, timeout=0.2)
+                break
+            except queue.Full:
+                pass
+        self.join()
+        if not self.state:
+            for path in (self.filepath, self.watch):
+                if path and os.path.exists(path):
+                    os.remove(path)
+
+
+def _run(batches, writer, on_first, on_progress):
+    # batches — поток (size, entries) от движка (engine.generate_multi_wallets / import_mnemonics)
+    writer.start()
+    first = True
+    try:
+        for size, entries in batches:
+            if entries and first:
+                first = False
+                if on_first:
+                    on_first(entries[0])
+            writer.put(size, entries)
+            if on_progress:
+                on_progress(size, len(entries))
+        return writer.finish()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def _complete(state, collector, checker=None):
+    # Файл целый — переименовываем .part и убираем состояние
+    filepath = state["output"]
+    os.replace(part_path(filepath), filepath)
+    if state.get("watch"):
+        os.replace(part_path(state["watch"]["path"]), state["watch"]["path"])
+    os.remove(state_path(filepath))
+    if checker:
+        checker.finish()
+    try:
+        import index
+        index.store(filepath, collector, tag=state["tag"] or None)
+    except Exception:
+        # Индекс — только кэш, `cli.py index build` догонит
+        pass
+
+
+def _checker(filepath, enabled):
+    if not enabled:
+        return None
+    import dedup
+    return dedup.Checker(filepath)
+
+
+def generate_to_file(targets, count, words_num, filepath, password, passphrase="", workers=1, tag=None,
+                     on_first=None, on_progress=None, queue_size=QUEUE_SIZE, checkpoint=True,
+                     watch=False, watch_key=None, dedup=True, source=None):
+    """
+    Генерирует count кошельков сразу в зашифрованный файл.
+    on_first(record) вызывается, как только готова первая запись (предпросмотр),
+    on_progress(size, records) — после каждой пачки. Возвращает число записанных записей.
+    checkpoint=True — с контрольными точками: прерванное задание продолжает resume().
+    watch=True — рядом watch-only файл с публичными полями (watchonly.py),
+    watch_key — ключ HMAC для него (bytes).
+    dedup=False — без проверки дубликатов адресов (dedup.py).
+    source(targets, count, words_num, passphrase) — свой поток пачек (size, entries) вместо
+    engine.generate_multi_wallets (общий пул сервиса, daemon.py).
+    """
+    if source is None:
+        source = functools.partial(engine.generate_multi_wallets, workers=workers)
+    watch_file = None
+    if watch:
+        import watchonly
+        watch_file = watchonly.watch_path(filepath)
+
+    if not checkpoint:
+        writer = WriterThread(filepath, password, tag, queue_size, watch=watch_file, watch_key=watch_key,
+                              dedup=dedup, meta=core.generation_meta(targets, words_num))
+        return _run(source(targets, count, words_num, passphrase),
+                    writer, on_first, on_progress)
+
+    import index
+    state = new_state(targets, count, words_num, filepath, tag, passphrase)
+    if watch_file:
+        state["watch"] = {"path": watch_file, "hmac": bool(watch_key)}
+    state["dedup"] = bool(dedup)
+    collector = index.Collector()
+    # Адреса запоминаются под итоговым именем файла, а не .part
+    checker = _checker(filepath, dedup)
+    try:
+        if checker:
+            checker.reset()
+        writer = WriterThread(part_path(filepath), password, tag, queue_size, state=state,
+                              watch=watch_file and part_path(watch_file), watch_key=watch_key,
+                              indexed=False, dedup=False, meta=core.generation_meta(targets, words_num),
+                              on_chunk=core.chain_chunks(collector.on_chunk, checker and checker.on_chunk))
+        records = _run(source(targets, count, words_num, passphrase),
+                       writer, on_first, on_progress)
+        _complete(state, collector, checker)
+    finally:
+        if checker:
+            checker.close()
+    return records
+
+
+def resume(path, password, passphrase="", workers=1, on_first=None, on_progress=None, queue_size=QUEUE_SIZE,
+           watch_key=None):
+    """
+    Продолжает прерванное задание по файлу состояния (<имя>.enc.job.json).
+    on_progress получает и уже записанную часть (одним вызовом в начале).
+    Возвращает (state, records) — итоговое число записей в готовом файле.
+    """
+    import index
+
+    state = load_state(path)
+    passphrase = check_passphrase(state, passphrase)
+    if state["offset"] is None or not os.path.exists(part_path(state["output"])):
+        raise ResumeError(f"Нет недописанного файла {part_path(state['output'])}")
+    watch = state.get("watch")
+    if watch and watch["hmac"] and not watch_key:
+        raise ResumeError("Watch-only файл подписан HMAC — укажите ключ")
+
+    targets = [tuple(t) for t in state["targets"]]
+    collector = index.Collector()
+    checker = _checker(state["output"], state.get("dedup", True))
+    try:
+        if checker:
+            # Кадры после контрольной точки срезаются — их адреса тоже
+            checker.truncate(state["chunks"])
+        writer = WriterThread(part_path(state["output"]), password, state["tag"], queue_size, state=state,
+                              watch=watch and part_path(watch["path"]), watch_key=watch_key if watch else None,
+                              indexed=False, dedup=False, resume_at=state["offset"],
+                              meta=core.generation_meta(targets, state["words"]),
+                              on_chunk=core.chain_chunks(collector.on_chunk, checker and checker.on_chunk))
+        if on_progress:
+            on_progress(state["completed"], state["records"])
+        batches = engine.generate_multi_wallets(targets, state["count"] - state["completed"], state["words"],
+                                                passphrase, workers=workers)
+        records = _run(batches, writer, on_first, on_progress)
+        _complete(state, collector, checker)
+    finally:
+        if checker:
+            checker.close()
+    return state, records
+
+
+def import_to_file(source, targets, filepath, password, passphrase="", workers=1, tag=None, source_password=None,
+                   on_first=None, on_progress=None, on_invalid=None, queue_size=QUEUE_SIZE, dedup=False):
+    """
+    Ключи для готовых мнемоник из файла source (текст — мнемоника на строку, или .enc —
+    нужен source_password) в зашифрованный filepath. Источник читается потоково
+    (mnemonics.read_source), проверка BIP39 и деривация — в пуле (engine.import_mnemonics).
+    on_invalid(line, reason) — для каждой отбракованной строки; on_progress(size, records).
+    dedup=False по умолчанию: адреса импортируемых мнемоник могли уже выдаваться раньше.
+    Возвращает {"mnemonics", "invalid", "records"}. Без контрольных точек: при сбое файл удаляется.
+    """
+    import mnemonics
+
+    stats = {"mnemonics": 0, "invalid": 0, "records": 0}
+
+    def batches():
+        items = mnemonics.read_source(source, source_password)
+        for size, entries, invalid in engine.import_mnemonics(targets, items, passphrase, workers):
+            stats["mnemonics"] += size
+            stats["invalid"] += len(invalid)
+            if on_invalid:
+                for line, reason in invalid:
+                    on_invalid(line, reason)
+            yield size, entries
+
+    writer = WriterThread(filepath, password, tag, queue_size, dedup=dedup,
+                          meta=core.generation_meta(targets, None))
+    stats["records"] = _run(batches(), writer, on_first, on_progress)
+    return stats
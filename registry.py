@@ -0,0 +1,194 @@
+"""
+Реестр модулей сетей (networks/).
+
+Вместо импорта всех модулей при каждом запуске генератора реестр хранит
+манифест data/networks_manifest.json: NAME, SYMBOL и аргументы generate()
+каждого файла. Манифест читается статически (через ast) и пересчитывается
+только для файлов, у которых изменились mtime или размер. Импортируется
+лишь модуль, выбранный пользователем.
+"""
+import os
+import ast
+import sys
+import json
+import inspect
+import importlib
+import functools
+
+NETWORKS_PACKAGE = "networks"
+MANIFEST_FILE = os.path.join("data", "networks_manifest.json")
+MANIFEST_VERSION = 1
+
+# Необязательные аргументы generate(), которые умеет передавать ядро
+KNOWN_ARGS = ("config", "mnemonic", "seed_ctx")
+
+
+def _describe_static(path):
+    """
+    Извлекает описание NetworkGenerator из исходника без импорта.
+    Возвращает None, если класса нет, или "dynamic", если NAME/SYMBOL не литералы.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "NetworkGenerator":
+            info = {"configure": False, "needs": []}
+            for item in node.body:
+                if isinstance(item, ast.Assign) and len(item.targets) == 1 \
+                        and isinstance(item.targets[0], ast.Name) and item.targets[0].id in ("NAME", "SYMBOL"):
+                    if not isinstance(item.value, ast.Constant):
+                        return "dynamic"
+                    info[item.targets[0].id.lower()] = item.value.value
+                elif isinstance(item, ast.FunctionDef):
+                    if item.name == "configure":
+                        info["configure"] = True
+                    elif item.name == "generate":
+                        args = [a.arg for a in item.args.args + item.args.kwonlyargs]
+                        info["needs"] = [a for a in KNOWN_ARGS if a in args]
+            if "name" not in info or "symbol" not in info:
+                return "dynamic"
+            return info
+    return None
+
+
+def _describe_import(module_name):
+    GeneratorClass = load_plugin(module_name)
+    params = inspect.signature(GeneratorClass.generate).parameters
+    return {
+        "name": GeneratorClass.NAME,
+        "symbol": GeneratorClass.SYMBOL,
+        "configure": hasattr(GeneratorClass, "configure"),
+        "needs": [a for a in KNOWN_ARGS if a in params],
+    }
+
+
+def _read_manifest():
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data.get("modules", {})
+    except Exception:
+        pass
+    return {}
+
+
+def _write_manifest(modules):
+    try:
+        os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+        tmp = MANIFEST_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "modules": modules}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, MANIFEST_FILE)
+    except OSError:
+        # Манифест — только кэш: без прав на запись просто пересчитаем в следующий раз
+        pass
+
+
+def scan():
+    """
+    Возвращает {NAME: entry} для всех модулей networks/.
+    entry = {"module", "name", "symbol", "configure", "needs", "mtime", "size"}.
+    """
+    if not os.path.isdir(NETWORKS_PACKAGE):
+        os.makedirs(NETWORKS_PACKAGE)
+        with open(os.path.join(NETWORKS_PACKAGE, '__init__.py'), 'w') as f: pass
+        return {}
+
+    cached = _read_manifest()
+    modules = {}
+    changed = False
+
+    for filename in sorted(os.listdir(NETWORKS_PACKAGE)):
+        if not filename.endswith(".py") or filename.startswith("_"):
+            continue
+        path = os.path.join(NETWORKS_PACKAGE, filename)
+        stat = os.stat(path)
+        entry = cached.get(filename)
+        if entry and entry.get("mtime") == stat.st_mtime_ns and entry.get("size") == stat.st_size:
+            modules[filename] = entry
+            continue
+
+        changed = True
+        module_name = f"{NETWORKS_PACKAGE}.{filename[:-3]}"
+        try:
+            info = _describe_static(path)
+            if info == "dynamic":
+                info = _describe_import(module_name)
+        except Exception:
+            info = None
+        # Файлы без NetworkGenerator тоже запоминаем, чтобы не разбирать их каждый раз
+        modules[filename] = {"module": module_name, "mtime": stat.st_mtime_ns, "size": stat.st_size,
+                             **(info or {"name": None})}
+
+    if changed or set(cached) != set(modules):
+        _write_manifest(modules)
+
+    return {entry["name"]: entry for entry in modules.values() if entry.get("name")}
+
+
+def load_plugin(module_name):
+    """
+    Импортирует один модуль сети и возвращает его NetworkGenerator.
+    """
+    if module_name not in sys.modules:
+        # Модуль мог появиться только что (Wizard)
+        importlib.invalidate_caches()
+    return importlib.import_module(module_name).NetworkGenerator
+
+
+def find(name):
+    """
+    Ищет сеть по имени файла модуля ("btc"), NAME или SYMBOL и возвращает NetworkGenerator.
+    Импортируется только найденный модуль.
+    """
+    entries = scan()
+    key = name.lower()
+    for entry in entries.values():
+        if key in (entry["module"].rsplit(".", 1)[-1].lower(), entry["name"].lower(), entry["symbol"].lower()):
+            return load_plugin(entry["module"])
+    return None
+
+
+def make_caller(GeneratorClass, net_config):
+    """
+    Строит адаптер вызова generate() один раз на модуль: caller(seed_bytes, mnemonic, seed_ctx).
+    В горячем цикле нет ни inspect.signature, ни сборки словаря аргументов.
+    """
+    params = inspect.signature(GeneratorClass.generate).parameters
+    generate = GeneratorClass.generate
+    if "config" in params:
+        generate = functools.partial(generate, config=net_config)
+
+    takes_mnemonic = "mnemonic" in params
+    takes_ctx = "seed_ctx" in params
+
+    if takes_mnemonic and takes_ctx:
+        return lambda seed_bytes, mnemonic, seed_ctx: generate(seed_bytes, mnemonic=mnemonic, seed_ctx=seed_ctx)
+    if takes_mnemonic:
+        return lambda seed_bytes, mnemonic, seed_ctx: generate(seed_bytes, mnemonic=mnemonic)
+    if takes_ctx:
+        return lambda seed_bytes, mnemonic, seed_ctx: generate(seed_bytes, seed_ctx=seed_ctx)
+    return lambda seed_bytes, mnemonic, seed_ctx: generate(seed_bytes)
+
+
+def make_batch_caller(GeneratorClass, net_config):
+    """
+    Адаптер пакетного вызова: batch(seeds, mnemonics) -> список результатов generate() по seed.
+    Если у модуля есть generate_batch(seeds, config=None, mnemonics=None), вызывается он
+    (config и mnemonics передаются, только если он их принимает), иначе — generate()
+    по одному кошельку через make_caller.
+    """
+    generate_batch = getattr(GeneratorClass, "generate_batch", None)
+    if generate_batch is None:
+        caller = make_caller(GeneratorClass, net_config)
+        return lambda seeds, mnemonics: [caller(seed_bytes, mnemonic, None)
+                                         for seed_bytes, mnemonic in zip(seeds, mnemonics)]
+
+    params = inspect.signature(generate_batch).parameters
+    if "config" in params:
+        generate_batch = functools.partial(generate_batch, config=net_config)
+    if "mnemonics" in params:
+        return lambda seeds, mnemonics: generate_batch(seeds, mnemonics=mnemonics)
+    return lambda seeds, mnemonics: generate_batch(seeds)
@@ -0,0 +1,32 @@
+"""
+Общие фикстуры тестов.
+
+Модули Key Forge работают с путями относительно текущей папки (networks/,
+data/, wallets_encrypted/), поэтому тесты, которые пишут файлы, запускаются
+во временной папке со ссылкой на networks/ репозитория.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Тестовая мнемоника BIP39 ("abandon" x11 + "about")
+TEST_MNEMONIC = "abandon " * 11 + "about"
+PASSWORD = "test-password"
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Пустая рабочая папка: networks/ — ссылка на модули репозитория, data/ и
+    wallets_encrypted/ создаются заново для каждого теста.
+    """
+    os.symlink(os.path.join(ROOT, "networks"), tmp_path / "networks", target_is_directory=True)
+    monkeypatch.chdir(tmp_path)
+    import core
+    core.ensure_dirs()
+    return tmp_path
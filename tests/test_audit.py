@@ -0,0 +1,85 @@
+"""
+Сквозные проверки: генерация -> расшифровка -> аудит (каждая запись заново
+выводится из мнемоники текущими модулями сетей).
+"""
+import os
+
+import pytest
+
+import cli
+import core
+import audit
+import vanity
+import engine
+from conftest import PASSWORD, TEST_MNEMONIC
+
+
+def _audit(path):
+    results = list(audit.audit_file(path, PASSWORD))
+    summary = results[-1]
+    assert summary["status"] == "ok", results
+    return summary
+
+
+@pytest.mark.parametrize("job", [
+    {"network": "evm"},
+    {"network": "btc"},
+    {"network": "btc", "config": {"mode": "TAPROOT"}},
+    {"network": "sol"},
+    {"network": "sui"},
+    {"network": "cosmos", "config": {"prefixes": ["cosmos", "osmo"]}},
+    {"network": "evm", "address_range": "0..2"},
+    {"network": "sol", "account_range": "1..2"},
+    {"networks": ["btc", "evm", "sol"]},
+    {"network": "evm", "watch": True},
+    {"network": "evm", "words": 24, "passphrase": "extra words"},
+])
+def test_generate_decode_audit(workdir, job):
+    result = cli.run_job({"count": 5, "password": PASSWORD, **job})
+    records = core.decrypt_data(result["output"], PASSWORD)
+    per_mnemonic = len(records) // 5
+    assert len(records) == result["generated"] == 5 * per_mnemonic
+    assert len({r["mnemonic"] for r in records}) == 5
+    assert all(r["passphrase"] == job.get("passphrase", "") for r in records)
+    assert _audit(result["output"])["records"] == len(records)
+
+
+def test_pool_workers_match(workdir):
+    # Пачки из пула процессов пишутся в том же формате и проходят аудит
+    result = cli.run_job({"network": "evm", "count": 8, "workers": 2, "password": PASSWORD})
+    assert _audit(result["output"])["records"] == 8
+
+
+def test_known_vector(workdir):
+    targets = [("networks.evm", {}, "ETH")]
+    engine._init_worker(targets, 12, "")
+    seed = engine._worker["seed_gen"](TEST_MNEMONIC).Generate("")
+    [entry] = engine.derive_entries(seed, TEST_MNEMONIC, "")
+    assert entry["address"] == "0x9858EfFD232B4033E47d90003D41EC34EcaEda94"
+
+
+def test_tampered_record_is_reported(workdir):
+    result = cli.run_job({"network": "evm", "count": 3, "password": PASSWORD})
+    meta = core.read_meta(result["output"], PASSWORD)
+    records = core.decrypt_data(result["output"], PASSWORD)
+    records[1]["address"] = records[0]["address"]
+
+    path = os.path.join(core.ENC_DIR, "tampered.enc")
+    with core.open_writer(path, PASSWORD, indexed=False, dedup=False, meta=meta) as writer:
+        writer.write_many(records)
+    results = list(audit.audit_file(path, PASSWORD))
+    [problem] = [r for r in results if r["status"] == "mismatch" and "position" in r]
+    assert problem["position"] == 1 and problem["fields"] == ["address"]
+    assert results[-1]["status"] == "mismatch" and results[-1]["mismatches"] == 1
+
+
+def test_vanity_file_passes_audit(workdir, monkeypatch):
+    # Одна шестнадцатеричная цифра: совпадение находится в первой же мнемонике (1000 адресов)
+    monkeypatch.setenv("KF_TEST_PASS", PASSWORD)
+    output = os.path.join(core.ENC_DIR, "vanity.enc")
+    assert cli.main(["vanity", "--network", "evm", "--prefix", "a", "--count", "2", "--workers", "1",
+                     "--password-env", "KF_TEST_PASS", "--output", output]) == 0
+    records = core.decrypt_data(output, PASSWORD)
+    assert len(records) >= 2 and all(r["address"].lower().startswith("0xa") for r in records)
+    assert core.read_meta(output, PASSWORD)["targets"][0][1]["address_range"] == f"0..{vanity.BATCH - 1}"
+    _audit(output)
@@ -0,0 +1,84 @@
+import os
+import base64
+import random
+
+import pytest
+
+import codec
+import mnemonics
+
+
+def _roundtrip(records):
+    plaintext = codec.encode_chunk(records)
+    decoded = codec.decode_chunk(plaintext)
+    assert decoded == records
+    # Порядок ключей тоже сохраняется (колонки пишутся в порядке первой записи)
+    assert [list(r) for r in decoded] == [list(r) for r in records]
+    return plaintext
+
+
+def _wallets(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "network": "ETH",
+        "mnemonic": mnemonics.encode(rng.randbytes(16)),
+        "passphrase": "",
+        "address": "0x" + rng.randbytes(20).hex(),
+        "private_key": rng.randbytes(32).hex(),
+        "sol_key": base64.b64encode(rng.randbytes(64)).decode(),
+        "path": f"m/44'/60'/0'/0/{i}",
+        "index": i,
+    } for i in range(n)]
+
+
+def test_wallets_use_columns():
+    plaintext = _roundtrip(_wallets(50))
+    assert plaintext[0] == codec.ENCODING_COLUMNS
+
+
+@pytest.mark.parametrize("size", [300, 600, 4096])
+def test_wide_fixed_values_fall_back(size):
+    # Поле модуля сети с hex/base64 длиннее MAX_WIDTH байт
+    _roundtrip([{"network": "X", "blob": os.urandom(size).hex()} for _ in range(3)])
+    _roundtrip([{"network": "X", "blob": base64.b64encode(os.urandom(size)).decode()} for _ in range(3)])
+    _roundtrip([{"network": "X", "blob": "%0600x" % i} for i in range(3)])
+
+
+def test_width_limit_boundary():
+    for width in (codec.MAX_WIDTH, codec.MAX_WIDTH + 1):
+        _roundtrip([{"key": os.urandom(width).hex()} for _ in range(4)])
+
+
+@pytest.mark.parametrize("records", [
+    # Регистр hex и base64 без паддинга не восстановились бы — остаются строками
+    [{"k": "ABCD"}, {"k": "abcd"}],
+    [{"k": "00"}, {"k": "0a0b"}],
+    [{"k": "aGVsbG8="}, {"k": "aGVsbG8"}],
+    # Смешанные типы, None, списки, строки с \x00
+    [{"k": None}, {"k": 1}, {"k": [1, "a"]}, {"k": True}],
+    [{"k": "a\x00b"}, {"k": "c"}],
+    [{"k": ""}, {"k": "x"}],
+    # Похожие на мнемонику, но не слова BIP39
+    [{"mnemonic": "hello world"}, {"mnemonic": "abandon about"}],
+    [{"mnemonic": "abandon about"}, {"mnemonic": "abandon"}],
+    # Константа: одно значение, разные типы не склеиваются
+    [{"k": 1}, {"k": 1.0}, {"k": True}],
+    # Разные наборы ключей — JSON
+    [{"a": 1}, {"b": 2}],
+    [{"a": 1, "b": 2}, {"b": 2, "a": 1}],
+    [{"k": "юникод"}, {"k": "ключ"}],
+])
+def test_edge_cases(records):
+    _roundtrip(records)
+
+
+def test_single_and_empty():
+    _roundtrip(_wallets(1))
+    assert codec.decode_chunk(codec.encode_chunk([])) == []
+
+
+def test_corrupt_chunk():
+    with pytest.raises(codec.CodecError):
+        codec.decode_chunk(b"")
+    with pytest.raises(codec.CodecError):
+        codec.decode_chunk(b"\x07data")
@@ -0,0 +1,183 @@
+"""
+Сервис генерации (daemon.py) с локальным клиентом: serve в потоке, запросы через сокет.
+
+Задание держится на месте через password_file — FIFO: сервис читает пароль
+в run_job уже после того, как занял файл задания, и ждёт, пока тест не
+запишет пароль. Так очередь и пересечения заданий проверяются без гонок.
+"""
+import os
+import stat
+import socket
+import threading
+
+import pytest
+
+import core
+import daemon
+from conftest import PASSWORD
+
+SOCKET = os.path.join("data", "test.sock")
+
+
+@pytest.fixture
+def start(workdir):
+    """
+    start(**kwargs) — daemon.serve в отдельном потоке; возвращает адрес для клиента.
+    """
+    threads = []
+
+    def start(port=None, **kwargs):
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            try:
+                daemon.serve(2, socket_path=None if port else SOCKET, port=port, on_ready=lambda info: ready.set(),
+                             **kwargs)
+            except Exception as e:
+                errors.append(e)
+                ready.set()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        assert ready.wait(60)
+        assert not errors
+        address = {"port": port} if port else {"socket_path": SOCKET}
+        threads.append((thread, address))
+        return thread, address
+
+    yield start
+    for thread, address in threads:
+        if thread.is_alive():
+            daemon.stop(**address)
+            thread.join(60)
+
+
+def _gate(workdir, name="password.fifo"):
+    path = str(workdir / name)
+    os.mkfifo(path)
+    return path
+
+
+def _open_gate(path):
+    # Пишущий конец FIFO открывается, только когда сервис уже ждёт пароль
+    def write():
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(PASSWORD)
+    threading.Thread(target=write, daemon=True).start()
+
+
+def _wait_output(address, job_id):
+    # Задание заняло файл, когда в снимке появился output
+    while True:
+        for info in daemon.status(**address)["jobs"]:
+            if info["id"] == job_id and (info["output"] or info["status"] in daemon.FINAL):
+                return info
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind((daemon.HOST, 0))
+        return sock.getsockname()[1]
+
+
+def test_submit_status_stop(start):
+    thread, address = start()
+    snapshots = list(daemon.submit({"network": "evm", "count": 5, "password": PASSWORD}, **address))
+    final = snapshots[-1]
+    assert snapshots[0]["status"] in ("queued", "running")
+    assert final["status"] == "ok"
+    assert final["generated"] == 5 and final["workers"] == 2
+    assert os.path.dirname(final["output"]) == core.ENC_DIR
+    assert len(core.decrypt_data(final["output"], PASSWORD)) == 5
+
+    info = daemon.status(**address)
+    assert info["workers"] == 2 and info["pool"]
+    assert [job["status"] for job in info["jobs"]] == ["ok"]
+
+    assert daemon.stop(**address)["stopping"] is True
+    thread.join(60)
+    assert not thread.is_alive()
+    assert not os.path.exists(SOCKET)
+
+
+def test_same_output_rejected(start, workdir):
+    _, address = start(max_jobs=2)
+    gate = _gate(workdir)
+    output = os.path.join(core.ENC_DIR, "same.enc")
+    first = next(daemon.submit({"network": "evm", "count": 3, "password_file": gate, "output": output},
+                               follow=False, **address))
+    assert _wait_output(address, first["id"])["output"] == output
+
+    second = list(daemon.submit({"network": "evm", "count": 3, "password": PASSWORD, "output": output},
+                                **address))[-1]
+    assert second["status"] == "error"
+    assert "уже пишется" in second["error"]
+
+    _open_gate(gate)
+    final = list(daemon.request({"op": "follow", "id": first["id"]}, **address))[-1]
+    assert final["status"] == "ok"
+    assert len(core.decrypt_data(output, PASSWORD)) == 3
+
+
+def test_default_names_do_not_collide(start, workdir):
+    _, address = start(max_jobs=2)
+    gate = _gate(workdir)
+    job = {"network": "evm", "count": 2, "tag": "same"}
+    first = next(daemon.submit({**job, "password_file": gate}, follow=False, **address))
+    _wait_output(address, first["id"])
+    second = list(daemon.submit({**job, "password": PASSWORD}, **address))[-1]
+    _open_gate(gate)
+    first = list(daemon.request({"op": "follow", "id": first["id"]}, **address))[-1]
+    assert first["status"] == second["status"] == "ok"
+    assert first["output"] != second["output"]
+
+
+def test_queued_job_cancelled_on_stop(start, workdir):
+    thread, address = start(max_jobs=1)
+    gate = _gate(workdir)
+    running = next(daemon.submit({"network": "evm", "count": 2, "password_file": gate}, follow=False, **address))
+    _wait_output(address, running["id"])
+    queued = next(daemon.submit({"network": "evm", "count": 2, "password": PASSWORD}, follow=False, **address))
+
+    follow = daemon.request({"op": "follow", "id": queued["id"]}, **address)
+    assert next(follow)["status"] == "queued"
+    assert daemon.stop(**address)["stopping"] is True
+    # stop дожидается выполняемого задания и отменяет ждущее
+    _open_gate(gate)
+    assert list(follow)[-1]["status"] == "cancelled"
+    thread.join(60)
+    assert not thread.is_alive()
+
+    files = [name for name in os.listdir(core.ENC_DIR) if name.endswith(".enc")]
+    assert len(files) == 1
+    assert len(core.decrypt_data(os.path.join(core.ENC_DIR, files[0]), PASSWORD)) == 2
+
+
+def test_output_outside_enc_dir_rejected(start, workdir):
+    _, address = start()
+    for output in ("elsewhere/x.enc", str(workdir.parent / "x.enc"), os.path.join(core.ENC_DIR, "..", "x.enc")):
+        final = list(daemon.submit({"network": "evm", "count": 1, "password": PASSWORD, "output": output},
+                                   **address))[-1]
+        assert final["status"] == "error"
+        assert not os.path.exists(output)
+    assert not os.path.exists("elsewhere")
+
+
+def test_tcp_requires_token(start):
+    port = _free_port()
+    thread, address = start(port=port)
+    assert stat.S_IMODE(os.stat(daemon.TOKEN_FILE).st_mode) == 0o600
+
+    assert daemon.ping(port=port)["status"] == "ok"
+    # Чужой клиент без токена (или с неверным) не ставит заданий
+    for token in ("", "wrong"):
+        message = {"op": "submit", "job": {"network": "evm", "count": 1, "password": PASSWORD}, "token": token}
+        assert list(daemon.request(message, port=port)) == [{"status": "error", "error": "Неверный токен сервиса"}]
+    assert daemon.status(port=port)["jobs"] == []
+
+    final = list(daemon.submit({"network": "evm", "count": 2, "password": PASSWORD}, port=port))[-1]
+    assert final["status"] == "ok"
+    daemon.stop(port=port)
+    thread.join(60)
+    assert not os.path.exists(daemon.TOKEN_FILE)
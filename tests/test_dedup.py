@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import cli
+import core
+import dedup
+import engine
+import container
+import pipeline
+import watchonly
+from conftest import PASSWORD
+
+TARGETS = [("networks.evm", {"public_keys": True}, "ETH")]
+
+
+def _records_on_disk(path):
+    """
+    Записи всех целых кадров файла, в том числе недописанного (без футера).
+    """
+    records = []
+    with open(path, "rb") as f:
+        header, salt = container.read_header(f)
+        key = core.file_key(PASSWORD, header, salt)
+        try:
+            for _, _, chunk in container.iter_located_chunks(f, key, header):
+                records.extend(chunk)
+        except container.ContainerError:
+            pass
+    return records
+
+
+def _replaying(old_records):
+    """
+    Источник пачек: свежая пачка, затем пачка с уже выданной записью.
+    """
+    def source(targets, count, words_num, passphrase):
+        fresh = next(engine.generate_multi_wallets(targets, 2, words_num, passphrase))
+        yield fresh
+        yield 1, old_records[:1]
+    return source
+
+
+@pytest.mark.parametrize("checkpoint", [True, False])
+def test_duplicate_never_reaches_disk(workdir, checkpoint):
+    first = cli.run_job({"network": "evm", "count": 3, "password": PASSWORD})["output"]
+    old = core.decrypt_data(first, PASSWORD)
+    old_addresses = {r["address"] for r in old}
+
+    filepath = os.path.join(core.ENC_DIR, "wallets_ETH_dup.enc")
+    with pytest.raises(dedup.DuplicateAddressError) as e:
+        pipeline.generate_to_file(TARGETS, 3, 12, filepath, PASSWORD, source=_replaying(old),
+                                  checkpoint=checkpoint, watch=True)
+    assert e.value.address.lower() in {a.lower() for a in old_addresses}
+
+    if not checkpoint:
+        # Без контрольных точек недописанный файл удаляется целиком
+        assert not os.path.exists(filepath)
+        return
+    on_disk = _records_on_disk(pipeline.part_path(filepath))
+    assert not old_addresses & {r["address"] for r in on_disk}
+    watch_file = pipeline.part_path(watchonly.watch_path(filepath))
+    with open(watch_file, encoding="utf-8") as f:
+        assert not any(address in f.read() for address in old_addresses)
+
+
+def test_writer_skips_frame_on_duplicate(workdir):
+    record = {"network": "ETH", "address": "0x" + "11" * 20}
+    with core.open_writer(os.path.join(core.ENC_DIR, "a.enc"), PASSWORD, indexed=False) as w:
+        w.write(record)
+
+    path = os.path.join(core.ENC_DIR, "b.enc")
+    with pytest.raises(dedup.DuplicateAddressError):
+        with core.open_writer(path, PASSWORD, indexed=False, chunk_records=1) as w:
+            w.write({"network": "ETH", "address": "0x" + "22" * 20})
+            size = w.f.tell()
+            w.write(record)
+    assert os.path.getsize(path) == size
+    assert [r["address"] for r in _records_on_disk(path)] == ["0x" + "22" * 20]
@@ -0,0 +1,158 @@
+"""
+Пакетная деривация (derivation.path_nodes_batch, generate_batch модулей) против bip_utils
+и обычного generate() — ключи должны совпадать бит в бит.
+"""
+import hmac
+import random
+import importlib.util
+from types import SimpleNamespace
+
+import pytest
+from bip_utils import Bip32Secp256k1, Bip32Slip10Ed25519, Bip44, Bip44Coins, Secp256k1
+
+import derivation
+import registry
+
+N = Secp256k1.Order()
+
+
+def _seeds(count=40, seed=0):
+    rng = random.Random(seed)
+    return [rng.randbytes(64) for _ in range(count)]
+
+
+def _same_node(batch_node, reference):
+    assert batch_node.PrivateKey().Raw().ToBytes() == reference.PrivateKey().Raw().ToBytes()
+    assert batch_node.ChainCode().ToBytes() == reference.ChainCode().ToBytes()
+    assert int(batch_node.Depth()) == int(reference.Depth())
+    assert int(batch_node.Index()) == int(reference.Index())
+    assert batch_node.PublicKey().RawCompressed().ToBytes() == reference.PublicKey().RawCompressed().ToBytes()
+
+
+@pytest.mark.parametrize("path", [
+    "m/0",
+    "m/0'",
+    "m/44'/60'/0'/0/0",
+    "m/84'/0'/0'/0/7",
+    "m/1/2/3/4/5",
+    "m/2147483647'/2147483647/0'/1",
+    "m/0'/1/2'/2/1000000000",
+])
+def test_secp256k1_matches_bip_utils(path):
+    seeds = _seeds()
+    for seed_bytes, node in zip(seeds, derivation.path_nodes_batch(seeds, Bip32Secp256k1, path)):
+        assert node is not None and node[0] == path
+        _same_node(node[1], Bip32Secp256k1.FromSeed(seed_bytes).DerivePath(path))
+
+
+@pytest.mark.parametrize("path, hardened", [
+    ("m/44'/501'/0'/0'", "m/44'/501'/0'/0'"),
+    ("m/44'/784'/0'/0'/0'", "m/44'/784'/0'/0'/0'"),
+    # ed25519 — только hardened: не-hardened уровни усиливаются, как в iter_path_nodes
+    ("m/44'/501'/0'/0", "m/44'/501'/0'/0'"),
+])
+def test_ed25519_matches_bip_utils(path, hardened):
+    seeds = _seeds()
+    for seed_bytes, node in zip(seeds, derivation.path_nodes_batch(seeds, Bip32Slip10Ed25519, path)):
+        assert node[0] == hardened
+        _same_node(node[1], Bip32Slip10Ed25519.FromSeed(seed_bytes).DerivePath(hardened))
+
+
+def test_ranges_are_rejected():
+    with pytest.raises(ValueError):
+        derivation.path_nodes_batch(_seeds(1), Bip32Secp256k1, "m/44'/60'/0'/0/{0..3}")
+
+
+# --- НЕДОПУСТИМЫЕ КЛЮЧИ ---
+
+def _forged_hmac(step, forge):
+    """
+    hmac.digest, у которого на шаге `step` (0 — мастер-ключ) левая половина заменена
+    на forge(data): так проверяются ветки, вероятность которых ~2^-127.
+    """
+    calls = [0]
+
+    def digest(key, data, name):
+        result = hmac.digest(key, data, name)
+        calls[0] += 1
+        if calls[0] - 1 == step:
+            return forge(data).to_bytes(32, "big") + result[32:]
+        return result
+    return SimpleNamespace(digest=digest)
+
+
+@pytest.mark.parametrize("step, forge", [
+    (0, lambda data: 0),                                    # мастер-ключ = 0
+    (0, lambda data: N),                                    # мастер-ключ >= n
+    (2, lambda data: N),                                    # IL = n
+    (2, lambda data: 2 ** 256 - 1),                         # IL > n
+    (2, lambda data: N - int.from_bytes(data[1:33], "big")),  # hardened: ключ ребёнка = 0
+])
+def test_invalid_key_falls_back(monkeypatch, step, forge):
+    seeds = _seeds(3)
+    monkeypatch.setattr(derivation, "hmac", _forged_hmac(step, forge))
+    assert derivation._derive_raw(seeds[0], b"Bitcoin seed", [2 ** 31, 2 ** 31 + 1, 0], True) is None
+
+
+def test_invalid_non_hardened_child(monkeypatch):
+    seed_bytes = _seeds(1)[0]
+    parent = Bip32Secp256k1.FromSeed(seed_bytes).DerivePath("m/0'")
+    parent_key = int.from_bytes(parent.PrivateKey().Raw().ToBytes(), "big")
+    # Не-hardened уровень: в HMAC идёт открытый ключ, ключ ребёнка = (IL + parent) mod n = 0
+    monkeypatch.setattr(derivation, "hmac", _forged_hmac(2, lambda data: N - parent_key))
+    assert derivation._derive_raw(seed_bytes, b"Bitcoin seed", [2 ** 31, 5], True) is None
+
+
+def test_module_batch_uses_generate_for_invalid_seed(monkeypatch):
+    # Сбойный seed считает generate() модуля, остальные — быстрый путь
+    import networks.evm as evm
+    seeds = _seeds(4)
+    expected = [evm.NetworkGenerator.generate(s) for s in seeds]
+    real = derivation._derive_raw
+    monkeypatch.setattr(derivation, "_derive_raw",
+                        lambda seed_bytes, *args: None if seed_bytes == seeds[2] else real(seed_bytes, *args))
+    fallback = []
+
+    def generate(seed_bytes):
+        fallback.append(seed_bytes)
+        return evm.NetworkGenerator.generate(seed_bytes)
+
+    assert derivation.derive_keys_batch(seeds, Bip44, Bip44Coins.ETHEREUM, None, evm._keys, generate) == expected
+    assert fallback == [seeds[2]]
+
+
+# --- generate_batch МОДУЛЕЙ ---
+
+MODULE_CASES = [
+    ("networks.evm", None),
+    ("networks.evm", {"address_range": "0..2"}),
+    ("networks.evm", {"public_keys": True}),
+    ("networks.btc", None),
+    ("networks.btc", {"mode": "TAPROOT"}),
+    ("networks.btc", {"mode": "LEGACY"}),
+    ("networks.btc", {"mode": "NESTED"}),
+    ("networks.btc", {"mode": "NATIVE", "account_range": "0..1"}),
+    ("networks.sol", None),
+    ("networks.sol", {"address_range": "0..2"}),
+    ("networks.sui", None),
+    ("networks.cosmos", None),
+    ("networks.cosmos", {"prefixes": ["cosmos", "osmo", ["kava", 459]]}),
+    ("networks.cosmos", {"prefixes": ["cosmos"], "address_range": "0..1"}),
+    ("networks.polkadot", None),
+]
+
+
+@pytest.mark.parametrize("module_name, config", MODULE_CASES)
+def test_generate_batch_matches_generate(module_name, config):
+    if module_name == "networks.polkadot" and importlib.util.find_spec("substrateinterface") is None:
+        pytest.skip("substrate-interface не установлен")
+    import mnemonics
+    from bip_utils import Bip39SeedGenerator
+
+    generator = registry.load_plugin(module_name)
+    phrases = [mnemonics.encode(random.Random(i).randbytes(16)) for i in range(12)]
+    seeds = [Bip39SeedGenerator(p).Generate("") for p in phrases]
+
+    batch = registry.make_batch_caller(generator, config)
+    single = registry.make_caller(generator, config)
+    assert batch(seeds, phrases) == [single(s, p, None) for s, p in zip(seeds, phrases)]
@@ -0,0 +1,73 @@
+import os
+import csv
+import json
+
+import pytest
+
+import cli
+import core
+import export
+from conftest import PASSWORD
+
+
+def _generate(network, tag, password=PASSWORD, count=4):
+    return cli.run_job({"network": network, "count": count, "password": password, "tag": tag,
+                        "dedup": False})["output"]
+
+
+@pytest.fixture
+def files(workdir):
+    """
+    Два файла с общим паролем и один с другим — между ними, чтобы порядок частей был виден.
+    """
+    return [_generate("evm", "a"), _generate("evm", "b", password="other password", count=2),
+            _generate("btc", "c", count=3)]
+
+
+def _read(output, fmt):
+    with open(output, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("fmt", export.FORMATS)
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_round_trip(files, fmt, workers):
+    output = os.path.join("export", f"all.{fmt}")
+    reported = []
+    summary = export.export_files(files, PASSWORD, output, workers=workers, on_file=reported.append)
+    assert summary == {**summary, "files": 3, "failed": 1, "records": 7, "output": output}
+
+    # Файл с чужим паролем — ошибка в отчёте, остальные выгружены
+    by_file = {r["file"]: r for r in reported}
+    assert by_file[files[1]]["status"] == "error"
+    assert by_file[files[0]]["status"] == by_file[files[2]]["status"] == "ok"
+    assert by_file[files[2]]["records"] == 3
+
+    rows = _read(output, fmt)
+    expected = [(path, record) for path in (files[0], files[2]) for record in core.decrypt_data(path, PASSWORD)]
+    assert len(rows) == len(expected)
+    for row, (path, record) in zip(rows, expected):
+        assert row["source_file"] == os.path.basename(path)
+        if fmt == "jsonl":
+            assert row == {"source_file": os.path.basename(path), **record}
+        else:
+            # Колонки CSV — объединение полей всех файлов, чужие поля пустые
+            assert {k: v for k, v in row.items() if v != ""} == \
+                   {"source_file": os.path.basename(path), **{k: str(v) for k, v in record.items() if v != ""}}
+
+    # Временные части удалены
+    assert os.listdir("export") == [f"all.{fmt}"]
+
+
+def test_find_files(files):
+    assert export.find_files() == sorted(files)
+    pattern = os.path.join(core.ENC_DIR, "*.enc")
+    assert export.find_files([pattern, files[0]]) == sorted(files)
+    assert export.find_files([os.path.join(core.ENC_DIR, "*BTC*.enc")]) == [files[2]]
+
+
+def test_unknown_format(files):
+    with pytest.raises(ValueError):
+        export.export_files(files, PASSWORD, "all.xml", fmt="xml")
@@ -0,0 +1,39 @@
+import os
+
+import cli
+import core
+import audit
+from conftest import PASSWORD, TEST_MNEMONIC
+
+
+def _import(monkeypatch, source, *options):
+    monkeypatch.setenv("KF_TEST_PASS", PASSWORD)
+    output = os.path.join(core.ENC_DIR, "imported.enc")
+    code = cli.main(["import", source, "--workers", "1", "--password-env", "KF_TEST_PASS",
+                     "--output", output, *options])
+    return code, output
+
+
+def test_text_import_then_audit(workdir, monkeypatch, capsys):
+    with open("mnemonics.txt", "w", encoding="utf-8") as f:
+        f.write(f"# комментарий\n{TEST_MNEMONIC}\n\nabandon abandon\n{TEST_MNEMONIC.upper()}\n")
+    code, output = _import(monkeypatch, "mnemonics.txt", "--networks", "evm,sol")
+
+    # Строка 4 отбракована с номером — код возврата 1, остальное записано
+    assert code == 1
+    assert '"line": 4' in capsys.readouterr().out
+    records = core.decrypt_data(output, PASSWORD)
+    assert [r["mnemonic"] for r in records] == [TEST_MNEMONIC, TEST_MNEMONIC]
+    assert records[0]["ETH_address"] == "0x9858EfFD232B4033E47d90003D41EC34EcaEda94"
+    assert list(audit.audit_file(output, PASSWORD))[-1]["status"] == "ok"
+
+
+def test_enc_import_keeps_passphrases(workdir, monkeypatch):
+    source = cli.run_job({"network": "btc", "count": 4, "password": PASSWORD, "passphrase": "p1"})["output"]
+    code, output = _import(monkeypatch, source, "--network", "sui")
+    assert code == 0
+    original = core.decrypt_data(source, PASSWORD)
+    imported = core.decrypt_data(output, PASSWORD)
+    assert [(r["mnemonic"], r["passphrase"]) for r in imported] == [(r["mnemonic"], "p1") for r in original]
+    assert list(audit.audit_file(output, PASSWORD))[-1]["status"] == "ok"
+
@@ -0,0 +1,88 @@
+import os
+import shutil
+
+import cli
+import core
+import index
+from conftest import PASSWORD
+
+
+def _generate(network, count=4, **job):
+    result = cli.run_job({"network": network, "count": count, "password": PASSWORD, "dedup": False, **job})
+    return result["output"]
+
+
+def _records(path):
+    return core.decrypt_data(path, PASSWORD)
+
+
+def test_lookup_from_two_files(workdir):
+    files = {"one": _generate("evm", tag="one"), "two": _generate("btc", tag="two")}
+    for tag, path in files.items():
+        assert index.is_fresh(path)
+        for record in _records(path):
+            matches = index.lookup(record["address"])
+            assert len(matches) == 1
+            match = matches[0]
+            assert match["file"] == os.path.abspath(path)
+            assert match["tag"] == tag
+            # Расшифровывается только нужный кадр, запись та же
+            assert index.fetch(match, PASSWORD) == record
+    # EVM-адрес находится без учёта регистра
+    evm = _records(files["one"])[0]["address"]
+    assert index.lookup(evm.upper().replace("0X", "0x"))
+    assert index.lookup("0x" + "0" * 40) == []
+    assert [r["status"] for r in index.verify(PASSWORD)] == ["ok", "ok"]
+
+
+def test_rewritten_file_goes_stale(workdir):
+    path = _generate("evm")
+    old = _records(path)[0]["address"]
+    shutil.copyfile(_generate("evm", output="wallets_encrypted/other.enc"), path)
+
+    assert not index.is_fresh(path)
+    statuses = {r["file"]: r["status"] for r in index.verify()}
+    assert statuses[os.path.abspath(path)] == "stale"
+
+    assert [r["status"] for r in index.build([path], PASSWORD)] == ["indexed"]
+    assert index.is_fresh(path)
+    assert index.lookup(old) == []
+    new = _records(path)[0]
+    assert index.fetch(index.lookup(new["address"])[0], PASSWORD) == new
+    assert [r["status"] for r in index.build([path], PASSWORD)] == ["fresh"]
+
+
+def test_deep_check_catches_wrong_location(workdir):
+    path = _generate("evm", count=6)
+    for column in ("chunk", "offset", "position"):
+        db = index.connect()
+        with db:
+            db.execute(f"UPDATE addresses SET {column} = {column} + 1 WHERE rowid = "
+                       "(SELECT MIN(rowid) FROM addresses)")
+        db.close()
+        # Без пароля файл выглядит целым, проверка с расшифровкой — нет
+        assert [r["status"] for r in index.verify()] == ["ok"]
+        assert [r["status"] for r in index.verify(PASSWORD)] == ["mismatch"]
+        assert [r["status"] for r in index.build([path], PASSWORD, force=True)] == ["indexed"]
+        assert [r["status"] for r in index.verify(PASSWORD)] == ["ok"]
+
+
+def test_missing_unindexed_and_wrong_password(workdir):
+    path = _generate("evm")
+    index.clear()
+    assert [r["status"] for r in index.verify()] == ["unindexed"]
+    assert [r["status"] for r in index.build([path], "wrong password")] == ["error"]
+    assert [r["status"] for r in index.build([path], PASSWORD)] == ["indexed"]
+    os.remove(path)
+    assert [r["status"] for r in index.verify()] == ["missing"]
+
+
+def test_collector_spills_to_disk(workdir, monkeypatch):
+    monkeypatch.setattr(index, "SPILL_ROWS", 3)
+    records = [{"network": "BTC", "address": f"a{i}", "ETH_address": f"0xE{i}"} for i in range(5)]
+    collector = index.Collector()
+    collector.on_chunk(0, 7, records)
+    rows = list(collector.iter_rows())
+    assert collector.records == 5 and collector.network == "BTC"
+    assert rows[:2] == [("a0", "BTC", 0, 7, 0), ("0xe0", "ETH", 0, 7, 0)]
+    assert len(rows) == 10 and rows[-1] == ("0xe4", "ETH", 0, 7, 4)
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import cli
+import metrics
+from conftest import PASSWORD
+
+
+def _histogram(*seconds):
+    h = metrics.Histogram()
+    for value in seconds:
+        h.observe(value)
+    return h
+
+
+def test_quantile_interpolates_inside_bucket():
+    # Все значения в корзине (0.0001, 0.0005] — медиана не прилипает к её верхней границе
+    h = _histogram(*[0.0002] * 10)
+    assert h.quantile(0.5) == pytest.approx(0.0003)
+    assert h.quantile(1.0) == pytest.approx(0.0005)
+    assert 0.0001 < h.quantile(0.01) < h.quantile(0.5)
+
+    h = _histogram(0.000005, 0.000005, 0.003, 0.003)
+    assert h.quantile(0.25) == pytest.approx(0.000005)
+    assert h.quantile(0.5) == pytest.approx(0.00001)
+    assert h.quantile(0.75) == pytest.approx(0.00375)
+
+    assert _histogram(60.0).quantile(0.99) == metrics.BUCKETS[-1]
+    assert metrics.Histogram().quantile(0.5) == 0.0
+
+
+def test_snapshot_and_merge():
+    worker = metrics.Metrics()
+    worker.observe("seed", 0.002, "ETH")
+    worker.observe("seed", 0.004, "BTC")
+    worker.observe("kdf", 0.3, "")
+    worker.count("wallets", 3, "ETH")
+
+    data = json.loads(json.dumps(worker.snapshot()))
+    assert not worker.stages and not worker.counters
+
+    main = metrics.Metrics()
+    main.count("wallets", 2, "ETH")
+    main.merge(data)
+    main.merge(data)
+    assert main.counters[("wallets", "ETH")] == 8
+    assert main.stages[("seed", "ETH")].count == 2
+    assert main.stages[("seed", "BTC")].total == pytest.approx(0.008)
+
+    report = main.to_dict()
+    assert report["counters"] == {"wallets": {"ETH": 8}}
+    seed = report["stages"]["seed"]["ETH"]
+    assert seed["count"] == 2 and seed["avg_ms"] == pytest.approx(2.0)
+    assert seed["p50_ms"] <= seed["p99_ms"] <= 2.5
+    assert set(report["stages"]["kdf"]) == {"all"}
+
+
+def test_prometheus_export(tmp_path):
+    m = metrics.Metrics()
+    for value in (0.00002, 0.0002, 0.0002, 20.0):
+        m.observe("derive", value, "SOL")
+    m.count("errors", 1, "SOL")
+
+    lines = m.to_prometheus().splitlines()
+    labels = 'stage="derive",network="SOL"'
+    buckets = [line for line in lines if line.startswith(f"keyforge_stage_seconds_bucket{{{labels}")]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    # Корзины накопительные, последняя — +Inf со всеми наблюдениями
+    assert len(buckets) == len(metrics.BUCKETS) + 1
+    assert counts == sorted(counts) and counts[-1] == 4
+    assert f'keyforge_stage_seconds_bucket{{{labels},le="5e-05"}} 1' in lines
+    assert f'keyforge_stage_seconds_bucket{{{labels},le="0.0005"}} 3' in lines
+    assert f'keyforge_stage_seconds_bucket{{{labels},le="10.0"}} 3' in lines
+    assert f"keyforge_stage_seconds_count{{{labels}}} 4" in lines
+    assert 'keyforge_errors_total{network="SOL"} 1' in lines
+
+    m.write(str(tmp_path / "run.prom"))
+    m.write(str(tmp_path / "run.json"))
+    assert (tmp_path / "run.prom").read_text(encoding="utf-8") == m.to_prometheus()
+    assert json.loads((tmp_path / "run.json").read_text(encoding="utf-8"))["counters"] == {"errors": {"SOL": 1}}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_generation_metrics_by_network(workdir, workers):
+    metrics.enable()
+    try:
+        cli.run_job({"networks": ["evm", "sol"], "count": 5, "workers": workers, "password": PASSWORD})
+    finally:
+        m = metrics.disable()
+    report = m.to_dict()
+    assert report["counters"]["wallets"] == {"ETH-SOL": 5}
+    # derive — по каждой сети, этапы записи и bip32 — общие
+    assert set(report["stages"]["derive"]) == {"ETH", "SOL"}
+    assert report["stages"]["derive"]["ETH"]["count"] == 5
+    assert set(report["stages"]["seed"]) == {"ETH-SOL"}
+    for stage in ("bip32", "encrypt", "write", "kdf"):
+        assert set(report["stages"][stage]) == {"all"}
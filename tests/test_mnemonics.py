@@ -0,0 +1,41 @@
+import random
+
+import pytest
+from bip_utils import Bip39MnemonicGenerator
+
+import mnemonics
+
+
+def _entropies(entropy_len, count=200, seed=0):
+    rng = random.Random(seed + entropy_len)
+    return [bytes(entropy_len), b"\xff" * entropy_len] + [rng.randbytes(entropy_len) for _ in range(count)]
+
+
+@pytest.mark.parametrize("words_num", [12, 15, 18, 21, 24])
+def test_encode_matches_bip_utils(words_num):
+    for entropy in _entropies(mnemonics.ENTROPY_BYTES[words_num]):
+        assert mnemonics.encode(entropy) == str(Bip39MnemonicGenerator().FromEntropy(entropy)), entropy.hex()
+
+
+def test_encode_block_matches_encode():
+    block = random.Random(1).randbytes(16 * 10)
+    assert mnemonics.encode_block(block, 16) == [mnemonics.encode(block[i:i + 16]) for i in range(0, 160, 16)]
+
+
+def test_iter_mnemonics_are_valid():
+    source = mnemonics.iter_mnemonics(24, block_size=4)
+    for _ in range(20):
+        mnemonic = next(source)
+        assert len(mnemonic.split()) == 24
+        assert mnemonics.check(mnemonic) is None
+
+
+def test_encode_rejects_bad_length():
+    with pytest.raises(ValueError):
+        mnemonics.encode(bytes(17))
+
+
+def test_check_rejects_bad_checksum():
+    assert mnemonics.check("abandon " * 11 + "about") is None
+    assert mnemonics.check("abandon " * 12 + "about") is not None
+    assert mnemonics.check("abandon " * 11 + "abandon") == "Неверная контрольная сумма"
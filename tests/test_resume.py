@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+import core
+import pipeline
+from conftest import PASSWORD
+
+TARGETS = [("networks.evm", {}, "ETH")]
+
+
+def _interrupted_job(passphrase, count=6):
+    """
+    Задание, прерванное после первой пачки: .part + .job.json, как после Ctrl+C.
+    """
+    filepath = os.path.join(core.ENC_DIR, "wallets_ETH_test.enc")
+
+    def stop_after_first(size, records):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        pipeline.generate_to_file(TARGETS, count, 12, filepath, PASSWORD, passphrase,
+                                  on_progress=stop_after_first, source=_chunks_of(2))
+    path = pipeline.state_path(filepath)
+    assert os.path.exists(path)
+    return filepath, path
+
+
+def _chunks_of(size):
+    import engine
+    return lambda targets, count, words_num, passphrase: engine.generate_multi_wallets(
+        targets, count, words_num, passphrase, chunk_size=size)
+
+
+def test_state_stores_fingerprint_not_passphrase(workdir):
+    _, path = _interrupted_job("secret phrase")
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    assert "secret phrase" not in text
+    assert pipeline.load_state(path)["passphrase_check"]["digest"]
+
+
+def test_resume_rejects_other_passphrase(workdir):
+    _, path = _interrupted_job("secret phrase")
+    with pytest.raises(pipeline.ResumeError):
+        pipeline.resume(path, PASSWORD, "other phrase")
+    with pytest.raises(pipeline.ResumeError):
+        pipeline.resume(path, PASSWORD, "")
+
+
+def test_resume_with_same_passphrase(workdir):
+    filepath, path = _interrupted_job("secret phrase")
+    state, records = pipeline.resume(path, PASSWORD, "secret phrase")
+    assert records == 6
+    assert {r["passphrase"] for r in core.decrypt_data(filepath, PASSWORD)} == {"secret phrase"}
+
+
+def test_resume_without_passphrase_ignores_given_one(workdir):
+    filepath, path = _interrupted_job("")
+    pipeline.resume(path, PASSWORD, "stray phrase")
+    assert {r["passphrase"] for r in core.decrypt_data(filepath, PASSWORD)} == {""}
@@ -0,0 +1,26 @@
+import pytest
+
+import cli
+import core
+import audit
+import vault
+from conftest import PASSWORD
+
+
+@pytest.fixture
+def opened_vault(workdir):
+    vault.create(PASSWORD)
+    yield
+    vault.lock_all()
+
+
+def test_vault_encrypted_round_trip(opened_vault):
+    result = cli.run_job({"network": "evm", "count": 3, "password": PASSWORD, "vault": True})
+    assert len(core.decrypt_data(result["output"], PASSWORD)) == 3
+    assert list(audit.audit_file(result["output"], PASSWORD))[-1]["status"] == "ok"
+
+
+def test_wrong_vault_password(opened_vault):
+    vault.lock_all()
+    with pytest.raises(vault.VaultError):
+        vault.unlock("wrong password")
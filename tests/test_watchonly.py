@@ -0,0 +1,65 @@
+import pytest
+from bip_utils import Bip44, Bip44Coins, Bip44Changes, Bip84, Bip84Coins, Secp256k1PrivateKey
+from bip_utils.bech32 import Bech32Encoder
+
+import cli
+import core
+import watchonly
+from networks.cosmos import hash160
+from conftest import PASSWORD
+
+
+def _watch_job(network, config=None):
+    result = cli.run_job({"network": network, "config": config, "count": 3, "password": PASSWORD,
+                          "watch": True, "dedup": False})
+    return result["output"], list(watchonly.iter_watch(watchonly.watch_path(result["output"])))
+
+
+def _watch_records(network, config=None):
+    return _watch_job(network, config)[1]
+
+
+@pytest.mark.parametrize("network, path, bip_cls, coin", [
+    ("evm", "m/44'/60'/0'/0/0", Bip44, Bip44Coins.ETHEREUM),
+    ("btc", "m/84'/0'/0'/0/0", Bip84, Bip84Coins.BITCOIN),
+])
+def test_default_path_in_watch_file(workdir, network, path, bip_cls, coin):
+    for record in _watch_records(network):
+        assert record["path"] == path
+        # Наблюдатель выводит адрес из xpub аккаунта и хвоста пути, без seed
+        change, index = record["path"].split("/")[4:]
+        account = bip_cls.FromExtendedKey(record["xpub"], coin)
+        node = account.Change(Bip44Changes(int(change))).AddressIndex(int(index))
+        assert node.PublicKey().RawCompressed().ToHex() == record["public_key"]
+        assert node.PublicKey().ToAddress() == record["address"]
+        assert "private_key" not in record and "mnemonic" not in record
+
+
+def test_ed25519_watch_has_path(workdir):
+    for record in _watch_records("sol"):
+        assert record["path"] == "m/44'/501'/0'/0'"
+        assert "xpub" not in record
+
+
+def _cosmos_public(private_key):
+    return Secp256k1PrivateKey.FromBytes(bytes.fromhex(private_key)).PublicKey().RawCompressed().ToHex()
+
+
+@pytest.mark.parametrize("config", [
+    None,
+    {"prefixes": [["cosmos", 118], ["osmo", 118], ["kava", 459]]},
+])
+def test_cosmos_watch_has_public_key(workdir, config):
+    output, watch = _watch_job("cosmos", config)
+    for record, secret in zip(watch, core.decrypt_data(output, PASSWORD)):
+        assert record["path"] == "m/44'/118'/0'/0/0"
+        assert record["public_key"] == _cosmos_public(secret["private_key"])
+        assert record["address"] == Bech32Encoder.Encode("cosmos", hash160(bytes.fromhex(record["public_key"])))
+        assert "private_key" not in record
+        if config:
+            # Другой coin_type — свой ключ и свой public_key; префиксы с тем же coin_type — общий
+            assert "osmo_public_key" not in record
+            assert record["kava_public_key"] == _cosmos_public(secret["kava_private_key"])
+            assert record["kava_public_key"] != record["public_key"]
+            assert record["kava_address"] == Bech32Encoder.Encode(
+                "kava", hash160(bytes.fromhex(record["kava_public_key"])))
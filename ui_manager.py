@@ -1,11 +1,46 @@
-import questionary
-from questionary import Style
-from rich.console import Console
-from rich.panel import Panel
-import pyfiglet
+"""
+Стили и вывод интерфейса.
+
+rich, questionary и pyfiglet импортируются при первом обращении, а не при импорте
+модуля: консоль rich создаётся при первом выводе, custom_style и RateColumn
+строятся при первом доступе (__getattr__ модуля), а баннер печатается готовыми
+ANSI-строками из кэша (data/banner.ans) — до первого меню не нужно рендерить
+figlet и разметку rich. Время старта: python bench.py --startup.
+"""
+import os
+import re
+import sys
+import shutil
+import hashlib
+
+BANNER_FONT = "slant"
+BANNER_CACHE = os.path.join("data", "banner.ans")
+
+# Консоль rich и баннер процесса
+_cache = {}
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+
+def get_console():
+    """
+    Консоль rich (создаётся один раз) — для Progress(console=...) и т.п.
+    """
+    if "console" not in _cache:
+        from rich.console import Console
+        _cache["console"] = Console()
+    return _cache["console"]
+
+
+class _LazyConsole:
+    """
+    Заменитель rich.Console: console.print(...) создаёт настоящую консоль при первом вызове.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_console(), name)
+
 
-# Инициализация консоли Rich
-console = Console()
+console = _LazyConsole()
 
 # --- 1. ЦВЕТОВАЯ ГАММА ---
 COLOR_MAIN = "#00FF00"  # Зеленый (Успех/Основной)
@@ -25,7 +60,7 @@ APP_DESCRIPTION = (
 )
 
 # --- 3. СТИЛЬ QUESTIONARY ---
-custom_style = Style([
+STYLE_RULES = [
     ('qmark', f'fg:{COLOR_MAIN} bold'),
     ('question', 'bold'),
     ('answer', f'fg:{COLOR_ACCENT} bold'),
@@ -36,35 +71,95 @@ custom_style = Style([
     ('instruction', f'fg:{COLOR_MUTED} italic'),
     ('text', f'fg:{COLOR_MAIN}'),
     ('completion-menu', 'bg:#202020 fg:white'),
-])
+]
 
 
 # --- 4. ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ---
 
-def print_banner(extra_info=""):
-    """
-    Выводит ASCII заголовок и описание.
-    """
-    console.clear()
+def _render_banner(out):
+    from rich.panel import Panel
+    import pyfiglet
 
     # Генерируем ASCII баннер
     try:
         # Шрифт 'slant' - наклонный, 'rectangles' - строгий, 'standard' - классика
-        ascii_art = pyfiglet.figlet_format(APP_NAME, font="slant")
+        ascii_art = pyfiglet.figlet_format(APP_NAME, font=BANNER_FONT)
     except:
         ascii_art = f"{APP_NAME}\n"
 
     # Выводим баннер (Зеленым)
-    console.print(f"[bold {COLOR_MAIN}]{ascii_art}[/bold {COLOR_MAIN}]")
+    out.print(f"[bold {COLOR_MAIN}]{ascii_art}[/bold {COLOR_MAIN}]")
 
     # Выводим описание в рамке
-    console.print(Panel.fit(
+    out.print(Panel.fit(
         f"[bold white]{APP_DESCRIPTION}[/bold white]",
         border_style=COLOR_MAIN,
         padding=(0, 2)
     ))
 
 
+def _banner_key():
+    # Тот же текст, шрифт и цвета в том же терминале — тот же баннер
+    parts = (APP_NAME, APP_DESCRIPTION, BANNER_FONT, COLOR_MAIN,
+             os.environ.get("TERM", ""), os.environ.get("COLORTERM", ""))
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+
+def _cached_banner():
+    """
+    (ширина, ANSI-текст) баннера: из памяти, из data/banner.ans или рендер rich с записью в кэш.
+    """
+    key = _banner_key()
+    if _cache.get("key") == key:
+        return _cache["width"], _cache["ansi"]
+    try:
+        with open(BANNER_CACHE, "r", encoding="utf-8") as f:
+            cached_key, width = f.readline().split()
+            ansi = f.read()
+        if cached_key != key:
+            raise ValueError(cached_key)
+        width = int(width)
+    except (OSError, ValueError):
+        out = get_console()
+        with out.capture() as capture:
+            _render_banner(out)
+        ansi = capture.get()
+        width = max((len(_ANSI_ESCAPE.sub("", line)) for line in ansi.splitlines()), default=0)
+        try:
+            os.makedirs(os.path.dirname(BANNER_CACHE), exist_ok=True)
+            with open(BANNER_CACHE, "w", encoding="utf-8") as f:
+                f.write(f"{key} {width}\n{ansi}")
+        except OSError:
+            pass
+    _cache.update(key=key, width=width, ansi=ansi)
+    return width, ansi
+
+
+def _raw_terminal():
+    # Готовые ANSI-строки можно писать напрямую только в терминал с escape-кодами
+    # (на Windows их включает rich, кроме Windows Terminal)
+    return (sys.stdout.isatty() and "NO_COLOR" not in os.environ
+            and (os.name != "nt" or "WT_SESSION" in os.environ))
+
+
+def print_banner(extra_info=""):
+    """
+    Очищает экран, выводит ASCII заголовок и описание.
+    """
+    if not _raw_terminal():
+        console.clear()
+        _render_banner(console)
+        return
+    width, ansi = _cached_banner()
+    if width > shutil.get_terminal_size().columns:
+        # Узкий терминал: rich перенесёт строки сам
+        console.clear()
+        _render_banner(console)
+        return
+    sys.stdout.write("\x1b[2J\x1b[H" + ansi)
+    sys.stdout.flush()
+
+
 def print_success(text):
     console.print(f"[bold {COLOR_MAIN}]✅ {text}[/bold {COLOR_MAIN}]")
 
@@ -73,9 +168,57 @@ def print_error(text):
     console.print(f"[bold {COLOR_ERROR}]❌ {text}[/bold {COLOR_ERROR}]")
 
 
+def print_alert(title, text):
+    """
+    Критическое предупреждение в красной рамке (например, дубликат адреса).
+    """
+    from rich.panel import Panel
+    console.print(Panel(
+        f"[bold white]{text}[/bold white]",
+        title=f"[bold {COLOR_ERROR}]🚨 {title}[/bold {COLOR_ERROR}]",
+        border_style=COLOR_ERROR,
+        padding=(1, 2)
+    ))
+
+
 def print_info(text):
     console.print(f"[bold {COLOR_ACCENT}]ℹ️  {text}[/bold {COLOR_ACCENT}]")
 
 
 def print_step(text):
-    console.print(f"\n[{COLOR_WARNING}]➤ {text}[/{COLOR_WARNING}]")
\ No newline at end of file
+    console.print(f"\n[{COLOR_WARNING}]➤ {text}[/{COLOR_WARNING}]")
+
+
+def _rate_column():
+    from rich.progress import ProgressColumn
+    from rich.text import Text
+
+    class RateColumn(ProgressColumn):
+        """
+        Текущая скорость задачи в кошельках/сек.
+        """
+
+        def render(self, task):
+            speed = task.finished_speed or task.speed
+            if speed is None:
+                return Text("-- шт/с", style=COLOR_MUTED)
+            return Text(f"{speed:,.0f} шт/с".replace(",", " "), style=COLOR_ACCENT)
+
+    return RateColumn
+
+
+def _custom_style():
+    from questionary import Style
+    return Style(STYLE_RULES)
+
+
+_LAZY = {"RateColumn": _rate_column, "custom_style": _custom_style}
+
+
+def __getattr__(name):
+    # ui_manager.custom_style / ui_manager.RateColumn строятся при первом обращении
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = _LAZY[name]()
+    globals()[name] = value
+    return value
@@ -0,0 +1,208 @@
+"""
+Поиск vanity-адресов (заданное начало и/или конец адреса) на всех ядрах.
+
+Полный путь мнемоника -> PBKDF2 для каждого кандидата слишком дорог, поэтому
+каждая попытка — это следующий адрес той же мнемоники: одна мнемоника даёт
+BATCH адресов через диапазон address_range (см. derivation.py), на адрес
+приходится только последняя дочерняя деривация и кодирование. Адреса
+кодирует сам модуль сети (networks/evm.py, cosmos.py, sol.py, btc.py...),
+а найденный кошелёк — обычная запись с мнемоникой и путём деривации.
+
+Пачки раздаются пулу процессов (engine._init_worker), как только найдено
+нужное число совпадений, ещё не начатые пачки отменяются.
+"""
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import core
+import engine
+
+# Адресов на одну мнемонику (= на одну задачу пула)
+BATCH = 1000
+SAMPLE_SIZE = 8
+
+HEX = "0123456789abcdef"
+BECH32 = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+class PatternError(Exception):
+    pass
+
+
+def vanity_config(net_config, batch=BATCH):
+    """
+    Конфиг сети для поиска: диапазон адресов вместо одного адреса.
+    """
+    config = {k: v for k, v in (net_config or {}).items() if k not in ("account_range", "path")}
+    config["address_range"] = f"0..{batch - 1}"
+    return config
+
+
+def generation_meta(target, words_num=12, batch=BATCH):
+    """
+    Метаданные для футера файла с найденными адресами: конфиг, с которым шёл поиск
+    (диапазон адресов), — по нему audit.py находит запись среди адресов мнемоники.
+    """
+    module_name, net_config, coin_symbol = target
+    return core.generation_meta([(module_name, vanity_config(net_config, batch), coin_symbol)], words_num)
+
+
+def analyze(target, words_num=12):
+    """
+    Определяет по нескольким адресам модуля неизменную часть (0x, cosmos1, bc1q...)
+    и алфавит адреса. Возвращает (fixed_prefix, alphabet_name).
+    """
+    module_name, net_config, coin_symbol = target
+    engine._init_worker([(module_name, vanity_config(net_config, SAMPLE_SIZE), coin_symbol)], words_num, "")
+    w = engine._worker
+    caller, _ = w["targets"][0]
+    mnemonic = next(w["mnemonics"])
+    entries = engine.build_entries(caller, w["seed_gen"](mnemonic).Generate(""), mnemonic, coin_symbol, "")
+    addresses = [e["address"] for e in entries if e.get("address")]
+    if len(addresses) < 2:
+        raise PatternError("Модуль не поддерживает диапазоны адресов")
+
+    fixed = addresses[0]
+    for address in addresses[1:]:
+        while not address.startswith(fixed):
+            fixed = fixed[:-1]
+
+    if fixed.lower().startswith("0x"):
+        return fixed, "hex"
+    if "1" in fixed and fixed.split("1", 1)[0].isalpha() and fixed.split("1", 1)[0].islower():
+        return fixed, "bech32"
+    return fixed, "base58"
+
+
+def _char_probability(c, alphabet, case_sensitive):
+    if alphabet == "hex":
+        if c.lower() not in HEX:
+            return 0.0
+        # EIP-55: регистр буквы задаёт контрольная сумма — угадывается с вероятностью 1/2
+        return 1 / 16 / (2 if case_sensitive and c.isalpha() else 1)
+    if alphabet == "bech32":
+        return 1 / 32 if c.lower() in BECH32 else 0.0
+    if case_sensitive:
+        return 1 / 58 if c in BASE58 else 0.0
+    return sum(1 for a in BASE58 if a.lower() == c.lower()) / 58
+
+
+def make_pattern(fixed, alphabet, prefix="", suffix="", case_sensitive=False):
+    """
+    Нормализует шаблон: префикс дополняется неизменной частью адреса ("dead" -> "0xdead").
+    Возвращает (pattern, probability) — вероятность совпадения одного случайного адреса.
+    """
+    if not prefix and not suffix:
+        raise PatternError("Укажите начало или конец адреса")
+    if alphabet == "bech32":
+        case_sensitive = False
+    if prefix and not prefix.lower().startswith(fixed.lower()):
+        prefix = fixed + prefix
+    free = prefix[len(fixed):] if prefix else ""
+
+    probability = 1.0
+    for c in free + suffix:
+        p = _char_probability(c, alphabet, case_sensitive)
+        if not p:
+            raise PatternError(f"Символ '{c}' не встречается в адресах этой сети")
+        probability *= p
+
+    if not case_sensitive:
+        prefix, suffix = prefix.lower(), suffix.lower()
+    return (prefix, suffix, case_sensitive), probability
+
+
+def matches(address, pattern):
+    prefix, suffix, case_sensitive = pattern
+    if not case_sensitive:
+        address = address.lower()
+    return address.startswith(prefix) and address.endswith(suffix)
+
+
+def expected_seconds(probability, rate, confidence=0.5):
+    """
+    Время, за которое совпадение найдётся с вероятностью `confidence` при скорости `rate` адресов/сек.
+    """
+    if not rate or probability >= 1:
+        return 0.0
+    return math.log(1 - confidence) / math.log(1 - probability) / rate
+
+
+def _search_batch(pattern):
+    """
+    Одна мнемоника -> BATCH адресов. Возвращает (попыток, совпавшие записи).
+    """
+    w = engine._worker
+    caller, coin_symbol = w["targets"][0]
+    mnemonic = next(w["mnemonics"])
+    seed_bytes = w["seed_gen"](mnemonic).Generate(w["passphrase"])
+    entries = engine.build_entries(caller, seed_bytes, mnemonic, coin_symbol, w["passphrase"])
+    return len(entries), [e for e in entries if e.get("address") and matches(e["address"], pattern)]
+
+
+def search(target, pattern, want=1, words_num=12, passphrase="", workers=1, batch=BATCH):
+    """
+    Ищет `want` адресов по шаблону. Отдаёт (попыток, новые совпадения) после каждой пачки.
+    Прервать поиск можно, просто закрыв генератор (break) — незапущенные пачки отменяются.
+    """
+    module_name, net_config, coin_symbol = target
+    targets = [(module_name, vanity_config(net_config, batch), coin_symbol)]
+    found = 0
+
+    if workers <= 1:
+        engine._init_worker(targets, words_num, passphrase)
+        while found < want:
+            attempts, new = _search_batch(pattern)
+            new = new[:want - found]
+            found += len(new)
+            yield attempts, new
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=engine._init_worker,
+                                   initargs=(targets, words_num, passphrase, True))
+    try:
+        # По две пачки на процесс, чтобы воркеры не простаивали между задачами
+        pending = {executor.submit(_search_batch, pattern) for _ in range(workers * 2)}
+        while pending and found < want:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                attempts, new = future.result()
+                new = new[:want - found]
+                found += len(new)
+                yield attempts, new
+                if found < want:
+                    pending.add(executor.submit(_search_batch, pattern))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run(target, prefix="", suffix="", case_sensitive=False, want=1, words_num=12, passphrase="",
+        workers=1, on_progress=None):
+    """
+    Полный поиск: анализ сети, шаблон, пул. on_progress(attempts, found, rate, probability)
+    вызывается после каждой пачки. Возвращает (records, stats).
+    """
+    fixed, alphabet = analyze(target, words_num)
+    pattern, probability = make_pattern(fixed, alphabet, prefix, suffix, case_sensitive)
+
+    started = time.perf_counter()
+    attempts = 0
+    records = []
+    for batch_attempts, new in search(target, pattern, want, words_num, passphrase, workers):
+        attempts += batch_attempts
+        records.extend(new)
+        if on_progress:
+            elapsed = time.perf_counter() - started
+            on_progress(attempts, len(records), attempts / elapsed if elapsed else 0.0, probability)
+
+    elapsed = time.perf_counter() - started
+    return records, {
+        "pattern": {"prefix": pattern[0], "suffix": pattern[1], "case_sensitive": pattern[2]},
+        "expected_attempts": round(1 / probability),
+        "attempts": attempts,
+        "found": len(records),
+        "seconds": round(elapsed, 3),
+        "addresses_per_sec": round(attempts / elapsed, 1) if elapsed else None,
+    }
@@ -0,0 +1,145 @@
+"""
+Хранилище ключей (vault): scrypt один раз за сессию вместо scrypt на каждый файл.
+
+Файл data/vault.key хранит случайный мастер-ключ, зашифрованный ключом из
+пароля (scrypt с собственной солью). После разблокировки ключ каждого .enc
+файла получается через HKDF-SHA256 от мастер-ключа и соли файла — это
+микросекунды, поэтому открытие следующих файлов scrypt не требует.
+
+Файлы хранилища пишутся контейнером v2 (см. container.py): в заголовке id
+хранилища, по которому core находит нужный ключ. Файлы на пароле (v1 и старый
+формат salt+nonce+ciphertext) по-прежнему открываются через core.derive_key —
+разблокированный Vault просто помнит пароль сессии.
+"""
+import os
+import json
+import time
+import hashlib
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.backends import default_backend
+
+import metrics
+
+VAULT_FILE = os.path.join("data", "vault.key")
+VAULT_VERSION = 1
+KEY_ID_SIZE = 8
+FILE_KEY_INFO = b"keyforge/file-key/v1"
+
+# Разблокированные хранилища процесса: (путь, хэш пароля) -> Vault
+_sessions = {}
+
+
+class VaultError(Exception):
+    pass
+
+
+def _scrypt(password, salt, n, r, p):
+    m = metrics.active
+    if m: t0 = time.perf_counter()
+    kdf = Scrypt(salt=salt, length=32, n=n, r=r, p=p, backend=default_backend())
+    key = kdf.derive(password.encode())
+    if m: m.observe("kdf", time.perf_counter() - t0, network="")
+    return key
+
+
+class Vault:
+    def __init__(self, master_key, key_id, password=None):
+        self.master_key = master_key
+        self.key_id = key_id
+        # Пароль сессии — для файлов без хранилища (контейнер v1 и старый формат)
+        self.password = password
+        self._scrypt_cache = {}
+
+    def file_key(self, salt):
+        """
+        Ключ AES-256 конкретного файла: HKDF(мастер-ключ, соль файла).
+        """
+        return HKDF(algorithm=hashes.SHA256(), length=32, salt=salt,
+                    info=FILE_KEY_INFO, backend=default_backend()).derive(self.master_key)
+
+    def password_key(self, salt, derive_key):
+        """
+        Ключ файла на пароле сессии (scrypt), с кэшем по соли.
+        """
+        if self.password is None:
+            raise VaultError("Файл зашифрован паролем, а хранилище открыто без него")
+        key = self._scrypt_cache.get(salt)
+        if key is None:
+            key = self._scrypt_cache[salt] = derive_key(self.password, salt)
+        return key
+
+
+def exists(path=None):
+    return os.path.exists(path or VAULT_FILE)
+
+
+def create(password, path=None, n=2 ** 14, r=8, p=1):
+    """
+    Создаёт новое хранилище со случайным мастер-ключом.
+    """
+    path = path or VAULT_FILE
+    if os.path.exists(path):
+        raise VaultError(f"Хранилище уже существует: {path}")
+    master_key = os.urandom(32)
+    key_id = os.urandom(KEY_ID_SIZE)
+    salt = os.urandom(16)
+    nonce = os.urandom(12)
+    wrapped = AESGCM(_scrypt(password, salt, n, r, p)).encrypt(nonce, master_key, key_id)
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": VAULT_VERSION,
+            "key_id": key_id.hex(),
+            "kdf": {"name": "scrypt", "salt": salt.hex(), "n": n, "r": r, "p": p},
+            "nonce": nonce.hex(),
+            "wrapped_key": wrapped.hex(),
+        }, f, indent=2)
+
+    vault = Vault(master_key, key_id, password)
+    _sessions[_session_key(path, password)] = vault
+    return vault
+
+
+def _session_key(path, password):
+    return os.path.abspath(path), hashlib.sha256(password.encode()).digest()
+
+
+def unlock(password, path=None):
+    """
+    Разблокирует хранилище (один scrypt). Повторный вызов с тем же паролем
+    в этом процессе возвращает уже открытый Vault.
+    """
+    path = path or VAULT_FILE
+    cached = _sessions.get(_session_key(path, password))
+    if cached:
+        return cached
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        raise VaultError(f"Хранилище не найдено: {path}")
+    if data.get("version") != VAULT_VERSION:
+        raise VaultError(f"Неподдерживаемая версия хранилища: {data.get('version')}")
+
+    kdf = data["kdf"]
+    key_id = bytes.fromhex(data["key_id"])
+    try:
+        master_key = AESGCM(_scrypt(password, bytes.fromhex(kdf["salt"]), kdf["n"], kdf["r"], kdf["p"])).decrypt(
+            bytes.fromhex(data["nonce"]), bytes.fromhex(data["wrapped_key"]), key_id)
+    except Exception:
+        raise VaultError("Неверный пароль хранилища")
+
+    vault = Vault(master_key, key_id, password)
+    _sessions[_session_key(path, password)] = vault
+    return vault
+
+
+def lock_all():
+    _sessions.clear()
@@ -0,0 +1,179 @@
+"""
+Watch-only файл: только публичные поля кошельков рядом с зашифрованным .enc.
+
+Мониторам балансов и депозитов нужны адрес, сеть, путь и публичный ключ —
+ради них не нужно расшифровывать .enc (scrypt) и видеть мнемоники и
+приватные ключи. Файл не секретный, это JSON Lines — читается потоково
+построчно любым языком:
+
+    {"format": "keyforge-watch", "version": 1, "source": "wallets_ETH_....enc", "auth": "sha256"}
+    {"network": "ETH", "address": "0x...", "path": "m/44'/60'/0'/0/0", "public_key": "02...", "xpub": "xpub..."}
+    ...
+    {"end": true, "records": 1000, "digest": "<hex>"}
+
+digest — SHA-256 всех строк до трейлера (обрезка и порча файла), либо
+HMAC-SHA256 с ключом наблюдателя ("auth": "hmac-sha256") — тогда подмену
+адресов обнаружит тот, у кого есть ключ. Ключ не связан с паролем .enc.
+
+xpub аккаунта (BIP44/49/84/86, EVM) пишется, если в конфиге сети
+"public_keys": true (см. derivation.derive_keys): по нему наблюдатель сам
+выводит следующие адреса без seed.
+"""
+import os
+import json
+import hmac
+import hashlib
+
+FORMAT = "keyforge-watch"
+VERSION = 1
+WATCH_SUFFIX = ".watch.jsonl"
+
+PUBLIC_FIELDS = {"network", "type", "address", "path", "public_key", "xpub"}
+# Мульти-режим: BTC_address, osmo_path, ETH_public_key...
+PUBLIC_SUFFIXES = ("_address", "_path", "_public_key", "_xpub")
+
+
+class WatchError(Exception):
+    pass
+
+
+def watch_path(enc_path):
+    """
+    wallets_ETH_x.enc -> wallets_ETH_x.watch.jsonl
+    """
+    base = enc_path[:-len(".enc")] if enc_path.endswith(".enc") else enc_path
+    return base + WATCH_SUFFIX
+
+
+def public_record(record):
+    """
+    Только публичные поля записи (белый список — новые секретные поля сюда не попадут).
+    """
+    return {k: v for k, v in record.items() if k in PUBLIC_FIELDS or k.endswith(PUBLIC_SUFFIXES)}
+
+
+def _digest(key=None):
+    return hmac.new(key, digestmod=hashlib.sha256) if key else hashlib.sha256()
+
+
+class WatchWriter:
+    """
+    Потоковая запись watch-only файла: заголовок, записи, close() — трейлер с digest.
+    """
+
+    def __init__(self, f, source="", key=None, _resume=False):
+        self.f = f
+        self.records = 0
+        self.digest = _digest(key)
+        if not _resume:
+            self._line({"format": FORMAT, "version": VERSION, "source": source,
+                        "auth": "hmac-sha256" if key else "sha256"})
+
+    @classmethod
+    def resume(cls, f, offset, key=None):
+        """
+        Продолжает недописанный файл (режим 'r+b') с контрольной точки `offset` —
+        строки до неё заново входят в digest, всё после срезается.
+        """
+        writer = cls(f, key=key, _resume=True)
+        f.seek(0)
+        lines = 0
+        while f.tell() < offset:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                raise WatchError("Контрольная точка не совпадает с watch-only файлом")
+            writer.digest.update(line)
+            lines += 1
+        if f.tell() != offset or not lines:
+            raise WatchError("Контрольная точка не совпадает с watch-only файлом")
+        f.truncate()
+        writer.records = lines - 1
+        return writer
+
+    def _line(self, obj):
+        line = (json.dumps(obj, ensure_ascii=False) + "\n").encode()
+        self.digest.update(line)
+        self.f.write(line)
+
+    def write_many(self, records):
+        for record in records:
+            self._line(public_record(record))
+        self.records += len(records)
+
+    def close(self):
+        trailer = {"end": True, "records": self.records, "digest": self.digest.hexdigest()}
+        self.f.write((json.dumps(trailer) + "\n").encode())
+        self.f.flush()
+
+
+def iter_watch(path, key=None):
+    """
+    Лениво отдаёт записи watch-only файла. В конце сверяет число записей и digest;
+    файл с HMAC без ключа проверяется только на обрезку. Бросает WatchError.
+    """
+    with open(path, "rb") as f:
+        head = f.readline()
+        try:
+            header = json.loads(head)
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != FORMAT:
+            raise WatchError("Не watch-only файл Key Forge")
+        check = header.get("auth") == "sha256" or key is not None
+        if header.get("auth") == "sha256":
+            key = None
+        digest = _digest(key)
+        digest.update(head)
+
+        records = 0
+        for line in f:
+            obj = json.loads(line)
+            if obj.get("end"):
+                if obj.get("records") != records:
+                    raise WatchError("Трейлер не совпадает с содержимым файла")
+                if check and not hmac.compare_digest(obj.get("digest", ""), digest.hexdigest()):
+                    raise WatchError("Неверный digest: файл изменён" + (" или неверный ключ" if key else ""))
+                if f.read(1):
+                    raise WatchError("Лишние данные после трейлера")
+                return
+            digest.update(line)
+            records += 1
+            yield obj
+        raise WatchError("Файл обрезан: нет трейлера")
+
+
+def verify(path, key=None):
+    """
+    {"file", "status": "ok" | "error", "records" | "error"} для watch-only файла.
+    """
+    try:
+        records = sum(1 for _ in iter_watch(path, key))
+    except (WatchError, ValueError, OSError) as e:
+        return {"file": path, "status": "error", "error": str(e)}
+    return {"file": path, "status": "ok", "records": records}
+
+
+def export_file(enc_path, password, key=None, output=None):
+    """
+    Watch-only файл для уже записанного .enc (расшифровка целиком). Возвращает путь.
+    """
+    import core
+
+    output = output or watch_path(enc_path)
+    tmp = output + ".part"
+    try:
+        with open(tmp, "wb") as f:
+            writer = WatchWriter(f, source=os.path.basename(enc_path), key=key)
+            batch = []
+            for record in core.iter_records(enc_path, password):
+                batch.append(record)
+                if len(batch) >= 1000:
+                    writer.write_many(batch)
+                    batch = []
+            writer.write_many(batch)
+            writer.close()
+    except BaseException:
+        os.remove(tmp)
+        raise
+    os.replace(tmp, output)
+    return output